@@ -11,6 +11,17 @@ class RaisingArgumentParser(argparse.ArgumentParser):
     parsing fails.
     """
 
+    def add_optional_positional(self, *args, **kwargs):
+        """
+        Adds a positional argument that can be left out (because an option replaces it), but that is matched like a
+        required one. Optional positionals (nargs='?' or '*') don't work for this: argparse fills them as soon as it
+        finds the first positional, so 'give --user john read --plugin dataexplorer' would leave 'dataexplorer'
+        unrecognized.
+        """
+        action = self.add_argument(*args, **kwargs)
+        action.required = False
+        return action
+
     def error(self, message):
         message = self.prog + ': ' + message
         raise ArgumentSyntaxError(message=message, usage=self.get_usage_as_string())
@@ -2,8 +2,10 @@ import mimetypes
 import textwrap
 from argparse import RawDescriptionHelpFormatter
 from os import path as os_path
+from pathlib import Path
 from typing import List
 
+import mcmd.config.config as config
 from mcmd.commands._registry import arguments
 from mcmd.core.command import command
 from mcmd.core.compatibility import version
@@ -11,14 +13,18 @@ from mcmd.core.context import context
 from mcmd.core.errors import McmdError
 from mcmd.io import io
 from mcmd.io.io import highlight
-from mcmd.molgenis import api
+from mcmd.io.logging import get_logger
+from mcmd.molgenis import api, metadata, bulk
 from mcmd.molgenis.client import post, get, post_files
+from mcmd.molgenis.paging import query
 from mcmd.molgenis.principals import to_role_name
-from mcmd.utils.file_helpers import get_file_name_from_path, scan_folders_for_files, select_path
+from mcmd.utils.file_helpers import get_file_name_from_path, scan_folders_for_files, select_path, read_rows
 
 # Store a reference to the parser so that we can show an error message for the custom validation rule
 p_add_theme = None
 
+log = get_logger()
+
 
 # =========
 # Arguments
@@ -66,6 +72,31 @@ def add_arguments(subparsers):
                             action='store_true',
                             help="set change password to true for user")
 
+    p_add_users = p_add_subparsers.add_parser('users',
+                                              help='add users from a file',
+                                              formatter_class=RawDescriptionHelpFormatter,
+                                              description=textwrap.dedent(
+                                                  """
+                                                  Add many users at once from a CSV or TSV file.
+
+                                                  The file has a header with the column names. Only the 'username'
+                                                  column is required. The other columns are 'password', 'email',
+                                                  'active', 'superuser' and 'changePassword'. They default to the same
+                                                  values as in 'mcmd add user'. Users that already exist are skipped.
+
+                                                  Example file:
+                                                    username,email,superuser
+                                                    henk,henk@example.org,false
+                                                    ingrid,ingrid@example.org,true
+                                                  """
+                                              ))
+    p_add_users.set_defaults(func=add_users,
+                             write_to_history=True)
+    p_add_users.add_argument('--from-file', '-f',
+                             required=True,
+                             metavar='FILE',
+                             help='the path to the CSV or TSV file with the users')
+
     p_add_role = p_add_subparsers.add_parser('role',
                                              help='add a role',
                                              formatter_class=RawDescriptionHelpFormatter,
@@ -173,6 +204,62 @@ def add_user(args):
                'active': active,
                'superuser': superuser
                })
+    metadata.refresh_row('sys_sec_User', args.username)
+
+
+@command
+def add_users(args):
+    file = Path(args.from_file)
+    io.start('Adding users from %s' % highlight(file.name))
+    invalid = list()
+    try:
+        users = _read_users(read_rows(file, required_columns=['username']), invalid)
+        result = bulk.add_rows('sys_sec_User', users, key='username')
+    finally:
+        metadata.invalidate('sys_sec_User')
+
+    failed = invalid + result.failed
+    report = '\n'.join('  {}: {}'.format(label, message) for label, message in failed + result.skipped)
+    if failed:
+        raise McmdError('Failed to add {} users ({} added, {} skipped)'.format(len(failed), result.added,
+                                                                             len(result.skipped)),
+                        info=report)
+
+    io.update('({} added, {} skipped)'.format(result.added, len(result.skipped)))
+    if result.skipped:
+        io.succeed()
+        log.info(report)
+
+
+def _read_users(rows, invalid):
+    """Converts the rows of the file to users, with the same defaults as add_user. Yields them with their line
+    number. Rows that can't be converted are added to the invalid list."""
+    for line, row in rows:
+        label = 'line {}'.format(line)
+        username = (row.get('username') or '').strip()
+        try:
+            if not username:
+                raise McmdError('No username')
+
+            yield label, {'username': username,
+                          'password_': row.get('password') or username,
+                          'changePassword': _to_bool(row.get('changePassword'), False),
+                          'Email': row.get('email') or username + '@molgenis.org',
+                          'active': _to_bool(row.get('active'), True),
+                          'superuser': _to_bool(row.get('superuser'), False)}
+        except McmdError as e:
+            invalid.append((label, e.message))
+
+
+def _to_bool(value, default):
+    if value is None or value.strip() == '':
+        return default
+    elif value.strip().lower() in ('true', 'yes', '1'):
+        return True
+    elif value.strip().lower() in ('false', 'no', '0'):
+        return False
+    else:
+        raise McmdError('Not a boolean: {}'.format(value))
 
 
 @command
@@ -193,14 +280,19 @@ def add_role(args):
 
     data = {'entities': [role]}
     post(api.rest2('sys_sec_Role'), data=data)
+    metadata.refresh_row('sys_sec_Role', role_name)
 
 
 def _get_group_id(group_name) -> str:
-    groups = get(api.rest2('sys_sec_Group'),
-                 params={
-                     'attrs': 'id',
-                     'q': 'name=={}'.format(group_name)
-                 }).json()['items']
+    if metadata.is_cached('sys_sec_Group'):
+        group = metadata.get_row('sys_sec_Group', group_name)
+        groups = [group] if group else []
+    else:
+        groups = get(api.rest2('sys_sec_Group'),
+                     params={
+                         'attrs': 'id',
+                         'q': 'name=={}'.format(group_name)
+                     }).json()['items']
     if len(groups) == 0:
         raise McmdError('No group found with name {}'.format(groups))
     else:
@@ -208,11 +300,11 @@ def _get_group_id(group_name) -> str:
 
 
 def _get_role_ids(role_names) -> List[str]:
-    roles = get(api.rest2('sys_sec_Role'),
-                params={
-                    'attrs': 'id,name',
-                    'q': 'name=in=({})'.format(','.join(role_names))
-                }).json()['items']
+    if metadata.is_cached('sys_sec_Role'):
+        roles = [metadata.get_row('sys_sec_Role', role_name) for role_name in role_names]
+        roles = [role for role in roles if role]
+    else:
+        roles = query('sys_sec_Role', q='name=in=({})'.format(','.join(role_names)), attrs='id,name')
 
     name_to_id = {role['name']: role['id'] for role in roles}
     not_found = list()
@@ -231,6 +323,9 @@ def add_group(args):
     group_name = _to_group_name(args.name)
     io.start('Adding group %s' % highlight(group_name))
     post(api.group(), data={'name': group_name, 'label': args.name})
+    metadata.refresh_row('sys_sec_Group', group_name)
+    # adding a group also adds its roles
+    metadata.invalidate('sys_sec_Role')
 
 
 @version('7.0.0')
@@ -256,21 +351,26 @@ def add_package(args):
         data['parent'] = args.parent
 
     post(api.rest1('sys_md_Package'), data=data)
+    metadata.refresh_row('sys_md_Package', args.id)
 
 
 @command
 def add_token(args):
     io.start('Adding token %s for user %s' % (highlight(args.token), highlight(args.user)))
 
-    user = get(api.rest2('sys_sec_User'),
-               params={
-                   'attrs': 'id',
-                   'q': 'username=={}'.format(args.user)
-               })
-    if user.json()['total'] == 0:
+    if metadata.is_cached('sys_sec_User'):
+        user = metadata.get_row('sys_sec_User', args.user)
+        users = [user] if user else []
+    else:
+        users = get(api.rest2('sys_sec_User'),
+                    params={
+                        'attrs': 'id',
+                        'q': 'username=={}'.format(args.user)
+                    }).json()['items']
+    if len(users) == 0:
         raise McmdError('Unknown user %s' % args.user)
 
-    user_id = user.json()['items'][0]['id']
+    user_id = users[0]['id']
 
     data = {'User': user_id,
             'token': args.token}
@@ -336,8 +436,8 @@ def _prepare_files_for_upload(paths, names, valid_content_types):
     :param paths: a list of paths to the files to upload
     :param names: the names of files to upload
     :param valid_content_types: set of the possible valid content types
-    :return: a dictionary with as key the name of the file and as value a tuple with: filename, file to upload, and
-    content type
+    :return: a dictionary with as key the name of the file and as value a tuple with: filename, path of the file to
+    upload, and content type
 
     :exception McmdError when the file on the given path does not exist and when the content type of the file is
     invalid.
@@ -350,11 +450,7 @@ def _prepare_files_for_upload(paths, names, valid_content_types):
             raise McmdError(
                 'File [{}] does not exist on path [{}]'.format(file_name, path.strip(file_name)))
         elif content_type in valid_content_types:
-            try:
-                files[name] = (file_name, open(path, 'rb'), content_type)
-            except FileNotFoundError:
-                raise McmdError(
-                    'File [{}] does not exist on path [{}]'.format(file_name, path.strip(file_name)))
+            files[name] = (file_name, path, content_type)
         else:
             raise McmdError(
                 'File [{}] does not have valid content type [{}], '
@@ -366,7 +462,7 @@ def _prepare_files_for_upload(paths, names, valid_content_types):
 
 def _get_path_from_quick_folders(file_name):
     file_name = os_path.splitext(file_name)[0]
-    file_map = scan_folders_for_files(context().get_resource_folders())
+    file_map = scan_folders_for_files(context().get_resource_folders(), config.get('resources', 'recursive'))
     path = select_path(file_map, file_name)
     return str(path)
 
@@ -0,0 +1,66 @@
+"""
+Manages the local metadata cache of the selected host. The cache is opt-in: enable it with the 'metadata' setting in the
+'cache' section of the configuration file. Clearing the cache also forgets which files have been imported into the host,
+and the parsed scripts.
+"""
+
+import mcmd.config.config as config
+from mcmd.commands._registry import arguments
+from mcmd.core.command import command
+from mcmd.core.errors import McmdError
+from mcmd.io import io
+from mcmd.io.io import highlight
+from mcmd.molgenis import metadata, import_ledger
+from mcmd.script import command_cache, script_cache
+
+
+# =========
+# Arguments
+# =========
+
+@arguments('cache')
+def add_arguments(subparsers):
+    p_cache = subparsers.add_parser('cache',
+                                    help='manage the local metadata cache',
+                                    description="Manage the local copy of the entity types, packages, groups, roles "
+                                                "and users of the selected host. Run 'mcmd cache warm -h' or "
+                                                "'mcmd cache clear -h' to view the help for those subcommands.")
+    p_cache_subparsers = p_cache.add_subparsers(dest='type', metavar='')
+
+    p_cache_warm = p_cache_subparsers.add_parser('warm',
+                                                 help='fetch all entity types, packages, groups, roles and users and '
+                                                      'store them in the cache')
+    p_cache_warm.set_defaults(func=cache_warm,
+                              write_to_history=False)
+
+    p_cache_clear = p_cache_subparsers.add_parser('clear',
+                                                  help='remove everything from the cache, including the record of '
+                                                       'imported files that is used by import --skip-unchanged and '
+                                                       'parsed scripts')
+    p_cache_clear.set_defaults(func=cache_clear,
+                               write_to_history=False)
+
+
+# =======
+# Methods
+# =======
+
+# noinspection PyUnusedLocal
+@command
+def cache_warm(args):
+    if not metadata.is_enabled():
+        raise McmdError('The metadata cache is disabled',
+                        info="Set 'metadata' to true in the 'cache' section of the configuration file to enable it")
+
+    io.start('Caching the metadata of {}'.format(highlight(config.get('host', 'selected'))))
+    metadata.warm()
+
+
+# noinspection PyUnusedLocal
+@command
+def cache_clear(args):
+    io.start('Clearing the cache of {}'.format(highlight(config.get('host', 'selected'))))
+    metadata.clear()
+    import_ledger.clear()
+    command_cache.clear()
+    script_cache.clear()
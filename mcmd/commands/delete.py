@@ -4,9 +4,11 @@ import mcmd.io.ask
 import mcmd.molgenis.client as client
 from mcmd.commands._registry import arguments
 from mcmd.core.command import command
+from mcmd.core.errors import McmdError
 from mcmd.io import io
 from mcmd.io.io import highlight
-from mcmd.molgenis import api
+from mcmd.io.logging import get_logger
+from mcmd.molgenis import api, metadata, bulk, package_tree, import_ledger
 from mcmd.molgenis.resources import detect_resource_type, ensure_resource_exists, ResourceType
 
 
@@ -46,6 +48,17 @@ def add_arguments(subparsers):
                                   action='store_true',
                                   help='use in conjunction with --package to only delete the contents of the package')
 
+    p_delete.add_argument('--query', '-q',
+                          metavar='RSQL',
+                          type=str,
+                          help='use in conjunction with --data to only delete the rows that match an RSQL query '
+                               '(for example "age>60")')
+
+    p_delete.add_argument('--dry-run', '-n',
+                          action='store_true',
+                          help='use in conjunction with --package to show what would be deleted, without deleting '
+                               'anything')
+
     p_delete.add_argument('--force', '-f',
                           action='store_true',
                           help='forces the delete action without asking for confirmation')
@@ -54,6 +67,13 @@ def add_arguments(subparsers):
                           help='the identifier of the resource to delete')
 
 
+# =======
+# Globals
+# =======
+
+log = get_logger()
+
+
 # =======
 # Methods
 # =======
@@ -61,7 +81,11 @@ def add_arguments(subparsers):
 
 @command
 def delete(args):
+    _validate_args(args)
     resource_type = _get_resource_type(args)
+    if args.dry_run and resource_type is not ResourceType.PACKAGE:
+        raise McmdError('--dry-run can only be used when deleting a package')
+
     if resource_type is ResourceType.ENTITY_TYPE:
         if args.data:
             _delete_entity_type_data(args)
@@ -70,7 +94,9 @@ def delete(args):
         else:
             _delete_entity_type(args)
     elif resource_type is ResourceType.PACKAGE:
-        if args.contents:
+        if args.dry_run:
+            _show_package_deletion_plan(args)
+        elif args.contents:
             _delete_package_contents(args)
         else:
             _delete_package(args)
@@ -78,18 +104,38 @@ def delete(args):
         _delete_group(args)
 
 
+def _validate_args(args):
+    if args.query and not args.data:
+        raise McmdError('--query can only be used in conjunction with --data')
+
+
 def _delete_entity_type(args):
     if args.force or (not args.force and mcmd.io.ask.confirm(
             'Are you sure you want to delete entity type {} including its data?'.format(args.resource))):
         io.start('Deleting entity type {}'.format(highlight(args.resource)))
         _delete_rows(ResourceType.ENTITY_TYPE.get_entity_id(), [args.resource])
+        metadata.remove_row(ResourceType.ENTITY_TYPE.get_entity_id(), args.resource)
+        _forget_imports()
 
 
 def _delete_entity_type_data(args):
-    if args.force or (not args.force and mcmd.io.ask.confirm(
+    if args.query:
+        _delete_entity_type_data_matching_query(args)
+    elif args.force or (not args.force and mcmd.io.ask.confirm(
             'Are you sure you want to delete all data in entity type {}?'.format(args.resource))):
         io.start('Deleting all data from entity {}'.format(highlight(args.resource)))
         client.delete(api.rest1(args.resource))
+        _forget_imports()
+
+
+def _delete_entity_type_data_matching_query(args):
+    if args.force or (not args.force and mcmd.io.ask.confirm(
+            'Are you sure you want to delete the rows of entity type {} that match {}?'.format(args.resource,
+                                                                                            args.query))):
+        io.start('Deleting data matching {} from entity {}'.format(highlight(args.query), highlight(args.resource)))
+        num_deleted = bulk.delete_matching_rows(args.resource, args.query)
+        if num_deleted == 0:
+            io.info('No rows match {}'.format(highlight(args.query)))
 
 
 def _delete_entity_type_attribute(args):
@@ -109,37 +155,49 @@ def _delete_package(args):
     if args.force or (not args.force and mcmd.io.ask.confirm(
             'Are you sure you want to delete package {} and all of its contents?'.format(args.resource))):
         io.start('Deleting package {}'.format(highlight(args.resource)))
-        _delete_rows(ResourceType.PACKAGE.get_entity_id(), [args.resource])
+        _tear_down_package(args.resource, include_root=True)
+        _forget_imports()
 
 
 def _delete_package_contents(args):
     if args.force or (not args.force and mcmd.io.ask.confirm(
             'Are you sure you want to delete the contents of package {}?'.format(args.resource))):
         io.start('Deleting contents of package {}'.format(highlight(args.resource)))
-        _delete_entity_types_in_package(args.resource)
-        _delete_packages_in_package(args.resource)
+        _tear_down_package(args.resource, include_root=False)
+        _forget_imports()
+
+
+def _tear_down_package(package_id, include_root):
+    tree = package_tree.load_package_tree(package_id)
+    try:
+        package_tree.delete(package_tree.plan_deletion(tree, include_root))
+    finally:
+        metadata.invalidate(ResourceType.ENTITY_TYPE.get_entity_id(), ResourceType.PACKAGE.get_entity_id())
+
+
+def _forget_imports():
+    # imported data is gone, so files that have been imported before have to be imported again
+    import_ledger.clear()
 
 
-def _delete_entity_types_in_package(package_id):
-    response = client.get(api.rest2(ResourceType.ENTITY_TYPE.get_entity_id()),
-                          params={
-                              'attrs': 'id',
-                              'q': 'package==' + package_id
-                          })
-    entity_ids = [entity_type['id'] for entity_type in response.json()['items']]
-    if len(entity_ids) > 0:
-        _delete_rows(ResourceType.ENTITY_TYPE.get_entity_id(), entity_ids)
+def _show_package_deletion_plan(args):
+    io.start('Loading the contents of package {}'.format(highlight(args.resource)))
+    tree = package_tree.load_package_tree(args.resource)
+    steps = package_tree.plan_deletion(tree, include_root=not args.contents)
+    io.succeed()
 
+    if len(steps) == 0:
+        io.info('Package {} is empty, nothing would be deleted'.format(highlight(args.resource)))
+        return
 
-def _delete_packages_in_package(package_id):
-    response = client.get(api.rest2(ResourceType.PACKAGE.get_entity_id()),
-                          params={
-                              'attrs': 'id',
-                              'q': 'parent==' + package_id
-                          })
-    package_ids = [entity_type['id'] for entity_type in response.json()['items']]
-    if len(package_ids) > 0:
-        _delete_rows(ResourceType.PACKAGE.get_entity_id(), package_ids)
+    io.info('Deleting {} would take these steps:'.format(
+        'the contents of package ' + highlight(args.resource) if args.contents else 'package ' + highlight(
+            args.resource)))
+    for number, step in enumerate(steps, start=1):
+        log.info('  {}. Delete {} {}{}'.format(number,
+                                               step.resource_type.get_label().lower() + 's',
+                                               ', '.join(highlight(id_) for id_ in step.ids),
+                                               ' (in one request, they depend on each other)' if step.together else ''))
 
 
 def _delete_group(args):
@@ -147,10 +205,13 @@ def _delete_group(args):
             'Are you sure you want to delete group {}?'.format(args.resource))):
         io.start('Deleting group {}'.format(highlight(args.resource)))
         client.delete(urljoin(api.group(), args.resource))
+        metadata.remove_row(ResourceType.GROUP.get_entity_id(), args.resource)
+        # deleting a group also deletes its roles
+        metadata.invalidate('sys_sec_Role')
 
 
 def _delete_rows(entity_type, rows):
-    client.delete_data(api.rest2(entity_type), rows)
+    bulk.delete_rows(entity_type, rows)
 
 
 def _get_resource_type(args):
@@ -5,18 +5,29 @@ or principal doesn't exist, the program will terminate.
 """
 import textwrap
 from argparse import RawDescriptionHelpFormatter
+from collections import defaultdict
+from pathlib import Path
+from typing import Optional, List, Dict, Tuple
 
+import mcmd.config.config as config
 from mcmd.commands._registry import arguments
 from mcmd.core.command import command
 from mcmd.core.compatibility import version
 from mcmd.core.errors import McmdError
 from mcmd.io import io
 from mcmd.io.io import highlight
-from mcmd.molgenis.principals import PrincipalType, get_principal_type_from_args
-from mcmd.molgenis.resources import detect_resource_type, ensure_resource_exists, ResourceType
-from mcmd.molgenis.security import security
+from mcmd.molgenis import bulk, package_tree
+from mcmd.molgenis.principals import PrincipalType, get_principal_type_from_args, find_principal_types_from_args, \
+    select_principal_type
+from mcmd.molgenis.resources import ensure_resource_exists, ResourceType, find_resource_types, select_resource_type, \
+    find_types_of_resources
+from mcmd.molgenis.security import security, permission_matrix
 from mcmd.molgenis.security.permission import Permission
 from mcmd.molgenis.version import get_version
+from mcmd.utils.parallel import run_parallel, map_parallel
+
+# The resource types that are detected when the user doesn't specify the type
+_RESOURCE_TYPES = [ResourceType.ENTITY_TYPE, ResourceType.PACKAGE, ResourceType.PLUGIN]
 
 
 # =========
@@ -36,6 +47,11 @@ def add_arguments(subparsers):
                                        
                                        If you want to remove a permission, use the 'none' permission.
 
+                                       With --from-file you can give many permissions at once. The file contains
+                                       the permissions that roles and users should have (a YAML file, or a CSV/TSV
+                                       file with the columns principal, permission and resource). Only the
+                                       permissions that differ from the current ones are changed.
+
                                        Note: since MOLGENIS 8.3 role names are case sensitive and need to be typed 
                                        exactly as-is. (Before 8.3 all role names will be upper cased automatically). 
 
@@ -44,10 +60,16 @@ def add_arguments(subparsers):
                                          mcmd give --user john read --entity-type dataset
                                          
                                          mcmd give group_EDITOR write dataexplorer
+                                         mcmd give group_EDITOR write dataset1 dataset2 dataset3
+                                         mcmd give group_EDITOR write --package --contents biobank
                                          mcmd give --role group_EDITOR write --plugin dataexplorer
                                          
                                          mcmd give john edit dataset --entity biobank1
                                          mcmd give --user john edit --entity-type dataset --entity biobank1
+                                         mcmd give john read dataset --entity biobank1 biobank2 biobank3
+                                         mcmd give john read dataset --where "country==NL"
+
+                                         mcmd give --from-file permissions.yaml
                                        """
                                    ))
     p_give.set_defaults(func=give,
@@ -64,24 +86,40 @@ def add_arguments(subparsers):
                                  action='store_true',
                                  help='flag to specify that the resource is a plugin')
     p_give_receiver = p_give.add_mutually_exclusive_group()
-    p_give.add_argument('--entity', '-E',
-                        metavar='ENTITY_ID',
-                        help='use in conjunction with --entity-type to give permissions for a row')
     p_give_receiver.add_argument('--user', '-u',
                                  action='store_true',
                                  help='flag to specify that the receiver is a user')
     p_give_receiver.add_argument('--role', '-r',
                                  action='store_true',
                                  help='flag to specify that the receiver is a role')
-    p_give.add_argument('receiver',
-                        type=str,
-                        help='the role (or user) to give the permission to')
-    p_give.add_argument('permission',
-                        choices=['none', 'writemeta', 'readmeta', 'write', 'edit', 'read', 'view', 'count'],
-                        help='the permission type to give - synonyms are allowed (e.g. write/edit)')
-    p_give.add_argument('resource',
-                        type=str,
-                        help='the resource to which permission is given')
+    p_give_rows = p_give.add_mutually_exclusive_group()
+    p_give_rows.add_argument('--entity', '-E',
+                             metavar='ENTITY_ID',
+                             nargs='+',
+                             help='use in conjunction with --entity-type to give permissions for one or more rows')
+    p_give_rows.add_argument('--where', '-w',
+                             metavar='RSQL',
+                             help='give permissions for the rows of the entity type that match an RSQL query')
+    p_give.add_argument('--from-file', '-f',
+                        metavar='FILE',
+                        help='give the permissions listed in a YAML, CSV or TSV file')
+    p_give.add_argument('--contents', '-c',
+                        action='store_true',
+                        help='give the permission on a package and on everything in it: its sub-packages and entity '
+                             'types')
+    # the positionals can be left out when using --from-file
+    p_give.add_optional_positional('receiver',
+                                   type=str,
+                                   help='the role (or user) to give the permission to')
+    p_give.add_optional_positional('permission',
+                                   choices=['none', 'writemeta', 'readmeta', 'write', 'edit', 'read', 'view',
+                                            'count'],
+                                   help='the permission type to give - synonyms are allowed (e.g. write/edit)')
+    p_give.add_optional_positional('resource',
+                                   type=str,
+                                   nargs='+',
+                                   default=[],
+                                   help='the resource(s) to which permission is given')
 
 
 # =======
@@ -90,30 +128,62 @@ def add_arguments(subparsers):
 
 @command
 def give(args):
+    if args.from_file:
+        if args.receiver or args.permission or args.resource or args.entity or args.where or args.contents:
+            raise McmdError("A receiver, permission and resource can't be used in combination with --from-file")
+        _give_from_file(Path(args.from_file))
+        return
+    elif not args.receiver or not args.permission or not args.resource:
+        raise McmdError('The following arguments are required: receiver, permission, resource')
+
     _validate_args(args)
 
     permission = Permission[args.permission.upper()]
 
-    principal_type = get_principal_type_from_args(args, principal_name=args.receiver)
-
-    if args.entity:
-        _grant_rls(principal_type=principal_type,
-                   principal_name=args.receiver,
-                   entity_type_id=args.resource,
-                   entity_id=args.entity,
-                   permission=permission)
-    else:
-        resource_type = _get_resource_type(args)
+    if args.entity or args.where:
+        if len(args.resource) > 1 or args.contents:
+            raise McmdError('Row level permissions can only be given on one entity type at a time')
+        principal_type = get_principal_type_from_args(args, principal_name=args.receiver)
+        if args.entity and len(args.entity) == 1:
+            _grant_rls(principal_type=principal_type,
+                       principal_name=args.receiver,
+                       entity_type_id=args.resource[0],
+                       entity_id=args.entity[0],
+                       permission=permission)
+        else:
+            _grant_rls_bulk(principal_type=principal_type,
+                            principal_name=args.receiver,
+                            entity_type_id=args.resource[0],
+                            entity_ids=args.entity,
+                            where=args.where,
+                            permission=permission)
+    elif len(args.resource) == 1 and not args.contents:
+        # look up the principal and the resource at the same time
+        principal_types, resource_types = run_parallel(
+            lambda: find_principal_types_from_args(args, principal_name=args.receiver),
+            lambda: _find_resource_types(args, args.resource[0]))
+        principal_type = select_principal_type(args.receiver, principal_types)
+        resource_type = select_resource_type(args.resource[0], resource_types)
         _grant(principal_type=principal_type,
                principal_name=args.receiver,
                resource_type=resource_type,
-               entity_type_id=args.resource,
+               entity_type_id=args.resource[0],
                permission=permission)
+    else:
+        principal_types, resource_types = run_parallel(
+            lambda: find_principal_types_from_args(args, principal_name=args.receiver),
+            lambda: _find_resources(args))
+        principal_type = select_principal_type(args.receiver, principal_types)
+        resources = _select_resource_types(resource_types)
+        _grant_many(principal_type=principal_type,
+                    principal_name=args.receiver,
+                    resources=resources,
+                    permission=permission)
 
 
 @version('7.0.0')
 def _validate_args(args):
-    if args.entity:
+    if args.entity or args.where:
         raise McmdError(
             "Giving row level permissions is only possible since MOLGENIS 8.1.1 (you are using {})".format(
                 get_version()))
@@ -125,6 +195,20 @@ def _validate_args(args):
     pass
 
 
+def _give_from_file(file: Path):
+    io.start('Giving the permissions in {}'.format(highlight(file.name)))
+    grants = permission_matrix.read_grants(file)
+    changes = permission_matrix.get_changes(grants)
+    failed = changes.failed + permission_matrix.apply(changes.changes)
+
+    summary = '{} changed, {} unchanged'.format(len(changes.changes), changes.num_unchanged)
+    if failed:
+        raise McmdError('Failed to give {} of {} permissions'.format(len(failed), len(grants)),
+                        info='\n'.join(['  {}: {}'.format(label, message) for label, message in failed] +
+                                       ['  ({}, including the failed ones)'.format(summary)]))
+    io.update('({})'.format(summary))
+
+
 def _grant(principal_type: PrincipalType, principal_name: str, resource_type: ResourceType, entity_type_id: str,
            permission: Permission):
     io.start('Giving %s %s permission to %s on %s %s' % (principal_type.value,
@@ -136,6 +220,23 @@ def _grant(principal_type: PrincipalType, principal_name: str, resource_type: Re
     security.grant_permission(principal_type, principal_name, resource_type, entity_type_id, permission)
 
 
+def _grant_many(principal_type: PrincipalType, principal_name: str, resources: Dict[ResourceType, List[str]],
+                permission: Permission):
+    """Gives the permission on all resources of the same type in one request."""
+    io.start('Giving %s %s permission to %s on %s' % (principal_type.value,
+                                                      highlight(principal_name),
+                                                      highlight(permission.value),
+                                                      ' and '.join('%s %ss' % (highlight(str(len(ids))),
+                                                                               resource_type.get_label().lower())
+                                                                   for resource_type, ids in resources.items())))
+
+    def grant(resource_type):
+        permissions = {resource_id: permission for resource_id in resources[resource_type]}
+        security.grant_permissions(principal_type, principal_name, resource_type, permissions)
+
+    map_parallel(grant, resources.keys(), max_workers=config.get('http', 'max_concurrency'))
+
+
 def _grant_rls(principal_type: PrincipalType, principal_name: str, entity_type_id: str,
                entity_id: str, permission: Permission):
     io.start('Giving %s %s permission to %s on row %s of entity type %s' % (principal_type.value,
@@ -147,18 +248,80 @@ def _grant_rls(principal_type: PrincipalType, principal_name: str, entity_type_i
     security.grant_row_permission(principal_type, principal_name, entity_type_id, entity_id, permission)
 
 
-def _get_resource_type(args):
+def _grant_rls_bulk(principal_type: PrincipalType, principal_name: str, entity_type_id: str,
+                    entity_ids: Optional[List[str]], where: Optional[str], permission: Permission):
+    if where:
+        io.start('Finding the rows of entity type %s that match %s' % (highlight(entity_type_id), highlight(where)))
+        entity_ids = bulk.find_ids(entity_type_id, where)
+        io.succeed()
+
+    io.start('Giving %s %s permission to %s on %s rows of entity type %s' % (principal_type.value,
+                                                                            highlight(principal_name),
+                                                                            highlight(permission.value),
+                                                                            highlight(str(len(entity_ids))),
+                                                                            highlight(entity_type_id)))
+    changes = security.grant_row_permissions(principal_type, principal_name, entity_type_id, entity_ids, permission)
+
+    summary = '{} added, {} updated, {} removed, {} unchanged'.format(changes.added, changes.updated, changes.removed,
+                                                                       changes.unchanged)
+    if changes.failed:
+        raise McmdError('Failed to give permission on {} of {} rows'.format(len(changes.failed), len(entity_ids)),
+                        info='\n'.join(['  row {}: {}'.format(entity_id, message)
+                                         for entity_id, message in changes.failed] +
+                                        ['  ({}, including the failed ones)'.format(summary)]))
+    io.update('({})'.format(summary))
+
+
+def _find_resource_types(args, resource_id):
     # The permission manager doesn't check if the resources actually exist so we need to do that ourselves
 
-    resource_id = args.resource
     if args.entity_type:
         ensure_resource_exists(resource_id, ResourceType.ENTITY_TYPE)
-        return ResourceType.ENTITY_TYPE
+        return [ResourceType.ENTITY_TYPE]
     elif args.package:
         ensure_resource_exists(resource_id, ResourceType.PACKAGE)
-        return ResourceType.PACKAGE
+        return [ResourceType.PACKAGE]
     elif args.plugin:
         ensure_resource_exists(resource_id, ResourceType.PLUGIN)
-        return ResourceType.PLUGIN
+        return [ResourceType.PLUGIN]
     else:
-        return detect_resource_type(resource_id, [ResourceType.ENTITY_TYPE, ResourceType.PACKAGE, ResourceType.PLUGIN])
+        return find_resource_types(resource_id, _RESOURCE_TYPES)
+
+
+def _find_resources(args) -> List[Tuple[str, List[ResourceType]]]:
+    """Looks up the types of many resources at once. Doesn't ask the user to choose a type when a resource has more than
+    one (see _select_resource_types()), because this runs in a separate thread."""
+    if args.contents:
+        return _find_package_contents(args)
+
+    if args.entity_type:
+        types = [ResourceType.ENTITY_TYPE]
+    elif args.package:
+        types = [ResourceType.PACKAGE]
+    elif args.plugin:
+        types = [ResourceType.PLUGIN]
+    else:
+        types = _RESOURCE_TYPES
+
+    found = find_types_of_resources(args.resource, types)
+    return [(resource_id, found.get(resource_id, [])) for resource_id in dict.fromkeys(args.resource)]
+
+
+def _select_resource_types(resource_types: List[Tuple[str, List[ResourceType]]]) -> Dict[ResourceType, List[str]]:
+    """Returns the resources by type. Asks the user to choose when a resource has more than one type."""
+    resources = defaultdict(list)
+    for resource_id, types in resource_types:
+        resources[select_resource_type(resource_id, types)].append(resource_id)
+    return resources
+
+
+def _find_package_contents(args) -> List[Tuple[str, List[ResourceType]]]:
+    if len(args.resource) > 1 or args.entity_type or args.plugin:
+        raise McmdError('--contents can only be used with a single package')
+
+    package_id = args.resource[0]
+    ensure_resource_exists(package_id, ResourceType.PACKAGE)
+    packages, entity_types = package_tree.get_contents(package_id)
+
+    return [(resource_id, [ResourceType.PACKAGE]) for resource_id in [package_id] + packages] + \
+           [(resource_id, [ResourceType.ENTITY_TYPE]) for resource_id in entity_types]
@@ -1,9 +1,13 @@
+import fnmatch
+import glob
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 from os import path as os_path
 from pathlib import Path
+from typing import List, Callable, Dict, Set
 from urllib.parse import urljoin
 
-import polling
-import requests
+import attr
 
 import mcmd.config.config as config
 import mcmd.io.ask
@@ -14,8 +18,12 @@ from mcmd.core.errors import McmdError
 from mcmd.github import client as github
 from mcmd.io import io
 from mcmd.io.io import highlight
-from mcmd.molgenis import api
+from mcmd.io.logging import get_logger
+from mcmd.molgenis import api, metadata, import_ledger
 from mcmd.molgenis.client import post_file, get, post
+from mcmd.molgenis.resources import ResourceType
+from mcmd.utils import backoff
+from mcmd.utils.emx import read_dependencies, EmxDependencies
 from mcmd.utils.file_helpers import scan_folders_for_files, select_path
 
 # =========
@@ -30,17 +38,21 @@ _p_import = None
 def add_arguments(subparsers):
     global _p_import
     _p_import = subparsers.add_parser('import',
-                                      help='import a dataset')
+                                      help='import one or more datasets',
+                                      description='Import one or more datasets. When importing multiple datasets, they '
+                                                  'are imported in parallel. Datasets that reference entity types or '
+                                                  'packages of other datasets are imported after those datasets.')
     _p_import.set_defaults(func=import_,
                            write_to_history=True)
     _p_import.add_argument('resource',
-                           nargs='?',
-                           help='the resource to import - depending on the other options this can be a path, '
-                                'file name, or URL')
+                           nargs='*',
+                           help='the resource(s) to import - depending on the other options this can be a path, '
+                                'file name, or URL. Paths can be folders or glob patterns (like "data/*.xlsx") and '
+                                'file names can be glob patterns too')
     p_import_source = _p_import.add_mutually_exclusive_group()
     p_import_source.add_argument('--from-path', '-p',
                                  action='store_true',
-                                 help='import a file the old school way: by path')
+                                 help='import files the old school way: by path')
     p_import_source.add_argument('--from-issue', '-i',
                                  metavar='NUMBER',
                                  help="import a file attachment from a GitHub issue - optionally supply the file name "
@@ -64,6 +76,11 @@ def add_arguments(subparsers):
                            type=str,
                            choices=['add', 'add_update_existing', 'update'],
                            help='strategy to use when importing')
+    _p_import.add_argument('--skip-unchanged', '-s',
+                           action='store_true',
+                           help="don't import files that have been imported into this host before with the same "
+                                "contents, import action, package and entity type id (not used when importing from "
+                                "a URL)")
     return _p_import
 
 
@@ -75,6 +92,25 @@ _IMPORT_ACTIONS = {'.owl': 'add',
                    '.obo': 'add',
                    '.vcf': 'add'}
 
+log = get_logger()
+
+
+@attr.s(frozen=True, auto_attribs=True)
+class _ImportJob:
+    name: str
+    run: Callable[[], '_ImportResult']
+    dependencies: EmxDependencies = EmxDependencies()
+
+
+@attr.s(frozen=True, auto_attribs=True)
+class _ImportResult:
+    status: str
+    message: str = ''
+    seconds: float = None
+
+    def succeeded(self):
+        return self.status in ('FINISHED', 'UNCHANGED')
+
 
 # =======
 # Methods
@@ -91,6 +127,8 @@ def _validate_args(args):
     used with or without specifying a file name."""
     if not args.resource and not args.from_issue:
         _p_import.error("the following argument is required: resource")
+    if args.from_issue and len(args.resource) > 1:
+        _p_import.error("only one attachment can be imported from an issue")
 
 
 def _choose_import_method(args):
@@ -105,49 +143,166 @@ def _choose_import_method(args):
 
 
 def _import_from_url(args):
-    file_url = args.resource
-    file_name = file_url.split("/")[-1]
+    if len(args.resource) > 1:
+        _import_all([_ImportJob(name=url,
+                                run=_url_importer(url, args.to_package, args.import_action))
+                     for url in args.resource])
+        return
+
+    file_url = args.resource[0]
     io.start('Importing from URL %s' % highlight(file_url))
+    result = _import_url(file_url, args.to_package, args.import_action)
+    if result.status == 'FAILED':
+        raise McmdError(result.message)
 
-    if args.import_action:
-        action = args.import_action
+
+def _import_from_quick_folders(args):
+    file_map = scan_folders_for_files(context().get_git_folders() + context().get_dataset_folders(),
+                                      config.get('resources', 'recursive'))
+    paths = list()
+    for resource in args.resource:
+        file_name = os_path.splitext(resource)[0]
+        if glob.has_magic(file_name):
+            matches = sorted(name for name in file_map.keys() if fnmatch.fnmatch(name, file_name))
+            if len(matches) == 0:
+                raise McmdError('No files found for %s' % file_name)
+            paths.extend(select_path(file_map, match) for match in matches)
+        else:
+            paths.append(select_path(file_map, file_name))
+    _import_files(_unique(paths), args)
+
+
+def _import_from_issue(args):
+    issue_num = args.from_issue
+    attachment = _select_attachment(issue_num, args.resource[0] if args.resource else None)
+    file_path = _download_attachment(attachment, issue_num)
+    _do_import(file_path, args.to_package, args.entity_type_id, args.import_action, args.skip_unchanged)
+
+
+def _import_from_path(args):
+    files = list()
+    for resource in args.resource:
+        if glob.has_magic(resource):
+            matches = sorted(Path(match) for match in glob.glob(resource) if Path(match).is_file())
+            if len(matches) == 0:
+                raise McmdError('No files match %s' % resource)
+            files.extend(matches)
+        elif Path(resource).is_dir():
+            matches = sorted(file for file in Path(resource).iterdir() if
+                             file.is_file() and not file.name.startswith('.'))
+            if len(matches) == 0:
+                raise McmdError('Folder %s is empty' % str(Path(resource).resolve()))
+            files.extend(matches)
+        elif Path(resource).is_file():
+            files.append(Path(resource))
+        else:
+            raise McmdError("File %s doesn't exist" % str(Path(resource).resolve()))
+    _import_files(_unique(files), args)
+
+
+def _import_files(files: List[Path], args):
+    if len(files) == 1:
+        _do_import(files[0], args.to_package, args.entity_type_id, args.import_action, args.skip_unchanged)
+    elif args.entity_type_id:
+        raise McmdError('--as can only be used when importing a single file')
     else:
-        action = _get_import_action(file_name)
+        _import_all([_ImportJob(name=file.name,
+                                run=_file_importer(file, args.to_package, args.import_action,
+                                                   args.skip_unchanged),
+                                dependencies=read_dependencies(file))
+                     for file in files])
 
-    params = {'action': action,
-              'metadataAction': 'upsert'}
 
-    if args.to_package:
-        params['packageId'] = args.to_package
+def _unique(paths):
+    resolved = set()
+    unique = list()
+    for path in paths:
+        if path.resolve() not in resolved:
+            resolved.add(path.resolve())
+            unique.append(path)
+    return unique
 
-    params['url'] = file_url
 
-    response = post(api.import_by_url(), params=params)
-    import_run_url = urljoin(config.get('host', 'selected'), response.text)
-    status, message = _poll_for_completion(import_run_url)
-    if status == 'FAILED':
-        raise McmdError(message)
+def _file_importer(file_path, package, import_action, skip_unchanged):
+    return lambda: _import_file(file_path, package, None, import_action, skip_unchanged, show_progress=False)
 
 
-def _import_from_quick_folders(args):
-    file_name = os_path.splitext(args.resource)[0]
-    file_map = scan_folders_for_files(context().get_git_folders() + context().get_dataset_folders())
-    path = select_path(file_map, file_name)
-    _do_import(path, args.to_package, args.entity_type_id, args.import_action)
+def _url_importer(url, package, import_action):
+    return lambda: _import_url(url, package, import_action, show_progress=False)
 
 
-def _import_from_issue(args):
-    issue_num = args.from_issue
-    attachment = _select_attachment(issue_num, args.resource)
-    file_path = _download_attachment(attachment, issue_num)
-    _do_import(file_path, args.to_package, args.entity_type_id, args.import_action)
+def _import_all(jobs: List[_ImportJob]):
+    """Imports in parallel and shows a summary afterwards. Jobs that depend on a failed job are skipped."""
+    io.start('Importing {} datasets'.format(len(jobs)))
+    results = _run_jobs(jobs)
 
+    summary = _summarize(jobs, results)
+    num_failed = len([result for result in results.values() if not result.succeeded()])
+    if num_failed > 0:
+        raise McmdError('{} of {} imports did not succeed'.format(num_failed, len(jobs)), info=summary)
+    else:
+        io.succeed()
+        log.info(summary)
+
+
+def _run_jobs(jobs: List[_ImportJob]) -> Dict[int, _ImportResult]:
+    dependencies = _get_job_dependencies(jobs)
+    results = dict()
+    pending = list(range(len(jobs)))
+    running = dict()
+
+    with ThreadPoolExecutor(max_workers=config.get('http', 'max_concurrency')) as executor:
+        while pending or running:
+            ready = [index for index in pending if dependencies[index].issubset(results.keys())]
+            for index in ready:
+                pending.remove(index)
+                failed = [jobs[dependency].name for dependency in sorted(dependencies[index]) if
+                          not results[dependency].succeeded()]
+                if failed:
+                    results[index] = _ImportResult('SKIPPED', 'Depends on {}'.format(', '.join(failed)))
+                else:
+                    running[executor.submit(_run_job, jobs[index])] = index
+
+            if not ready and not running:
+                # the remaining jobs depend on each other: start one of them anyway
+                dependencies[pending[0]] = set()
+                continue
+
+            if running:
+                done, _ = wait(running.keys(), return_when=FIRST_COMPLETED)
+                for future in done:
+                    results[running.pop(future)] = future.result()
+            io.progress(len(results), len(jobs))
+
+    return results
+
+
+def _run_job(job: _ImportJob) -> _ImportResult:
+    start = time.monotonic()
+    try:
+        result = job.run()
+    except McmdError as e:
+        result = _ImportResult('FAILED', e.message)
+    return attr.evolve(result, seconds=time.monotonic() - start)
 
-def _import_from_path(args):
-    file = Path(args.resource)
-    if not file.is_file():
-        raise McmdError("File %s doesn't exist" % str(file.resolve()))
-    _do_import(file, args.to_package, args.entity_type_id, args.import_action)
+
+def _get_job_dependencies(jobs: List[_ImportJob]) -> Dict[int, Set[int]]:
+    return {index: {other_index for other_index, other in enumerate(jobs) if
+                    other_index != index and job.dependencies.depends_on(other.dependencies)}
+            for index, job in enumerate(jobs)}
+
+
+def _summarize(jobs: List[_ImportJob], results: Dict[int, _ImportResult]) -> str:
+    name_width = max(len(job.name) for job in jobs)
+    lines = list()
+    for index, job in enumerate(jobs):
+        result = results[index]
+        seconds = '{:.1f}s'.format(result.seconds) if result.seconds is not None else ''
+        lines.append('  {}  {:<9}  {:>7}  {}'.format(job.name.ljust(name_width),
+                                                       result.status,
+                                                       seconds,
+                                                       result.message or '').rstrip())
+    return '\n'.join(lines)
 
 
 def _select_attachment(issue_num, wanted_attachment):
@@ -202,31 +357,38 @@ def _download_attachment(attachment, issue_num):
     issue_folder.mkdir(parents=True, exist_ok=True)
     file_path = issue_folder.joinpath(attachment.name)
 
-    if file_path.exists():
-        overwrite = mcmd.io.ask.confirm('File %s already exists. Re-download?' % file_path.name)
-        if not overwrite:
-            return file_path
+    if github.is_downloaded(attachment, file_path):
+        return file_path
 
     io.start('Downloading %s from GitHub issue %s' % (highlight(attachment.name), highlight('#' + issue_num)))
-    try:
-        r = requests.get(attachment.url)
-        r.raise_for_status()
-        with file_path.open('wb') as f:
-            f.write(r.content)
-    except (OSError, requests.RequestException, requests.HTTPError) as e:
-        raise McmdError('Error downloading GitHub attachment: %s' % str(e))
+    github.download_attachment(attachment, file_path)
     io.succeed()
     return file_path
 
 
-def _do_import(file_path, package, entity_type_id, import_action):
+def _do_import(file_path, package, entity_type_id, import_action, skip_unchanged=False):
     io.start('Importing %s' % (highlight(file_path.name)))
+    result = _import_file(file_path, package, entity_type_id, import_action, skip_unchanged)
+    if result.status == 'FAILED':
+        raise McmdError(result.message)
+    elif result.status == 'UNCHANGED':
+        io.update('(skipped: {})'.format(result.message))
 
+
+def _import_file(file_path, package, entity_type_id, import_action, skip_unchanged=False,
+                 show_progress=True) -> _ImportResult:
     if import_action:
         action = import_action
     else:
         action = _get_import_action(file_path.name)
 
+    # the file is only hashed when it's needed: before the import with --skip-unchanged, or to record a finished import
+    file_hash = None
+    if skip_unchanged:
+        file_hash = import_ledger.hash_file(file_path)
+        if import_ledger.is_imported(file_hash, action, package, entity_type_id):
+            return _ImportResult('UNCHANGED', 'imported before')
+
     params = {'action': action,
               'metadataAction': 'upsert'}
 
@@ -235,11 +397,41 @@ def _do_import(file_path, package, entity_type_id, import_action):
     if entity_type_id:
         params['entityTypeId'] = entity_type_id
 
-    response = post_file(api.import_(), file_path.resolve(), params)
+    response = post_file(api.import_(), file_path.resolve(), params, show_progress=show_progress)
     import_run_url = urljoin(config.get('host', 'selected'), response.text)
-    status, message = _poll_for_completion(import_run_url)
-    if status == 'FAILED':
-        raise McmdError(message)
+    status, message = _poll_for_completion(import_run_url, show_progress)
+    _invalidate_metadata()
+    if status == 'FINISHED':
+        file_hash = file_hash or import_ledger.hash_file(file_path)
+        import_ledger.record(file_hash, file_path.name, action, package, entity_type_id)
+    return _ImportResult(status, message)
+
+
+def _import_url(file_url, package, import_action, show_progress=True) -> _ImportResult:
+    file_name = file_url.split("/")[-1]
+    if import_action:
+        action = import_action
+    else:
+        action = _get_import_action(file_name)
+
+    params = {'action': action,
+              'metadataAction': 'upsert'}
+
+    if package:
+        params['packageId'] = package
+
+    params['url'] = file_url
+
+    response = post(api.import_by_url(), params=params)
+    import_run_url = urljoin(config.get('host', 'selected'), response.text)
+    status, message = _poll_for_completion(import_run_url, show_progress)
+    _invalidate_metadata()
+    return _ImportResult(status, message)
+
+
+def _invalidate_metadata():
+    """An import can add and change entity types and packages (even when it fails halfway)."""
+    metadata.invalidate(ResourceType.ENTITY_TYPE.get_entity_id(), ResourceType.PACKAGE.get_entity_id())
 
 
 def _get_import_action(file_name):
@@ -251,15 +443,17 @@ def _get_import_action(file_name):
     return config.get('settings', 'import_action')
 
 
-def _poll_for_completion(url):
-    def step_function(step):
-        """Increases time between polls with one second each time, with a maximum of 10 seconds."""
-        step += 1
-        return min(step, 10)
+def _poll_for_completion(url, show_progress=True):
+    """Polls the ImportRun until it's done. Returns the status and message of the last poll."""
+    import_run = backoff.poll(lambda: get(url).json(),
+                              is_done=lambda run: run['status'] != 'RUNNING',
+                              initial_interval=config.get('polling', 'initial_interval'),
+                              max_interval=config.get('polling', 'max_interval'),
+                              timeout=config.get('polling', 'timeout'),
+                              on_poll=_show_import_progress if show_progress else None)
+    return import_run['status'], import_run.get('message')
+
 
-    polling.poll(lambda: get(url).json()['status'] != 'RUNNING',
-                 step=0,
-                 step_function=step_function,
-                 poll_forever=True)
-    import_run = get(url).json()
-    return import_run['status'], import_run['message']
+def _show_import_progress(import_run):
+    if import_run.get('progress'):
+        io.update('({} rows imported)'.format(import_run['progress']))
@@ -7,26 +7,35 @@ Differentiates between 'normal' roles and 'group' roles:
 
 This command won't do anything if a user is already member of the specified role. In the case a user is already member
 of another role within the same group, this command will ask for confirmation before updating it.
+
+With --from-file, the memberships of many users are read from a file. All users, roles and current memberships are
+looked up with a few queries, after which only the missing memberships are added and only the changed group roles are
+updated (without asking for confirmation: the file describes the memberships as they should be).
 """
 
 import json
 import textwrap
 from argparse import RawDescriptionHelpFormatter
-from typing import Optional, List
+from pathlib import Path
+from typing import Optional, List, Dict, Tuple
 from urllib.parse import urljoin
 
+import attr
+
 from mcmd.commands._registry import arguments
 from mcmd.core.command import command
 from mcmd.core.compatibility import version
 from mcmd.core.errors import McmdError
 from mcmd.io import io, ask
 from mcmd.io.io import highlight
-from mcmd.molgenis import api
+from mcmd.molgenis import api, metadata, bulk
 from mcmd.molgenis.client import post, get, put
+from mcmd.molgenis.paging import query, query_in
 from mcmd.molgenis.principals import to_role_name, get_principal_type_from_args, PrincipalType
 from mcmd.molgenis.rest_api_v2_mapper import map_to_role, map_to_user, map_to_role_membership
 from mcmd.molgenis.system import User, Group, Role, RoleMembership
 from mcmd.molgenis.version import get_version
+from mcmd.utils.file_helpers import read_rows
 from mcmd.utils.time import timestamp
 
 
@@ -58,16 +67,22 @@ def add_arguments(subparsers):
                                          mcmd make jane GCC_EDITOR                                        
                                          mcmd make --user jane GCC_EDITOR
                                          mcmd make --role ANONYMOUS GCC_VIEWER
+                                         mcmd make --from-file memberships.csv
+                                       
+                                       The file for --from-file is a CSV or TSV file with a 'user' and a 'role'
+                                       column. Memberships that already exist are left alone.
                                        """
                                    ))
     p_make.set_defaults(func=make,
                         write_to_history=True)
     p_make.add_argument('subject',
                         type=str,
+                        nargs='?',
                         help='the user or role')
     p_make.add_argument('target_role',
                         metavar='role',
                         type=str,
+                        nargs='?',
                         help='the role to make the subject a member of')
     p_make_subject = p_make.add_mutually_exclusive_group()
     p_make_subject.add_argument('--user', '-u',
@@ -76,6 +91,22 @@ def add_arguments(subparsers):
     p_make_subject.add_argument('--role', '-r',
                                 action='store_true',
                                 help='flag to specify that the subject is a role')
+    p_make_subject.add_argument('--from-file', '-f',
+                                metavar='FILE',
+                                help='make the users of a CSV or TSV file members of the roles in that file')
+
+
+# =========
+# Globals
+# =========
+
+@attr.s(frozen=True, auto_attribs=True)
+class _MembershipChanges:
+    # the memberships to add and the memberships of which the role changes, labeled with the line of the file
+    additions: List[Tuple[str, dict]]
+    updates: List[Tuple[str, dict]]
+    num_unchanged: int
+    failed: List[Tuple[str, str]]
 
 
 # =======
@@ -84,6 +115,14 @@ def add_arguments(subparsers):
 
 @command
 def make(args):
+    if args.from_file:
+        if args.subject or args.target_role:
+            raise McmdError("A subject and role can't be used in combination with --from-file")
+        _make_from_file(Path(args.from_file))
+        return
+    elif not args.subject or not args.target_role:
+        raise McmdError('The following arguments are required: subject, role')
+
     role_name = to_role_name(args.target_role)
     role = _get_role(role_name)
     subject_type = _get_subject_type(args)
@@ -100,6 +139,106 @@ def make(args):
         raise ValueError("Unknown principal type")
 
 
+def _make_from_file(file: Path):
+    io.start('Making users members of the roles in {}'.format(highlight(file.name)))
+    rows = [('line {}'.format(line), (row['user'] or '').strip(), (row['role'] or '').strip()) for line, row in
+            read_rows(file, required_columns=['user', 'role'])]
+
+    users = _find_users({username for _, username, _ in rows if username})
+    roles = _find_roles({to_role_name(role_name) for _, _, role_name in rows if role_name})
+    memberships = _find_memberships([user.id for user in users.values()])
+    changes = _get_membership_changes(rows, users, roles, memberships)
+
+    failed = changes.failed + \
+        bulk.create_rows('sys_sec_RoleMembership', changes.additions) + \
+        bulk.update_attribute('sys_sec_RoleMembership', 'role', changes.updates)
+
+    summary = '{} added, {} updated, {} unchanged'.format(len(changes.additions), len(changes.updates),
+                                                          changes.num_unchanged)
+    if failed:
+        raise McmdError('Failed to apply {} of {} memberships'.format(len(failed), len(rows)),
+                        info='\n'.join(['  {}: {}'.format(label, message) for label, message in failed] +
+                                       ['  ({}, including the failed ones)'.format(summary)]))
+    io.update('({})'.format(summary))
+
+
+def _get_membership_changes(rows: List[Tuple[str, str, str]],
+                            users: Dict[str, User],
+                            roles: Dict[str, Role],
+                            memberships: List[RoleMembership]) -> _MembershipChanges:
+    """Compares the (user, role) rows with the current memberships. A user can only have one role per group."""
+    current = {_membership_key(membership.user, membership.role): membership for membership in memberships}
+    wanted = dict()
+    additions = list()
+    updates = list()
+    failed = list()
+    num_unchanged = 0
+    now = timestamp()
+
+    for label, username, role_name in rows:
+        role_name = to_role_name(role_name)
+        if username not in users:
+            failed.append((label, 'Unknown user {}'.format(username)))
+            continue
+        if role_name not in roles:
+            failed.append((label, 'No role found with name {}'.format(role_name)))
+            continue
+
+        user = users[username]
+        role = roles[role_name]
+        key = _membership_key(user, role)
+        if key in wanted:
+            if wanted[key] == role.name:
+                num_unchanged += 1
+            else:
+                failed.append((label, 'User {} is also made {} of group {}'.format(username, wanted[key],
+                                                                                   role.group.name)))
+            continue
+        wanted[key] = role.name
+
+        membership = current.get(key)
+        if membership is None:
+            additions.append((label, {'user': user.id,
+                                      'role': role.id,
+                                      'from': now}))
+        elif membership.role.id != role.id:
+            updates.append((label, {'id': membership.id,
+                                    'role': role.id}))
+        else:
+            num_unchanged += 1
+
+    return _MembershipChanges(additions=additions, updates=updates, num_unchanged=num_unchanged, failed=failed)
+
+
+def _membership_key(user: User, role: Role):
+    """A user can be a member of many normal roles, but of only one role per group."""
+    return user.id, role.group.id if role.group else role.id
+
+
+def _find_users(usernames) -> Dict[str, User]:
+    if metadata.is_cached('sys_sec_User'):
+        users = [metadata.get_row('sys_sec_User', username) for username in usernames]
+    else:
+        users = query_in('sys_sec_User', 'username', sorted(usernames), attrs='id,username')
+    return {user['username']: map_to_user(user) for user in users if user}
+
+
+def _find_roles(role_names) -> Dict[str, Role]:
+    if metadata.is_cached('sys_sec_Role'):
+        roles = [metadata.get_row('sys_sec_Role', role_name) for role_name in role_names]
+    else:
+        roles = query_in('sys_sec_Role', 'name', sorted(role_names), attrs='id,name,label,group(id,name)')
+    return {role['name']: map_to_role(role) for role in roles if role}
+
+
+def _find_memberships(user_ids) -> List[RoleMembership]:
+    """Finds the current memberships of the users."""
+    memberships = query_in('sys_sec_RoleMembership', 'user', user_ids,
+                           q="to=='',to=ge={}".format(timestamp()),
+                           attrs='id,user(id,username),role(id,name,label,group(id,name))')
+    return [map_to_role_membership(membership) for membership in memberships]
+
+
 # noinspection PyUnusedLocal
 @version('7.0.0')
 def _get_subject_type(args) -> PrincipalType:
@@ -202,11 +341,11 @@ def _get_group_membership(user: User, group: Group) -> Optional[RoleMembership]:
 
 
 def _get_group_roles(group: Group) -> List[Role]:
-    roles = get(api.rest2('sys_sec_Role'),
-                params={
-                    'attrs': 'id,name,label,group(id,name)',
-                    'q': 'group=={}'.format(group.id)
-                }).json()['items']
+    if metadata.is_cached('sys_sec_Role'):
+        roles = [role for role in metadata.get_rows('sys_sec_Role') if
+                 role.get('group') and role['group']['id'] == group.id]
+    else:
+        roles = list(query('sys_sec_Role', q='group=={}'.format(group.id), attrs='id,name,label,group(id,name)'))
 
     if len(roles) == 0:
         raise McmdError('No roles found for group {}'.format(group.name))
@@ -225,11 +364,15 @@ def _is_member(user: User, role: Role) -> bool:
 
 
 def _get_user(user_name: str) -> User:
-    users = get(api.rest2('sys_sec_User'),
-                params={
-                    'attrs': 'id,username',
-                    'q': 'username=={}'.format(user_name)
-                }).json()['items']
+    if metadata.is_cached('sys_sec_User'):
+        user = metadata.get_row('sys_sec_User', user_name)
+        users = [user] if user else []
+    else:
+        users = get(api.rest2('sys_sec_User'),
+                    params={
+                        'attrs': 'id,username',
+                        'q': 'username=={}'.format(user_name)
+                    }).json()['items']
 
     if len(users) == 0:
         raise McmdError('Unknown user {}'.format(user_name))
@@ -238,11 +381,15 @@ def _get_user(user_name: str) -> User:
 
 
 def _get_role(role_name: str) -> Role:
-    roles = get(api.rest2('sys_sec_Role'),
-                params={
-                    'attrs': 'id,name,label,group(id,name)',
-                    'q': 'name=={}'.format(role_name)
-                }).json()['items']
+    if metadata.is_cached('sys_sec_Role'):
+        role = metadata.get_row('sys_sec_Role', role_name)
+        roles = [role] if role else []
+    else:
+        roles = get(api.rest2('sys_sec_Role'),
+                    params={
+                        'attrs': 'id,name,label,group(id,name)',
+                        'q': 'name=={}'.format(role_name)
+                    }).json()['items']
 
     if len(roles) == 0:
         raise McmdError('No role found with name {}'.format(role_name))
@@ -5,7 +5,7 @@ from mcmd.commands._registry import arguments
 from mcmd.core.command import command
 from mcmd.core.errors import McmdError
 from mcmd.io.io import highlight
-from mcmd.molgenis import version as molgenis_version
+from mcmd.molgenis import version as molgenis_version, metadata
 
 
 # =========
@@ -14,24 +14,35 @@ from mcmd.molgenis import version as molgenis_version
 
 @arguments('ping')
 def add_arguments(subparsers):
-    p_make = subparsers.add_parser('ping',
-                                   help='ping the selected host')
-    p_make.set_defaults(func=ping,
+    p_ping = subparsers.add_parser('ping',
+                                   help='ping the selected host',
+                                   description='Ping the selected host. The version of the host is always requested '
+                                               'and stored again.')
+    p_ping.set_defaults(func=ping,
                         write_to_history=False)
+    p_ping.add_argument('--refresh', '-r',
+                        action='store_true',
+                        help='also forget the other information that is remembered about the host (like when the '
+                             'login token was last validated and the metadata cache)')
 
 
 # =======
 # Methods
 # =======
 
-# noinspection PyUnusedLocal
 @command
 def ping(args):
     host = config.get('host', 'selected')
     user = config.username()
     status = Fore.LIGHTGREEN_EX + 'Online' + Fore.RESET
+
+    if args.refresh:
+        config.set_token_validated(None)
+        metadata.clear()
+
     try:
-        version = molgenis_version.get_version()
+        # ping the host for real instead of using the stored version
+        version = molgenis_version.refresh_version()
     except McmdError:
         status = Fore.LIGHTRED_EX + 'Offline' + Fore.RESET
         version = None
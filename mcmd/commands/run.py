@@ -1,13 +1,14 @@
 from pathlib import Path
 from typing import List
 
+import mcmd.config.config as config
 from mcmd.args.actions import ParseKeyValue
 from mcmd.commands._registry import arguments
 from mcmd.core.command import command, CommandType
 from mcmd.core.context import context
 from mcmd.core.errors import McmdError
 from mcmd.io import io
-from mcmd.script import script_runner
+from mcmd.script import script_runner, command_cache, script_cache
 from mcmd.script.model.script import Script
 from mcmd.script.options import ScriptOptions
 from mcmd.script.parser import script_parser
@@ -48,10 +49,21 @@ def add_arguments(subparsers):
     p_run.add_argument('--dry', '-d',
                        action='store_true',
                        help='runs the script without actually executing any of the commands')
+    p_run.add_argument('--parallel', '-P',
+                       metavar='N',
+                       type=int,
+                       default=1,
+                       help="run up to N commands (or rows of a $foreach block) at the same time. The commands "
+                            "before an $input or $wait statement, a $foreach block or a '// sync' comment are "
+                            "finished before the script continues. The output is shown per line, in the order of the "
+                            "script")
 
 
 @command
 def run(args):
+    if args.parallel < 1:
+        raise McmdError('The number of parallel commands should be at least 1')
+
     script_file = _get_script(args)
     lines = _read_script(script_file)
 
@@ -61,15 +73,24 @@ def run(args):
                             dry_run=args.dry,
                             start_at=args.from_line,
                             log_comments=not args.hide_comments,
-                            exit_on_error=not args.ignore_errors)
-    script_runner.run(script, options)
+                            exit_on_error=not args.ignore_errors,
+                            parallel=args.parallel)
+    cached_commands = command_cache.load(lines) if config.get('cache', 'scripts') else None
+    script_runner.run(script, options, cached_commands)
 
 
 def _try_parse_script(lines: List[str]) -> Script:
-    try:
-        return script_parser.parse(lines)
-    except InvalidScriptError as e:
-        _print_errors_and_exit(e.errors)
+    use_cache = config.get('cache', 'scripts')
+    script = script_cache.load(lines) if use_cache else None
+    if script is None:
+        try:
+            script = script_parser.parse(lines)
+        except InvalidScriptError as e:
+            _print_errors_and_exit(e.errors)
+
+        if use_cache:
+            script_cache.store(lines, script)
+    return script
 
 
 def _print_errors_and_exit(errors: List[ScriptValidationError]):
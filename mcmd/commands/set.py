@@ -8,8 +8,9 @@ from mcmd.core.command import command
 from mcmd.core.errors import McmdError
 from mcmd.io import io
 from mcmd.io.io import highlight
-from mcmd.molgenis import api
-from mcmd.molgenis.client import get, put
+from mcmd.molgenis import api, metadata
+from mcmd.molgenis.client import put
+from mcmd.molgenis.paging import query
 
 
 # =========
@@ -84,14 +85,17 @@ def set_(args):
 
     url = api.rest1('{}/{}/{}'.format(entity, row, args.attribute))
     put(url, json.dumps(args.value))
+    if metadata.is_cached(entity):
+        # the changed attribute could be the identifying attribute, so the row can't be updated
+        metadata.invalidate(entity)
 
 
 def _get_settings():
-    molgenis_settings = get(api.rest2('sys_md_EntityType'),
-                            params={
-                                'q': 'extends==sys_set_settings',
-                                'attrs': '~id'
-                            }).json()['items']
+    if metadata.is_cached('sys_md_EntityType'):
+        return [entity_type['id'] for entity_type in metadata.get_rows('sys_md_EntityType') if
+                (entity_type.get('extends') or {}).get('id') == 'sys_set_settings']
+
+    molgenis_settings = query('sys_md_EntityType', q='extends==sys_set_settings', attrs='~id')
     return [setting['id'] for setting in molgenis_settings]
 
 
@@ -110,8 +114,5 @@ def _get_settings_entity(setting):
 
 
 def _get_first_row_id(entity):
-    settings = get(api.rest2(entity),
-                   params={
-                       'attrs': '~id'
-                   }).json()['items']
-    return settings[0]['id']
+    settings = query(entity, attrs='~id', page_size=1)
+    return next(settings)['id']
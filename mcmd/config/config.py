@@ -125,13 +125,34 @@ def _get_selected_host_auth():
     raise errors.ConfigError("The selected host doesn't exist.")
 
 
-def set_token(token_):
+def token_validated_at() -> Optional[float]:
+    """Returns the time (in seconds since the epoch) at which the token of the selected host was last validated."""
+    return _get_selected_host_auth().get('token_validated', None)
+
+
+def set_token(token_, validated_at: Optional[float] = None):
+    host_auth = _get_selected_host_auth()
     if token_ is None:
-        _get_selected_host_auth().pop('token', None)
+        host_auth.pop('token', None)
+        host_auth.pop('token_validated', None)
     else:
-        _get_selected_host_auth()['token'] = token_
+        host_auth['token'] = token_
+        _set_token_validated(host_auth, validated_at)
+    _persist()
+
+
+def set_token_validated(validated_at: Optional[float]):
+    """Sets the time at which the token was last validated. Use None to have the token validated again."""
+    _set_token_validated(_get_selected_host_auth(), validated_at)
     _persist()
 
 
+def _set_token_validated(host_auth, validated_at: Optional[float]):
+    if validated_at is None:
+        host_auth.pop('token_validated', None)
+    else:
+        host_auth['token_validated'] = validated_at
+
+
 def _key_error_string(error):
     return str(error).strip("'")
@@ -0,0 +1,46 @@
+"""
+Reads and writes the JSON files in the cache folder of the current context. Cached information is never essential: a
+cache file that is missing or unreadable is treated as an empty cache.
+"""
+
+import json
+import os
+import tempfile
+
+from mcmd.core.context import context
+from mcmd.core.errors import McmdError
+
+
+def read(name: str) -> dict:
+    path = context().get_cache_folder().joinpath(name)
+    try:
+        with path.open('r') as cache_file:
+            return json.load(cache_file)
+    except (OSError, ValueError):
+        return dict()
+
+
+def write(name: str, content: dict):
+    """Writes a cache file. The content is written to a temporary file first, so that a cache file is never left
+    half-written."""
+    folder = context().get_cache_folder()
+    try:
+        fd, temp_path = tempfile.mkstemp(dir=str(folder), prefix='.{}.'.format(name))
+        with os.fdopen(fd, 'w') as temp_file:
+            json.dump(content, temp_file)
+        os.replace(temp_path, str(folder.joinpath(name)))
+    except OSError as e:
+        raise McmdError('Error writing to cache: {}'.format(str(e)))
+
+
+def remove(pattern: str):
+    """Removes the cache files of which the name matches a glob pattern."""
+    for path in context().get_cache_folder().glob(pattern):
+        path.unlink()
+
+
+def prune(pattern: str, keep: int):
+    """Removes the cache files of which the name matches a glob pattern, except the last written ones."""
+    paths = sorted(context().get_cache_folder().glob(pattern), key=lambda path: path.stat().st_mtime)
+    for path in paths[:-keep]:
+        path.unlink()
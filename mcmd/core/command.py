@@ -1,5 +1,6 @@
 import sys
 from enum import Enum
+from functools import wraps
 
 from mcmd.args.errors import ArgumentSyntaxError
 from mcmd.config import config
@@ -23,6 +24,7 @@ class CommandType(Enum):
 def command(func):
     """Decorator for commands. Handles auxiliary actions: authentication, history and errors."""
 
+    @wraps(func)
     def wrapper(args, nested=False):
         """
         :param args: the argparse arguments
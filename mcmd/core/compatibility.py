@@ -2,15 +2,22 @@
 This module houses the framework responsible for ensuring compatibility over multiple MOLGENIS versions.
 """
 
+from bisect import insort, bisect_right
 from collections import defaultdict
 from distutils.version import StrictVersion
 from functools import wraps
-from typing import List
+from typing import Callable
 
 from mcmd.molgenis import version as molgenis_version
 
 MIN_VERSION = '7.0.0'
+
+# Per function: the implementations by (normalized) version and the sorted versions that have an implementation
 _registry = defaultdict(dict)
+_sorted_versions = defaultdict(list)
+
+# Per function: the resolved implementations by MOLGENIS version
+_dispatch_cache = defaultdict(dict)
 
 
 def version(version_):
@@ -30,6 +37,10 @@ def version(version_):
 
     MOLGENIS versions lower than MIN_VERSION aren't supported but the chosen implementation will default to the
     closest match.
+
+    The implementation that belongs to a MOLGENIS version is resolved only once. The MOLGENIS version itself is
+    determined per host, so when the selected host changes, the implementation is resolved again for the version of
+    the new host.
     """
 
     def registrar(func):
@@ -38,43 +49,43 @@ def version(version_):
         runtime which implementation to return.
         """
 
-        @wraps(func)
-        def wrapper():
-            def getter(*args, **kwargs):
-                """Returns the needed implementation based on the MOLGENIS version."""
+        func_id = _get_func_id(func)
+        strict_version = StrictVersion(version_)
+        if str(strict_version) in _registry[func_id]:
+            raise ValueError('Function already registered: {}'.format(func_id))
 
-                id_ = _get_func_id(func)
-                available_versions = list(_registry[id_].keys())
-                v = _get_closest_version(available_versions)
-                wanted_func = _registry[_get_func_id(func)][v]
-                return wanted_func(*args, **kwargs)
+        _registry[func_id][str(strict_version)] = func
+        insort(_sorted_versions[func_id], strict_version)
 
-            return getter
+        # a new implementation can change the outcome of earlier resolutions
+        dispatch_cache = _dispatch_cache[func_id]
+        dispatch_cache.clear()
 
-        func_id = _get_func_id(func)
-        if version_ in _registry[func_id]:
-            raise ValueError('Function already registered: {}'.format(func_id))
+        @wraps(func)
+        def getter(*args, **kwargs):
+            """Calls the needed implementation based on the MOLGENIS version."""
 
-        _registry[func_id][version_] = func
+            mol_version = molgenis_version.get_version_number()
+            try:
+                wanted_func = dispatch_cache[mol_version]
+            except KeyError:
+                wanted_func = _resolve(func_id, mol_version)
+                dispatch_cache[mol_version] = wanted_func
+            return wanted_func(*args, **kwargs)
 
-        return wrapper()
+        return getter
 
     return registrar
 
 
-def _get_closest_version(versions: List[str]):
-    mol_version = molgenis_version.get_version_number()
-    if mol_version in versions:
-        return mol_version
-    else:
-        versions.append(mol_version)
-        versions = sorted(versions, key=StrictVersion)
-        index = versions.index(mol_version)
-        if index == 0:
-            # Molgenis version is lower than lowest implementation available. Default to lowest version possible:
-            return versions[1]
-        else:
-            return versions[index - 1]
+def _resolve(func_id: str, mol_version: str) -> Callable:
+    """Finds the implementation with the highest version that is lower than or equal to the MOLGENIS version."""
+    versions = _sorted_versions[func_id]
+    index = bisect_right(versions, StrictVersion(mol_version)) - 1
+    if index < 0:
+        # Molgenis version is lower than lowest implementation available. Default to lowest version possible:
+        index = 0
+    return _registry[func_id][str(versions[index])]
 
 
 def _get_func_id(func):
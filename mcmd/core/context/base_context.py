@@ -34,6 +34,10 @@ class Context(ABC):
     def get_history_file(self) -> Path:
         pass
 
+    @abstractmethod
+    def get_cache_folder(self) -> Path:
+        pass
+
     @abstractmethod
     def get_dataset_folders(self) -> List[Path]:
         pass
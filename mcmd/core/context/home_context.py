@@ -12,6 +12,7 @@ class HomeContext(Context):
     _SCRIPT_FOLDER = 'scripts'
     _BACKUP_FOLDER = 'backups'
     _ISSUE_FOLDER = 'issues'
+    _CACHE_FOLDER = 'cache'
     _PROPERTIES_FILE = 'mcmd.yaml'
     _HISTORY_FILE = 'history.log'
 
@@ -34,6 +35,10 @@ class HomeContext(Context):
     def get_history_file(self) -> Path:
         return self._get_mcmd_home().joinpath(self._HISTORY_FILE)
 
+    def get_cache_folder(self) -> Path:
+        cache_folder = self._get_mcmd_home().joinpath(self._CACHE_FOLDER)
+        return self._mkdir_if_not_exists(cache_folder)
+
     def get_dataset_folders(self) -> List[Path]:
         return [Path(folder) for folder in config.get('resources', 'dataset_folders')]
 
@@ -1,3 +1,4 @@
+import threading
 from collections import deque
 
 from mcmd.core.context import context
@@ -6,16 +7,18 @@ from mcmd.core.errors import McmdError
 _INDICATOR_SUCCESS = 'v'
 _INDICATOR_FAILURE = 'x'
 
+# Commands of a script can run in parallel
+_lock = threading.Lock()
+
 
 def write(arg_string, success):
     try:
-        history = open(str(context().get_history_file()), 'a')
-
         indicator = _INDICATOR_SUCCESS
         if not success:
             indicator = _INDICATOR_FAILURE
 
-        history.write('%s %s\n' % (indicator, arg_string))
+        with _lock, open(str(context().get_history_file()), 'a') as history:
+            history.write('%s %s\n' % (indicator, arg_string))
     except OSError as e:
         raise McmdError("Error writing to history: %s" % str(e))
 
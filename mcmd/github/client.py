@@ -1,12 +1,36 @@
+"""
+Finds and downloads the attachments of MOLGENIS issues on GitHub.
+
+Issues are fetched from the GitHub REST API with the shared HTTP session. Their bodies are cached with the ETag that
+GitHub returned: within the 'issue_ttl' setting the cached body is used without asking GitHub, after that GitHub is
+asked whether the issue has changed (which doesn't count towards GitHub's rate limit when it hasn't).
+
+Attachments are streamed to disk. A download is written to a '.part' file first, so that an interrupted download can be
+resumed with a Range request. Every downloaded file has a small sidecar file with the URL, ETag and size of the
+download: since GitHub never changes the contents of an attachment URL, a complete download is never downloaded again.
+"""
+
+import json
+import os
 import re
+import time
+from pathlib import Path
+from typing import Optional
 
-from github import Github, UnknownObjectException
+import requests
 
+from mcmd.config import config
+from mcmd.core import cache
 from mcmd.core.errors import McmdError
+from mcmd.io import io
+from mcmd.utils.http_session import get_session
 
 _MOLGENIS_FILES_URL = 'https://github.com/molgenis/molgenis/files/'
+_ISSUE_URL = 'https://api.github.com/repos/molgenis/molgenis/issues/{}'
 
-_github = None
+_ISSUES_CACHE_FILE = 'github_issues.json'
+
+_CHUNK_SIZE = 64 * 1024
 
 
 class Attachment:
@@ -31,26 +55,118 @@ class Attachment:
 
 def get_attachments(issue_num):
     validate_issue_number(issue_num)
-    try:
-        issue = _molgenis_repo().get_issue(int(issue_num))
-    except UnknownObjectException:
-        raise McmdError("Issue #%s doesn't exist" % issue_num)
 
     # GitHub has no API for downloading attachments so we get them from the issue description
-    urls = _parse_attachment_urls(issue.body)
+    urls = _parse_attachment_urls(_get_issue_body(issue_num))
     return [Attachment(url.strip('()')) for url in urls]
 
 
-def _parse_attachment_urls(issue_body):
-    return re.findall(r'\((%s.*?)\)' % re.escape(_MOLGENIS_FILES_URL), issue_body)
+def is_downloaded(attachment: Attachment, file_path: Path) -> bool:
+    """Returns whether the attachment has been downloaded completely to the file path."""
+    download = _read_download_info(file_path)
+    return file_path.is_file() and download is not None and download['url'] == attachment.url and \
+        download['size'] == file_path.stat().st_size
+
+
+def download_attachment(attachment: Attachment, file_path: Path):
+    """Downloads an attachment to the specified file path and shows the progress behind the message of the spinner.
+    Continues where a previous, interrupted download stopped."""
+    part_path = file_path.with_name(file_path.name + '.part')
+    try:
+        with _request_download(attachment.url, part_path) as response:
+            offset = part_path.stat().st_size if response.status_code == 206 else 0
+            size = offset + int(response.headers['Content-Length']) if 'Content-Length' in response.headers else None
+            _write_download_info(part_path, {'url': attachment.url,
+                                             'etag': response.headers.get('ETag'),
+                                             'size': size})
+
+            progress = io.TransferProgress(size) if size else None
+            with part_path.open('ab' if offset else 'wb') as part:
+                downloaded = offset
+                for chunk in response.iter_content(_CHUNK_SIZE):
+                    part.write(chunk)
+                    downloaded += len(chunk)
+                    if progress:
+                        progress(downloaded)
+
+        if size is not None and part_path.stat().st_size != size:
+            raise McmdError('Download of GitHub attachment %s is incomplete' % attachment.name)
+
+        os.replace(str(part_path), str(file_path))
+        _write_download_info(file_path, {'url': attachment.url,
+                                         'etag': response.headers.get('ETag'),
+                                         'size': file_path.stat().st_size})
+        _info_path(part_path).unlink()
+    except (OSError, requests.RequestException) as e:
+        raise McmdError('Error downloading GitHub attachment: %s' % str(e))
+
+
+def _request_download(url, part_path) -> requests.Response:
+    """Requests the remainder of a partial download if it's still the same file, or the whole file otherwise."""
+    # ask for the file as it is, so that the Content-Length is the size of the file
+    headers = {'Accept-Encoding': 'identity'}
+    download = _read_download_info(part_path)
+    if part_path.is_file() and download and download['url'] == url and download['etag']:
+        headers['Range'] = 'bytes=%d-' % part_path.stat().st_size
+        headers['If-Range'] = download['etag']
+
+    response = get_session().get(url, headers=headers, stream=True)
+    if response.status_code == 416:
+        # the partial download is complete or corrupt: start over
+        response.close()
+        response = get_session().get(url, headers={'Accept-Encoding': 'identity'}, stream=True)
+    response.raise_for_status()
+    return response
+
+
+def _read_download_info(file_path: Path) -> Optional[dict]:
+    try:
+        with _info_path(file_path).open('r') as info_file:
+            return json.load(info_file)
+    except (OSError, ValueError):
+        return None
 
 
-def _molgenis_repo():
-    global _github
-    if not _github:
-        _github = Github()
+def _write_download_info(file_path: Path, download: dict):
+    with _info_path(file_path).open('w') as info_file:
+        json.dump(download, info_file)
 
-    return _github.get_organization('molgenis').get_repo('molgenis')
+
+def _info_path(file_path: Path) -> Path:
+    return file_path.with_name('.%s.download' % file_path.name)
+
+
+def _get_issue_body(issue_num) -> str:
+    issues = cache.read(_ISSUES_CACHE_FILE)
+    cached = issues.get(str(issue_num))
+    if cached and time.time() - cached['timestamp'] < config.get('cache', 'issue_ttl'):
+        return cached['body']
+
+    headers = {'Accept': 'application/vnd.github.v3+json'}
+    if cached and cached['etag']:
+        headers['If-None-Match'] = cached['etag']
+
+    try:
+        response = get_session().get(_ISSUE_URL.format(int(issue_num)), headers=headers)
+        if response.status_code == 404:
+            raise McmdError("Issue #%s doesn't exist" % issue_num)
+        response.raise_for_status()
+    except requests.RequestException as e:
+        raise McmdError('Error fetching GitHub issue: %s' % str(e))
+
+    if response.status_code == 304:
+        cached['timestamp'] = time.time()
+    else:
+        cached = {'etag': response.headers.get('ETag'),
+                  'body': response.json()['body'] or '',
+                  'timestamp': time.time()}
+    issues[str(issue_num)] = cached
+    cache.write(_ISSUES_CACHE_FILE, issues)
+    return cached['body']
+
+
+def _parse_attachment_urls(issue_body):
+    return re.findall(r'\((%s.*?)\)' % re.escape(_MOLGENIS_FILES_URL), issue_body)
 
 
 def validate_issue_number(issue_num):
@@ -1,5 +1,6 @@
 import questionary
 
+from mcmd.core.errors import McmdError
 from mcmd.io import io
 
 
@@ -41,6 +42,11 @@ def confirm(message):
 
 
 def _ask(question, validation=None):
+    if io.is_capturing():
+        # the output of the thread isn't shown, so the user wouldn't see the question
+        raise McmdError("Can't ask for input while running in parallel",
+                        info='Run the script without --parallel, or pass the answer as an argument (e.g. --force)')
+
     answer = question.ask()
 
     if answer is None:
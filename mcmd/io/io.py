@@ -1,3 +1,8 @@
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, List, Iterator
+
 from colorama import Fore, Style
 from halo import Halo
 
@@ -9,28 +14,128 @@ log = get_logger()
 
 _debug_mode = False
 spinner = None
+_message = None
+
+# The output of threads that capture their output (see capture())
+_local = threading.local()
+
+
+@contextmanager
+def capture() -> Iterator[List[Callable]]:
+    """
+    Collects the output of the current thread instead of showing it, so that tasks that run at the same time (like
+    the commands of a script that runs in parallel) don't mix up their output. Yields a list that is filled with the
+    output. Show the output afterwards with replay().
+    """
+    _local.output = list()
+    _local.text = None
+    try:
+        yield _local.output
+    finally:
+        del _local.output
+
+
+def replay(output: List[Callable]):
+    """Shows the output that was collected with capture()."""
+    for show in output:
+        show()
+
+
+def is_capturing() -> bool:
+    """Returns whether the output of the current thread is captured (see capture())."""
+    return hasattr(_local, 'output')
 
 
 def start(message):
-    global spinner
+    global spinner, _message
+    if is_capturing():
+        _local.message = message
+        _local.text = message
+        return
+
     spinner = _new_spinner()
     spinner.start(message)
+    _message = message
+
+
+def update(status: str):
+    """Shows a status (like the progress of the current task) behind the message of the spinner."""
+    if is_capturing():
+        if _local.text:
+            _local.text = '{} {}'.format(_local.message, status)
+    elif spinner:
+        spinner.text = '{} {}'.format(_message, status)
+
+
+def progress(done: int, total: int):
+    """Shows the progress of the current task behind the message of the spinner."""
+    update('({}/{})'.format(done, total))
+
+
+class TransferProgress:
+    """Shows the number of bytes transferred and the throughput behind the message of the spinner. Call it with the
+    number of bytes transferred so far."""
+
+    # the minimum number of seconds between updates of the spinner
+    _INTERVAL = 0.2
+
+    def __init__(self, total_bytes: int):
+        self.total_bytes = total_bytes
+        self.started_at = time.monotonic()
+        self.updated_at = 0
+
+    def __call__(self, transferred_bytes: int):
+        now = time.monotonic()
+        if now - self.updated_at < self._INTERVAL and transferred_bytes < self.total_bytes:
+            return
+
+        self.updated_at = now
+        throughput = transferred_bytes / max(now - self.started_at, 0.001)
+        update('({} of {}, {}/s)'.format(format_size(transferred_bytes),
+                                         format_size(self.total_bytes),
+                                         format_size(throughput)))
+
+
+def format_size(num_bytes: float) -> str:
+    for unit in ['B', 'KB', 'MB', 'GB']:
+        if num_bytes < 1024:
+            return '{:.1f} {}'.format(num_bytes, unit) if unit != 'B' else '{} B'.format(int(num_bytes))
+        num_bytes /= 1024
+    return '{:.1f} TB'.format(num_bytes)
 
 
 def succeed():
     global spinner
-    if spinner:
-        if config.has_option('settings', 'unicorn_mode') and config.get('settings', 'unicorn_mode'):
-            spinner.stop_and_persist(symbol='🦄'.encode('utf-8'))
-        else:
-            spinner.succeed()
-
+    if is_capturing():
+        _capture_spinner(_succeed)
+    elif spinner:
+        _succeed(spinner)
         spinner = None
 
 
+def _succeed(spinner_):
+    if config.has_option('settings', 'unicorn_mode') and config.get('settings', 'unicorn_mode'):
+        spinner_.stop_and_persist(symbol='🦄'.encode('utf-8'))
+    else:
+        spinner_.succeed()
+
+
+def _capture_spinner(stop: Callable, restart=False):
+    """Captures the final frame of the current spinner of a thread that captures its output."""
+    text = _local.text
+    if text:
+        _local.output.append(lambda: stop(Halo(text=text, spinner='dots')))
+    if not restart:
+        _local.text = None
+
+
 def info(message):
     """Replaces an existing spinner with an info message and restarts the previous spinner afterwards. Just shows the
     info message if there was no spinner running."""
+    if is_capturing():
+        _local.output.append(lambda: _new_spinner().info(message))
+        return
+
     prev_text = None
     if spinner:
         prev_text = spinner.text
@@ -46,6 +151,11 @@ def info(message):
 
 def warn(message):
     """Turns the current spinner in a warning message (with icon) and starts a new spinner"""
+    if is_capturing():
+        _capture_spinner(lambda spinner_: spinner_.warn(), restart=True)
+        _local.output.append(lambda: log.warn('  ' + message))
+        return
+
     if spinner:
         spinner.warn()
     log.warn('  ' + message)
@@ -56,18 +166,26 @@ def warn(message):
 
 def pause():
     """Pause the spinner (with a warning icon), restart it with unpause()"""
-    if spinner:
+    if is_capturing():
+        _capture_spinner(lambda spinner_: spinner_.warn(), restart=True)
+    elif spinner:
         spinner.warn()
 
 
 def unpause():
     """Unpause a paused spinner"""
-    if spinner:
+    if spinner and not is_capturing():
         spinner.start()
 
 
 def error(message):
     global spinner
+    if is_capturing():
+        _capture_spinner(lambda spinner_: spinner_.fail())
+        if message:
+            _local.output.append(lambda: log.error('  ' + message.strip('\"\'')))
+        return
+
     if spinner:
         spinner.fail()
         spinner = None
@@ -81,6 +199,10 @@ def debug(message):
     if not _debug_mode:
         return
 
+    if is_capturing():
+        _local.output.append(lambda: log.debug('  ' + message))
+        return
+
     if spinner:
         spinner.stop_and_persist()
         spinner = None
@@ -1,9 +1,17 @@
 """
 Handles the authentication and provides the REST token to the rest of the application. If a token was
 invalidated or simply not present it tries to login with the provided credentials.
+
+Validating a token costs a request, so a token that was validated recently (see the 'token_ttl' setting) is trusted
+without checking it again. If a request fails because such a token has become invalid after all, the request handler
+renews it with renew_token().
+
+Requests can be sent from multiple threads at the same time, so checking and renewing the token is synchronized.
 """
 
 import json
+import threading
+import time
 
 import requests
 from requests import HTTPError
@@ -13,40 +21,56 @@ from mcmd.config import config
 from mcmd.core.errors import McmdError, MolgenisOfflineError
 from mcmd.io import io
 from mcmd.molgenis import api
+from mcmd.utils.http_session import get_session
 
 _username = None
 _password = None
 _token = None
 _as_user = False
 
+_lock = threading.RLock()
+
 
 def get_token():
-    if not _token:
-        _login()
-    return _token
+    with _lock:
+        if not _token:
+            _login()
+        return _token
 
 
 def set_(username, password=None, token=None, as_user=False):
     global _username, _password, _token, _as_user
-    _username = username
-    _password = password
-    _token = token
-    _as_user = as_user
+    # every command sets the authentication, also when the commands of a script run in parallel
+    with _lock:
+        _username = username
+        _password = password
+        _token = token
+        _as_user = as_user
 
 
 def check_token():
     """Queries the Token table to see if the set token is valid. The Token table is an arbitrary choice but will work
-    because it should always be accessible to the superuser exclusively."""
-    if _as_user:
+    because it should always be accessible to the superuser exclusively. Recently validated tokens aren't checked."""
+    with _lock:
+        _check_token()
+
+
+def _check_token():
+    if _as_user or _is_recently_validated():
+        return
+
+    if not _token:
+        _login()
         return
 
     try:
-        response = requests.get(api.rest2('sys_sec_Token'),
-                                params={
-                                    'q': 'token=={}'.format(_token)
-                                },
-                                headers={'Content-Type': 'application/json', 'x-molgenis-token': _token})
+        response = get_session().get(api.rest2('sys_sec_Token'),
+                                     params={
+                                         'q': 'token=={}'.format(_token)
+                                     },
+                                     headers={'Content-Type': 'application/json', 'x-molgenis-token': _token})
         response.raise_for_status()
+        config.set_token_validated(time.time())
     except HTTPError as e:
         if e.response.status_code == 401:
             _login()
@@ -56,6 +80,19 @@ def check_token():
         raise MolgenisOfflineError()
 
 
+def renew_token():
+    """Logs in again. Used when a request was refused even though the token was believed to be valid."""
+    with _lock:
+        _login()
+
+
+def _is_recently_validated():
+    validated_at = config.token_validated_at()
+    if not _token or validated_at is None:
+        return False
+    return time.time() - validated_at < config.get('cache', 'token_ttl')
+
+
 def _login():
     """Logs in with the provided credentials. Prompts the user for a password if no password is found in the config."""
     global _password, _token
@@ -65,9 +102,9 @@ def _login():
 
     try:
         io.debug('Logging in as user {}'.format(_username))
-        response = requests.post(api.login(),
-                                 headers={'Content-Type': 'application/json'},
-                                 data=json.dumps({"username": _username, "password": _password}))
+        response = get_session().post(api.login(),
+                                      headers={'Content-Type': 'application/json'},
+                                      data=json.dumps({"username": _username, "password": _password}))
         response.raise_for_status()
         _token = response.json()['token']
     except HTTPError as e:
@@ -75,9 +112,9 @@ def _login():
             raise McmdError('Invalid login credentials')
         else:
             raise McmdError(str(e))
-    finally:
+    else:
         if not _as_user:
-            config.set_token(_token)
+            config.set_token(_token, validated_at=time.time())
 
 
 def _ask_password():
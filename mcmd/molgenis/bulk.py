@@ -0,0 +1,221 @@
+"""
+Actions on many rows at once. The rows are split into batches (see the 'batch_size' setting) that are sent in parallel
+(see the 'max_concurrency' setting) while the progress is shown behind the message of the spinner.
+"""
+
+import json
+from concurrent.futures import ThreadPoolExecutor, as_completed, wait, FIRST_COMPLETED
+from itertools import islice
+from typing import List, Iterable, Tuple, Set, Callable
+from urllib.parse import unquote
+
+import attr
+
+from mcmd.config import config
+from mcmd.core.errors import McmdError
+from mcmd.io import io
+from mcmd.molgenis import api, client
+from mcmd.molgenis.paging import query, query_in
+
+
+@attr.s(frozen=True, auto_attribs=True)
+class AddResult:
+    added: int
+    # the labels of the rows that were skipped or failed, with the reason
+    skipped: List[Tuple[str, str]]
+    failed: List[Tuple[str, str]]
+
+
+def delete_rows(entity_type_id: str, ids: List[str], batch_size: int = None):
+    """
+    Deletes rows by id. If deleting a batch fails, the other batches are still deleted. An error that lists the failed
+    batches is raised afterwards.
+
+    :param batch_size: the number of rows per request, the 'batch_size' setting by default
+    """
+    batches = _split(ids, batch_size if batch_size else config.get('settings', 'batch_size'))
+    url = api.rest2(entity_type_id)
+    failed_batches = list()
+    num_deleted = 0
+
+    with ThreadPoolExecutor(max_workers=config.get('http', 'max_concurrency')) as executor:
+        futures = {executor.submit(client.delete_data, url, batch): index for index, batch in enumerate(batches)}
+        for future in as_completed(futures):
+            index = futures[future]
+            try:
+                future.result()
+                num_deleted += len(batches[index])
+            except McmdError as e:
+                failed_batches.append((index, e.message))
+            io.progress(num_deleted, len(ids))
+
+    if failed_batches:
+        raise McmdError('Failed to delete {} of {} rows'.format(len(ids) - num_deleted, len(ids)),
+                        info='\n'.join(_describe_failed_batch(batches[index], message) for index, message in
+                                       sorted(failed_batches)))
+
+
+def delete_matching_rows(entity_type_id: str, q: str) -> int:
+    """
+    Deletes the rows that match an RSQL query and returns the number of rows deleted. The ids are collected before the
+    rows are deleted, because deleting rows while paging through them would shift the pages.
+    """
+    ids = find_ids(entity_type_id, q)
+    if len(ids) > 0:
+        delete_rows(entity_type_id, ids)
+    return len(ids)
+
+
+def find_ids(entity_type_id: str, q: str) -> List[str]:
+    """Returns the ids of the rows that match an RSQL query."""
+    return [_get_id(row) for row in query(entity_type_id, q=q, attrs='~id', prefetch=True)]
+
+
+def _split(ids, batch_size):
+    return [ids[start:start + batch_size] for start in range(0, len(ids), batch_size)]
+
+
+def _get_id(row):
+    """The name of the id attribute differs per entity type, but the href of a row always ends with its id."""
+    return unquote(row['_href'].rstrip('/').split('/')[-1])
+
+
+def _describe_failed_batch(batch, message):
+    return 'Rows {} to {} ({} rows): {}'.format(batch[0], batch[-1], len(batch), message)
+
+
+def add_rows(entity_type_id: str, rows: Iterable[Tuple[str, dict]], key: str, batch_size: int = None) -> AddResult:
+    """
+    Adds rows in batches. The rows are read lazily, so they can be streamed from a file. Rows of which the key already
+    exists (in MOLGENIS or in an earlier row) are skipped. When adding a batch fails, its rows are added one by one so
+    that only the rows that are wrong fail.
+
+    :param rows: the rows to add, each with a label (like 'line 3') to report problems with
+    :param key: the attribute that identifies a row, like 'username'
+    :param batch_size: the number of rows per request, the 'batch_size' setting by default
+    """
+    batch_size = batch_size if batch_size else config.get('settings', 'batch_size')
+    max_workers = config.get('http', 'max_concurrency')
+    rows = iter(rows)
+    seen = set()
+    added = 0
+    skipped = list()
+    failed = list()
+
+    def collect(futures):
+        nonlocal added
+        for future in futures:
+            batch_result = future.result()
+            added += batch_result.added
+            skipped.extend(batch_result.skipped)
+            failed.extend(batch_result.failed)
+        io.update('({} added)'.format(added))
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        running = set()
+        for batch in iter(lambda: list(islice(rows, batch_size)), []):
+            unique = list()
+            for label, row in batch:
+                if row[key] in seen:
+                    skipped.append((label, 'Duplicate {} {}'.format(key, row[key])))
+                else:
+                    seen.add(row[key])
+                    unique.append((label, row))
+
+            # don't read further ahead than the batches that can be sent
+            if len(running) >= max_workers:
+                done, running = wait(running, return_when=FIRST_COMPLETED)
+                collect(done)
+            running.add(executor.submit(_add_batch, entity_type_id, unique, key))
+        collect(wait(running).done)
+
+    return AddResult(added=added, skipped=skipped, failed=failed)
+
+
+def _add_batch(entity_type_id, rows, key) -> AddResult:
+    existing = _find_existing(entity_type_id, key, [row[key] for _, row in rows])
+    skipped = [(label, '{} {} already exists'.format(key, row[key])) for label, row in rows if row[key] in existing]
+    new = [(label, row) for label, row in rows if row[key] not in existing]
+
+    failed = _create(entity_type_id, new) if new else []
+    return AddResult(added=len(new) - len(failed), skipped=skipped, failed=failed)
+
+
+def create_rows(entity_type_id: str, rows: List[Tuple[str, dict]], batch_size: int = None) -> List[Tuple[str, str]]:
+    """
+    Creates rows in parallel batches. When creating a batch fails, its rows are created one by one so that only the
+    rows that are wrong fail.
+
+    :param rows: the rows to create, each with a label (like 'line 3') to report problems with
+    :param batch_size: the number of rows per request, the 'batch_size' setting by default
+    :return: the labels of the rows that failed, with the reason
+    """
+    return _in_parallel_batches(lambda batch: _create(entity_type_id, batch), rows, batch_size)
+
+
+def update_attribute(entity_type_id: str, attribute: str, rows: List[Tuple[str, dict]],
+                     batch_size: int = None) -> List[Tuple[str, str]]:
+    """
+    Changes the value of one attribute of rows in parallel batches. When updating a batch fails, its rows are updated
+    one by one so that only the rows that are wrong fail.
+
+    :param rows: the rows to update, each with a label (like 'line 3') to report problems with. A row has two values:
+    the id and the new value of the attribute
+    :param batch_size: the number of rows per request, the 'batch_size' setting by default
+    :return: the labels of the rows that failed, with the reason
+    """
+    url = api.rest2('{}/{}'.format(entity_type_id, attribute))
+    return send_in_batches(lambda entities: client.put(url, json.dumps({'entities': entities})), rows, batch_size)
+
+
+def send_in_batches(send: Callable[[List[dict]], None], rows: List[Tuple[str, dict]],
+                    batch_size: int = None) -> List[Tuple[str, str]]:
+    """
+    Sends rows in parallel batches with a request of your own. When sending a batch fails, its rows are sent one by one
+    so that only the rows that are wrong fail.
+
+    :param send: sends a list of rows in one request
+    :param rows: the rows to send, each with a label (like 'line 3') to report problems with
+    :param batch_size: the number of rows per request, the 'batch_size' setting by default
+    :return: the labels of the rows that failed, with the reason
+    """
+    return _in_parallel_batches(lambda batch: _send_with_fallback(send, batch), rows, batch_size)
+
+
+def _in_parallel_batches(func, rows, batch_size) -> List[Tuple[str, str]]:
+    """Calls func for each batch of rows and returns the failures of all batches, in the order of the rows."""
+    batches = _split(rows, batch_size if batch_size else config.get('settings', 'batch_size'))
+    failed = dict()
+    num_done = 0
+    with ThreadPoolExecutor(max_workers=config.get('http', 'max_concurrency')) as executor:
+        futures = {executor.submit(func, batch): index for index, batch in enumerate(batches)}
+        for future in as_completed(futures):
+            index = futures[future]
+            failed[index] = future.result()
+            num_done += len(batches[index])
+            io.progress(num_done, len(rows))
+    return [failure for index in sorted(failed.keys()) for failure in failed[index]]
+
+
+def _create(entity_type_id, rows) -> List[Tuple[str, str]]:
+    url = api.rest2(entity_type_id)
+    return _send_with_fallback(lambda entities: client.post(url, data={'entities': entities}), rows)
+
+
+def _send_with_fallback(send, rows) -> List[Tuple[str, str]]:
+    """Sends the rows in one request. If that fails, sends them one by one and returns the ones that fail."""
+    try:
+        send([row for _, row in rows])
+        return []
+    except McmdError:
+        failed = list()
+        for label, row in rows:
+            try:
+                send([row])
+            except McmdError as e:
+                failed.append((label, e.message))
+        return failed
+
+
+def _find_existing(entity_type_id, key, values) -> Set[str]:
+    return {row[key] for row in query_in(entity_type_id, key, values, attrs=key)}
@@ -1,17 +1,20 @@
 import json
+from pathlib import Path
 
-import requests
 from requests import Response
 
+from mcmd.io import io
 from mcmd.molgenis import auth
 from mcmd.molgenis.request_handler import request
+from mcmd.utils.http_session import get_session
+from mcmd.utils.multipart import MultipartEncoder
 
 
 @request
 def get(url, params=None) -> Response:
-    return requests.get(url,
-                        params=params,
-                        headers=_get_default_headers())
+    return get_session().get(url,
+                             params=params,
+                             headers=_get_default_headers())
 
 
 @request
@@ -22,7 +25,7 @@ def post(url, data=None, params=None):
     if params:
         kwargs['params'] = params
 
-    return requests.post(url, **kwargs)
+    return get_session().post(url, **kwargs)
 
 
 @request
@@ -33,31 +36,43 @@ def patch(url, data=None, params=None):
     if params:
         kwargs['params'] = params
 
-    return requests.patch(url, **kwargs)
+    return get_session().patch(url, **kwargs)
 
 
 @request
-def post_file(url, file_path, params):
-    return requests.post(url,
-                         headers={'x-molgenis-token': auth.get_token()},
-                         files={'file': open(file_path, 'rb')},
-                         params=params)
+def post_file(url, file_path, params, show_progress=True):
+    """Uploads a file as the 'file' field of a multipart form. The file is streamed from disk and the progress is shown
+    behind the message of the spinner (unless show_progress is False, for example when uploading files in parallel)."""
+    return _post_multipart(url, {'file': (Path(file_path).name, file_path, None)}, params, show_progress)
 
 
 @request
 def post_files(files, url):
-    return requests.post(url,
-                         headers={'x-molgenis-token': auth.get_token()},
-                         files=files)
+    """Uploads files as a multipart form.
+
+    :param files: the files by field name, as (file name, path, content type) tuples
+    """
+    return _post_multipart(url, files)
+
+
+def _post_multipart(url, files, params=None, show_progress=True):
+    with MultipartEncoder(files) as body:
+        if show_progress:
+            body.on_read = io.TransferProgress(len(body))
+        return get_session().post(url,
+                                  headers={'x-molgenis-token': auth.get_token(),
+                                           'Content-Type': body.content_type},
+                                  data=body,
+                                  params=params)
 
 
 @request
 def post_form(url, data):
-    return requests.post(url,
-                         headers={
-                             'Content-Type': 'application/x-www-form-urlencoded; charset=UTF-8',
-                             'x-molgenis-token': auth.get_token()},
-                         data=data)
+    return get_session().post(url,
+                              headers={
+                                  'Content-Type': 'application/x-www-form-urlencoded; charset=UTF-8',
+                                  'x-molgenis-token': auth.get_token()},
+                              data=data)
 
 
 @request
@@ -66,21 +81,21 @@ def delete(url, data=None):
     if data:
         kwargs['data'] = json.dumps(data)
 
-    return requests.delete(url, **kwargs)
+    return get_session().delete(url, **kwargs)
 
 
 @request
 def delete_data(url, data):
-    return requests.delete(url,
-                           headers=_get_default_headers(),
-                           data=json.dumps({"entityIds": data}))
+    return get_session().delete(url,
+                                headers=_get_default_headers(),
+                                data=json.dumps({"entityIds": data}))
 
 
 @request
 def put(url, data):
-    return requests.put(url=url,
-                        headers=_get_default_headers(),
-                        data=data)
+    return get_session().put(url=url,
+                             headers=_get_default_headers(),
+                             data=data)
 
 
 def _get_default_headers():
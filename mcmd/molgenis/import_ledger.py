@@ -0,0 +1,74 @@
+"""
+Remembers which files have been imported into which host, so that `mcmd import --skip-unchanged` can skip files that
+have been imported before. A file is identified by the SHA-256 hash of its contents: renaming or moving a file doesn't
+make it a different file, but changing a single byte does. An import is only skipped when it would be done with the
+same import action, into the same package and as the same entity type as before.
+
+The ledger is kept per host in the cache folder. Only successful imports are recorded. Because the ledger can't tell
+whether the imported data has been changed or deleted in the meantime, deleting entity types or packages with the
+commander clears the ledger of the host.
+"""
+
+import hashlib
+import threading
+import time
+from pathlib import Path
+from typing import Optional
+
+from mcmd.config import config
+from mcmd.core import cache
+
+_LEDGER_FILE = 'imports.json'
+
+_CHUNK_SIZE = 1024 * 1024
+
+# Imports can be done in multiple threads at the same time
+_lock = threading.Lock()
+
+
+def hash_file(path: Path) -> str:
+    sha256 = hashlib.sha256()
+    with path.open('rb') as file:
+        for chunk in iter(lambda: file.read(_CHUNK_SIZE), b''):
+            sha256.update(chunk)
+    return sha256.hexdigest()
+
+
+def is_imported(file_hash: str, action: str, package: Optional[str], entity_type_id: Optional[str]) -> bool:
+    """Returns whether a file with this hash has been imported in the same way before."""
+    entry = _read_host_ledger().get(file_hash)
+    return entry is not None and entry['target'] == _target(action, package, entity_type_id)
+
+
+def record(file_hash: str, file_name: str, action: str, package: Optional[str], entity_type_id: Optional[str]):
+    """Records a successful import."""
+    with _lock:
+        ledger = cache.read(_LEDGER_FILE)
+        ledger.setdefault(_host(), dict())[file_hash] = {'file': file_name,
+                                                          'target': _target(action, package, entity_type_id),
+                                                          'timestamp': time.time()}
+        cache.write(_LEDGER_FILE, ledger)
+
+
+def clear():
+    """Forgets all imports into the selected host."""
+    with _lock:
+        ledger = cache.read(_LEDGER_FILE)
+        if _host() in ledger:
+            del ledger[_host()]
+            cache.write(_LEDGER_FILE, ledger)
+
+
+def _read_host_ledger() -> dict:
+    with _lock:
+        return cache.read(_LEDGER_FILE).get(_host(), dict())
+
+
+def _target(action, package, entity_type_id) -> dict:
+    return {'action': action,
+            'package': package,
+            'entityTypeId': entity_type_id}
+
+
+def _host():
+    return config.get('host', 'selected')
@@ -0,0 +1,179 @@
+"""
+An opt-in local cache of the tables that commands look up all the time: entity types, packages, groups, roles and
+users. When enabled (see the 'metadata' setting in the 'cache' section of the configuration file), a table is fetched
+completely the first time it's needed, after which lookups are answered locally for 'metadata_ttl' seconds. Use
+`mcmd cache warm` to fetch all tables at once.
+
+The cache is kept per host. Commands that change these tables write through to the cache: they update or remove the
+rows they changed, or invalidate a whole table when they can't tell which rows have changed (like the import command).
+All functions that change the cache do nothing when the cache is disabled.
+"""
+
+import threading
+import time
+from typing import Optional, List
+
+from mcmd.config import config
+from mcmd.core import cache
+from mcmd.io.logging import get_logger
+from mcmd.molgenis import api
+from mcmd.molgenis.client import get
+from mcmd.molgenis.paging import query, MAX_PAGE_SIZE
+
+log = get_logger()
+
+_CACHE_FILE = 'metadata.json'
+
+# The cached tables, with the attribute that identifies a row and the attributes that are stored of each row
+_TABLES = {
+    'sys_md_EntityType': ('id', 'id,package(id),extends(id)'),
+    'sys_md_Package': ('id', 'id,parent(id)'),
+    'sys_sec_Group': ('name', 'id,name'),
+    'sys_sec_Role': ('name', 'id,name,label,group(id,name)'),
+    'sys_sec_User': ('username', 'id,username')
+}
+
+TABLES = list(_TABLES.keys())
+
+# The cached tables by host, loaded from the cache file when first needed
+_hosts = dict()
+
+# Lookups can happen in multiple threads at the same time
+_lock = threading.RLock()
+
+
+def is_enabled() -> bool:
+    return bool(config.get('cache', 'metadata'))
+
+
+def is_cached(table: str) -> bool:
+    """Returns whether lookups in this table can be answered by the cache."""
+    return table in _TABLES and is_enabled()
+
+
+def get_row(table: str, identifier: str) -> Optional[dict]:
+    """Returns the row with this identifier (see _TABLES) or None if it doesn't exist. Only use this for tables that
+    are cached (see is_cached())."""
+    return _get_table(table)['rows'].get(identifier)
+
+
+def get_rows(table: str) -> List[dict]:
+    """Returns all rows of a table. Only use this for tables that are cached (see is_cached())."""
+    return list(_get_table(table)['rows'].values())
+
+
+def warm(tables: List[str] = None):
+    """Fetches the tables (all tables by default) and stores them in the cache."""
+    with _lock:
+        for table in tables if tables else TABLES:
+            _put_table(table, _fetch_rows(table))
+        _store()
+
+
+def refresh_row(table: str, identifier: str):
+    """Fetches a single row and updates the cache. Removes the row from the cache if it doesn't exist (anymore)."""
+    if not _is_loaded(table):
+        return
+
+    identifying_attribute, attrs = _TABLES[table]
+    items = get(api.rest2(table),
+                params={
+                    'attrs': attrs,
+                    'q': '{}=={}'.format(identifying_attribute, identifier)
+                }).json()['items']
+
+    with _lock:
+        rows = _get_host_tables()[table]['rows']
+        if len(items) > 0:
+            rows[identifier] = _strip(items[0])
+        else:
+            rows.pop(identifier, None)
+        _store()
+
+
+def remove_row(table: str, identifier: str):
+    """Removes a row from the cache."""
+    if not _is_loaded(table):
+        return
+
+    with _lock:
+        _get_host_tables()[table]['rows'].pop(identifier, None)
+        _store()
+
+
+def invalidate(*tables: str):
+    """Removes the tables from the cache so that they will be fetched again when needed."""
+    if not is_enabled():
+        return
+
+    with _lock:
+        host_tables = _get_host_tables()
+        for table in tables:
+            host_tables.pop(table, None)
+        _store()
+
+
+def clear():
+    """Removes all tables of the selected host from the cache."""
+    with _lock:
+        host = config.get('host', 'selected')
+        _hosts[host] = dict()
+        stored = cache.read(_CACHE_FILE)
+        if host in stored:
+            del stored[host]
+            cache.write(_CACHE_FILE, stored)
+
+
+def _is_loaded(table):
+    if not is_cached(table):
+        return False
+    with _lock:
+        return _is_fresh(_get_host_tables().get(table))
+
+
+def _get_table(table):
+    with _lock:
+        cached_table = _get_host_tables().get(table)
+        if not _is_fresh(cached_table):
+            cached_table = _put_table(table, _fetch_rows(table))
+            _store()
+        return cached_table
+
+
+def _put_table(table, rows):
+    cached_table = {'timestamp': time.time(),
+                    'rows': rows}
+    _get_host_tables()[table] = cached_table
+    return cached_table
+
+
+def _is_fresh(cached_table):
+    return cached_table is not None and time.time() - cached_table['timestamp'] < config.get('cache',
+                                                                                              'metadata_ttl')
+
+
+def _get_host_tables():
+    host = config.get('host', 'selected')
+    if host not in _hosts:
+        _hosts[host] = cache.read(_CACHE_FILE).get(host, dict())
+    return _hosts[host]
+
+
+def _store():
+    host = config.get('host', 'selected')
+    stored = cache.read(_CACHE_FILE)
+    stored[host] = _get_host_tables()
+    cache.write(_CACHE_FILE, stored)
+
+
+def _fetch_rows(table):
+    log.debug('Caching table %s' % table)
+    identifying_attribute, attrs = _TABLES[table]
+    return {item[identifying_attribute]: _strip(item)
+            for item in query(table, attrs=attrs, page_size=MAX_PAGE_SIZE, prefetch=True)}
+
+
+def _strip(item):
+    """Removes the hrefs from a row."""
+    return {key: _strip(value) if isinstance(value, dict) else value
+            for key, value in item.items() if not key.startswith('_')}
@@ -0,0 +1,159 @@
+"""
+Tears down packages. The whole subtree of a package (its sub-packages and their entity types, recursively) is loaded at
+once, after which a deletion plan is made:
+
+1. Entity types are deleted first, in steps. An entity type is deleted after the entity types that reference it (with
+   reference attributes) or extend it, so that MOLGENIS never refuses to delete an entity type because it's still in
+   use. The entity types of a step don't depend on each other and are deleted in parallel batches. Entity types that
+   reference each other in a cycle are deleted together in a single request, so that MOLGENIS can sort them out.
+2. Then the (now empty) packages are deleted, deepest packages first.
+"""
+
+import math
+from collections import defaultdict
+from typing import List, Dict, Set, Tuple
+
+import attr
+
+from mcmd.config import config
+from mcmd.molgenis import metadata, bulk
+from mcmd.molgenis.paging import query, query_in, MAX_PAGE_SIZE
+from mcmd.molgenis.resources import ResourceType
+
+
+@attr.s(frozen=True, auto_attribs=True)
+class PackageTree:
+    root: str
+    # the sub-packages of the root package, by their depth in the tree (the children of the root have depth 1)
+    packages: Dict[str, int]
+    entity_types: List[str]
+    # per entity type: the entity types of the tree that have to be deleted before it
+    dependencies: Dict[str, Set[str]]
+
+
+@attr.s(frozen=True, auto_attribs=True)
+class DeletionStep:
+    resource_type: ResourceType
+    ids: List[str]
+    # whether the resources have to be deleted in a single request because they depend on each other
+    together: bool = False
+
+
+def load_package_tree(package_id: str) -> PackageTree:
+    packages = _get_sub_packages(package_id)
+    entity_types = _get_entity_types(list(packages.keys()) + [package_id])
+    dependencies = _get_dependencies(entity_types)
+    return PackageTree(root=package_id,
+                       packages=packages,
+                       entity_types=sorted(entity_types.keys()),
+                       dependencies=dependencies)
+
+
+def get_contents(package_id: str) -> Tuple[List[str], List[str]]:
+    """Returns the sub-packages (recursively) and the entity types of a package."""
+    packages = _get_sub_packages(package_id)
+    entity_types = _get_entity_types(list(packages.keys()) + [package_id])
+    return sorted(packages.keys()), sorted(entity_types.keys())
+
+
+def plan_deletion(tree: PackageTree, include_root: bool) -> List[DeletionStep]:
+    """Returns the steps to delete the contents of the package tree (and the root package itself if include_root)."""
+    steps = [DeletionStep(ResourceType.ENTITY_TYPE, ids, together) for ids, together in
+             _sort_in_layers(tree.entity_types, tree.dependencies)]
+
+    packages_by_depth = defaultdict(list)
+    for package, depth in tree.packages.items():
+        packages_by_depth[depth].append(package)
+    for depth in sorted(packages_by_depth.keys(), reverse=True):
+        steps.append(DeletionStep(ResourceType.PACKAGE, sorted(packages_by_depth[depth])))
+
+    if include_root:
+        steps.append(DeletionStep(ResourceType.PACKAGE, [tree.root]))
+    return steps
+
+
+def delete(steps: List[DeletionStep]):
+    """Executes a deletion plan. The resources of a step are divided over parallel batches."""
+    for step in steps:
+        if step.together:
+            batch_size = len(step.ids)
+        else:
+            batch_size = min(math.ceil(len(step.ids) / config.get('http', 'max_concurrency')),
+                             config.get('settings', 'batch_size'))
+        bulk.delete_rows(step.resource_type.get_entity_id(), step.ids, batch_size=batch_size)
+
+
+def _get_sub_packages(package_id) -> Dict[str, int]:
+    """Loads all packages at once and walks the tree from the given package."""
+    children = defaultdict(list)
+    for package in _get_all_rows(ResourceType.PACKAGE.get_entity_id(), attrs='id,parent(id)'):
+        if package.get('parent'):
+            children[package['parent']['id']].append(package['id'])
+
+    depths = dict()
+    level = children[package_id]
+    depth = 1
+    while level:
+        next_level = list()
+        for package in level:
+            depths[package] = depth
+            next_level.extend(children[package])
+        level = next_level
+        depth += 1
+    return depths
+
+
+def _get_entity_types(package_ids) -> Dict[str, dict]:
+    entity_type_id = ResourceType.ENTITY_TYPE.get_entity_id()
+    if metadata.is_cached(entity_type_id):
+        package_ids = set(package_ids)
+        return {entity_type['id']: entity_type for entity_type in metadata.get_rows(entity_type_id) if
+                entity_type.get('package') and entity_type['package']['id'] in package_ids}
+
+    return {entity_type['id']: entity_type for entity_type in
+            query_in(entity_type_id, 'package', list(package_ids), attrs='id,extends(id)')}
+
+
+def _get_dependencies(entity_types: Dict[str, dict]) -> Dict[str, Set[str]]:
+    dependencies = defaultdict(set)
+
+    for entity_type in entity_types.values():
+        parent = entity_type.get('extends')
+        if parent and parent['id'] in entity_types:
+            dependencies[parent['id']].add(entity_type['id'])
+
+    for attribute in query_in('sys_md_Attribute', 'entity', list(entity_types.keys()),
+                              attrs='entity(id),refEntityType(id)'):
+        referenced = attribute.get('refEntityType')
+        referencing = attribute['entity']['id']
+        if referenced and referenced['id'] in entity_types and referenced['id'] != referencing:
+            dependencies[referenced['id']].add(referencing)
+
+    return dict(dependencies)
+
+
+def _sort_in_layers(ids: List[str], dependencies: Dict[str, Set[str]]):
+    """
+    Sorts the ids in layers: every layer only depends on the layers before it. When the remaining ids all depend on
+    each other, they are returned as one last layer that has to be deleted together.
+    """
+    remaining = {id_: set(dependencies.get(id_, set())) for id_ in ids}
+    layers = list()
+    while remaining:
+        layer = sorted(id_ for id_, before in remaining.items() if not before)
+        if not layer:
+            layers.append((sorted(remaining.keys()), True))
+            break
+
+        layers.append((layer, False))
+        for id_ in layer:
+            del remaining[id_]
+        for before in remaining.values():
+            before.difference_update(layer)
+    return layers
+
+
+def _get_all_rows(entity_type_id, attrs):
+    if metadata.is_cached(entity_type_id):
+        return metadata.get_rows(entity_type_id)
+    return query(entity_type_id, attrs=attrs, page_size=MAX_PAGE_SIZE, prefetch=True)
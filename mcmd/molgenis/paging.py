@@ -0,0 +1,91 @@
+"""
+Reads rows from the REST API v2 page by page.
+
+The REST API v2 returns the rows of an entity type in pages, with a 'nextHref' pointing to the next page if there is
+one. Use query() for every query that can return more than one row: it follows the pages lazily, so only one or two
+pages are held in memory no matter how large the table is.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterator, List
+from urllib.parse import urljoin
+
+from mcmd.molgenis import api
+from mcmd.molgenis.client import get
+
+# The maximum number of rows the REST API v2 returns per request
+MAX_PAGE_SIZE = 10000
+
+DEFAULT_PAGE_SIZE = 1000
+
+# The number of values per '=in=' query, to keep the URLs short enough
+VALUES_PER_QUERY = 100
+
+
+def query(entity_type_id: str, q: str = None, attrs: str = None, page_size: int = DEFAULT_PAGE_SIZE,
+          prefetch: bool = False) -> Iterator[dict]:
+    """
+    Lazily yields the rows of an entity type.
+
+    :param entity_type_id: the entity type to query
+    :param q: an optional RSQL query to filter the rows
+    :param attrs: the attributes to return (for example 'id,name,group(id,name)'), all attributes by default
+    :param page_size: the number of rows to request at a time (at most MAX_PAGE_SIZE)
+    :param prefetch: request the next page in the background while the rows of the current page are processed
+    """
+    params = {'num': min(page_size, MAX_PAGE_SIZE)}
+    if q:
+        params['q'] = q
+    if attrs:
+        params['attrs'] = attrs
+
+    pages = _prefetch_pages if prefetch else _get_pages
+    for page in pages(api.rest2(entity_type_id), params):
+        yield from page['items']
+
+
+def query_in(entity_type_id: str, attribute: str, values: List[str], q: str = None, attrs: str = None) -> \
+        Iterator[dict]:
+    """
+    Lazily yields the rows of which the attribute has one of the values, with as few '=in=' queries as the length of a
+    URL allows.
+
+    :param q: an optional RSQL query that the rows have to match as well
+    """
+    for start in range(0, len(values), VALUES_PER_QUERY):
+        chunk = values[start:start + VALUES_PER_QUERY]
+        in_query = '{}=in=({})'.format(attribute, ','.join(quote(value) for value in chunk))
+        yield from query(entity_type_id, q='{};({})'.format(in_query, q) if q else in_query, attrs=attrs,
+                         page_size=MAX_PAGE_SIZE)
+
+
+def quote(value) -> str:
+    """Quotes a value for use in an RSQL query, so that it may contain reserved characters like commas."""
+    return '"{}"'.format(str(value).replace('\\', '\\\\').replace('"', '\\"'))
+
+
+def _get_pages(url, params):
+    while url:
+        page = _get_page(url, params)
+        yield page
+        url, params = _get_next_url(url, page), None
+
+
+def _prefetch_pages(url, params):
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        next_page = executor.submit(_get_page, url, params)
+        while next_page:
+            page = next_page.result()
+            next_url = _get_next_url(url, page)
+            next_page = executor.submit(_get_page, next_url) if next_url else None
+            yield page
+
+
+def _get_page(url, params=None) -> dict:
+    return get(url, params=params).json()
+
+
+def _get_next_url(url, page):
+    """The 'nextHref' contains the query, the attributes and the start and size of the next page."""
+    next_href = page.get('nextHref')
+    return urljoin(url, next_href) if next_href else None
@@ -1,11 +1,13 @@
 from enum import Enum
+from typing import List
 
 from mcmd.core.compatibility import version
 from mcmd.core.errors import McmdError
 from mcmd.io.ask import multi_choice
 from mcmd.io.logging import get_logger
-from mcmd.molgenis import api
+from mcmd.molgenis import api, metadata
 from mcmd.molgenis.client import get
+from mcmd.utils.parallel import map_parallel
 
 log = get_logger()
 
@@ -31,6 +33,9 @@ def principal_exists(principal_name, principal_type):
 
 def user_exists(username):
     log.debug('Checking if user %s exists' % username)
+    if metadata.is_cached('sys_sec_User'):
+        return metadata.get_row('sys_sec_User', username) is not None
+
     response = get(api.rest2('sys_sec_User'),
                    params={
                        'q': 'username==' + username
@@ -41,6 +46,9 @@ def user_exists(username):
 
 def role_exists(role_input):
     log.debug('Checking if role %s exists' % role_input)
+    if metadata.is_cached('sys_sec_Role'):
+        return metadata.get_row('sys_sec_Role', to_role_name(role_input)) is not None
+
     response = get(api.rest2('sys_sec_Role'),
                    params={
                        'q': 'name==' + to_role_name(role_input)
@@ -53,30 +61,49 @@ def get_principal_type_from_args(args, principal_name: str) -> PrincipalType:
     Looks for the presence of a '--user' or '--role' argument, confirms the principal exists and returns the type. If
     no argument is specified, the type will be detected automatically.
     """
+    return select_principal_type(principal_name, find_principal_types_from_args(args, principal_name))
+
+
+def find_principal_types_from_args(args, principal_name: str) -> List[PrincipalType]:
+    """
+    Like get_principal_type_from_args, but returns the found principal types without asking the user to choose one
+    when there are multiple. Use select_principal_type() to select the principal type.
+    """
     if args.user:
         ensure_principal_exists(principal_name, PrincipalType.USER)
-        return PrincipalType.USER
+        return [PrincipalType.USER]
     elif args.role:
         ensure_principal_exists(principal_name, PrincipalType.ROLE)
-        return PrincipalType.ROLE
+        return [PrincipalType.ROLE]
     else:
-        return detect_principal_type(principal_name)
+        return find_principal_types(principal_name)
 
 
 def detect_principal_type(principal_name):
-    results = dict()
-    for principal_type in PrincipalType:
-        if principal_exists(principal_name, principal_type):
-            results[principal_type.value] = principal_name
+    return select_principal_type(principal_name, find_principal_types(principal_name))
+
+
+def find_principal_types(principal_name) -> List[PrincipalType]:
+    """Returns the principal types that have a principal with this name. The principal types are queried in
+    parallel."""
+    principal_types = list(PrincipalType)
+    exists = map_parallel(lambda principal_type: principal_exists(principal_name, principal_type),
+                          principal_types,
+                          max_workers=len(principal_types))
+    return [principal_type for principal_type, exists_ in zip(principal_types, exists) if exists_]
+
 
-    if len(results) == 0:
+def select_principal_type(principal_name, found_types: List[PrincipalType]) -> PrincipalType:
+    """Selects the principal type from the principal types found by find_principal_types(). Asks the user to choose
+    if there's more than one."""
+    if len(found_types) == 0:
         raise McmdError('No principals found with name %s' % principal_name)
-    elif len(results) > 1:
-        choices = results.keys()
+    elif len(found_types) > 1:
+        choices = [principal_type.value for principal_type in found_types]
         answer = multi_choice('Multiple principals found with name %s. Choose one:' % principal_name, choices)
         return PrincipalType[answer.upper()]
     else:
-        return PrincipalType[list(results)[0].upper()]
+        return found_types[0]
 
 
 @version('7.0.0')
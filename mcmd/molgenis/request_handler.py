@@ -1,7 +1,8 @@
 """
 Error handling of requests to MOLGENIS.
 
-Error responses can come back in varying forms which this decorator tries to unify.
+Error responses can come back in varying forms which this decorator tries to unify. A request that is refused because
+the token has become invalid is retried once with a new token.
 """
 
 import requests
@@ -19,6 +20,9 @@ def request(func):
         response = str()
         try:
             response = func(*args, **kwargs)
+            if response.status_code == 401:
+                auth.renew_token()
+                response = func(*args, **kwargs)
             response.raise_for_status()
             return response
         except requests.HTTPError as e:
@@ -1,11 +1,14 @@
+from collections import defaultdict
 from enum import Enum
-from typing import List
+from typing import List, Dict
 
-from mcmd.molgenis import api
+from mcmd.molgenis import api, metadata
 from mcmd.molgenis.client import get
+from mcmd.molgenis.paging import query_in
 from mcmd.io.ask import multi_choice
 from mcmd.io.logging import get_logger
 from mcmd.core.errors import McmdError
+from mcmd.utils.parallel import map_parallel
 
 log = get_logger()
 
@@ -35,23 +38,51 @@ class ResourceType(Enum):
 
 
 def detect_resource_type(resource_id, types: List[ResourceType]):
-    results = dict()
-    for resource_type in types:
-        if resource_exists(resource_id, resource_type):
-            results[resource_type.get_label()] = resource_id
+    return select_resource_type(resource_id, find_resource_types(resource_id, types))
+
+
+def find_resource_types(resource_id, types: List[ResourceType]) -> List[ResourceType]:
+    """Returns the resource types that have a resource with this id. The resource types are queried in parallel."""
+    exists = map_parallel(lambda resource_type: resource_exists(resource_id, resource_type),
+                          types,
+                          max_workers=len(types))
+    return [resource_type for resource_type, exists_ in zip(types, exists) if exists_]
+
 
-    if len(results) == 0:
+def find_types_of_resources(resource_ids: List[str], types: List[ResourceType]) -> Dict[str, List[ResourceType]]:
+    """Returns the resource types that have a resource with these ids, by id. Uses one '=in=' query per resource type
+    (or the metadata cache)."""
+    found = defaultdict(list)
+    for resource_type in types:
+        entity_id = resource_type.get_entity_id()
+        if metadata.is_cached(entity_id):
+            existing = [id_ for id_ in resource_ids if metadata.get_row(entity_id, id_) is not None]
+        else:
+            attribute = resource_type.get_identifying_attribute()
+            existing = [row[attribute] for row in query_in(entity_id, attribute, resource_ids, attrs=attribute)]
+        for id_ in existing:
+            found[id_].append(resource_type)
+    return found
+
+
+def select_resource_type(resource_id, found_types: List[ResourceType]):
+    """Selects the resource type from the resource types found by find_resource_types(). Asks the user to choose if
+    there's more than one."""
+    if len(found_types) == 0:
         raise McmdError('No resources found with id %s' % resource_id)
-    elif len(results) > 1:
-        choices = results.keys()
+    elif len(found_types) > 1:
+        choices = [resource_type.get_label() for resource_type in found_types]
         answer = multi_choice('Multiple resources found for %s. Choose one:' % resource_id, choices)
         return ResourceType.of_label(answer)
     else:
-        return ResourceType.of_label(list(results)[0])
+        return found_types[0]
 
 
 def resource_exists(resource_id, resource_type):
     log.debug('Checking if %s %s exists' % (resource_type.get_label(), resource_id))
+    if metadata.is_cached(resource_type.get_entity_id()):
+        return metadata.get_row(resource_type.get_entity_id(), resource_id) is not None
+
     query = '{}=={}'.format(resource_type.get_identifying_attribute(), resource_id)
     response = get(api.rest2(resource_type.get_entity_id()),
                    params={
@@ -62,6 +93,9 @@ def resource_exists(resource_id, resource_type):
 
 def one_resource_exists(resources, resource_type):
     log.debug('Checking if one of [{}] exists in [{}]'.format(','.join(resources), resource_type.get_label()))
+    if metadata.is_cached(resource_type.get_entity_id()):
+        return any(metadata.get_row(resource_type.get_entity_id(), resource) is not None for resource in resources)
+
     query = '{}=in=({})'.format(resource_type.get_identifying_attribute(), ','.join(resources))
     response = get(api.rest2(resource_type.get_entity_id()),
                    params={
@@ -1,5 +1,6 @@
 """Client for the Permission Manager plugin of MOLGENIS (all versions)."""
 
+from typing import Dict
 from urllib.parse import urljoin
 
 from mcmd.core.errors import McmdError
@@ -17,7 +18,17 @@ def grant_permission(principal_type: PrincipalType,
                      permission: Permission):
     """Grants permission on one (non-row) resource to one principal."""
 
-    data = {'radio-' + entity_type_id: permission.value}
+    grant_permissions(principal_type, principal_name, resource_type, {entity_type_id: permission})
+
+
+def grant_permissions(principal_type: PrincipalType,
+                      principal_name: str,
+                      resource_type: ResourceType,
+                      permissions: Dict[str, Permission]):
+    """Grants permissions on many (non-row) resources of the same type to one principal, in one request. The form of
+    the permission manager has a 'radio-<id>' field for every resource."""
+
+    data = {'radio-' + resource_id: permission.value for resource_id, permission in permissions.items()}
 
     if principal_type == PrincipalType.USER:
         data['username'] = principal_name
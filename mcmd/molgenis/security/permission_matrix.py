@@ -0,0 +1,276 @@
+"""
+Brings the permissions of many principals on many resources in line with a permission matrix: a list of the permissions
+that principals should have on resources.
+
+A matrix is a YAML file that lists the permissions per principal:
+
+  roles:
+    biobank_EDITOR:
+      entity-types:
+        biobank_samples: write
+      packages:
+        biobank: read
+  users:
+    john:
+      resources:          # the resource type is detected
+        dataexplorer: read
+
+Or a CSV (or TSV) file with the columns 'principal', 'permission' and 'resource', and the optional columns
+'principal_type' (user or role) and 'resource_type' (entity-type, package or plugin).
+
+Applying a matrix happens in three steps:
+1. The principals and resources are looked up in bulk. Their types are detected when the matrix doesn't specify them.
+2. The current permissions are fetched (for all resources of a type at once, page by page, in parallel per resource
+   and principal type) and compared with the matrix. Only the permissions that differ are changed. Before MOLGENIS
+   8.1.1 the current permissions can't be read, so all permissions of the matrix are given.
+3. The changes are applied with one request per principal and resource type, in parallel.
+"""
+
+from collections import defaultdict
+from pathlib import Path
+from typing import Optional, List, Tuple, Dict, Set
+
+import attr
+from ruamel.yaml import YAML, YAMLError
+
+from mcmd.config import config
+from mcmd.core.errors import McmdError
+from mcmd.molgenis import metadata
+from mcmd.molgenis.paging import query_in
+from mcmd.molgenis.principals import PrincipalType, to_role_name
+from mcmd.molgenis.resources import ResourceType, find_types_of_resources
+from mcmd.molgenis.security import security
+from mcmd.molgenis.security.permission import Permission
+from mcmd.utils.file_helpers import read_rows
+from mcmd.utils.parallel import map_parallel
+
+# The resource types that permissions can be given on with a matrix
+RESOURCE_TYPES = [ResourceType.ENTITY_TYPE, ResourceType.PACKAGE, ResourceType.PLUGIN]
+
+_PRINCIPAL_TYPES = {'users': PrincipalType.USER,
+                    'roles': PrincipalType.ROLE}
+
+_RESOURCE_TYPES = {'entity-types': ResourceType.ENTITY_TYPE,
+                   'packages': ResourceType.PACKAGE,
+                   'plugins': ResourceType.PLUGIN,
+                   'resources': None}
+
+_PRINCIPAL_TABLES = {PrincipalType.USER: ('sys_sec_User', 'username'),
+                     PrincipalType.ROLE: ('sys_sec_Role', 'name')}
+
+
+@attr.s(frozen=True, auto_attribs=True)
+class Grant:
+    # where the grant comes from, to report problems with (like 'line 3')
+    label: str
+    principal: str
+    permission: Permission
+    resource: str
+    # the types are detected if they're not specified
+    principal_type: Optional[PrincipalType] = None
+    resource_type: Optional[ResourceType] = None
+
+
+@attr.s(frozen=True, auto_attribs=True)
+class MatrixChanges:
+    changes: List[Grant]
+    num_unchanged: int
+    failed: List[Tuple[str, str]]
+
+
+def read_grants(file_path: Path) -> List[Grant]:
+    """Reads the grants of a YAML, CSV or TSV matrix file."""
+    if file_path.suffix.lower() in ('.yaml', '.yml'):
+        return _read_yaml_grants(file_path)
+    else:
+        return _read_csv_grants(file_path)
+
+
+def get_changes(grants: List[Grant]) -> MatrixChanges:
+    """Looks up the principals and resources of the grants and returns the grants that would change a permission."""
+    resolved, failed = _resolve(grants)
+    current = _get_current_permissions(resolved)
+
+    changes = list()
+    wanted = dict()
+    num_unchanged = 0
+    for grant in resolved:
+        key = (grant.principal_type, grant.principal, grant.resource_type, grant.resource)
+        if key in wanted:
+            if wanted[key] != grant.permission.value:
+                failed.append((grant.label, 'Conflicts with an earlier {} permission'.format(wanted[key])))
+            continue
+        wanted[key] = grant.permission.value
+
+        if current is not None and current.get(key, Permission.NONE).value == grant.permission.value:
+            num_unchanged += 1
+        else:
+            changes.append(grant)
+
+    return MatrixChanges(changes=changes, num_unchanged=num_unchanged, failed=failed)
+
+
+def apply(changes: List[Grant]) -> List[Tuple[str, str]]:
+    """Gives the permissions with one request per principal and resource type, in parallel. Returns the labels of the
+    grants that failed, with the reason."""
+    groups = defaultdict(list)
+    for grant in changes:
+        groups[(grant.principal_type, grant.principal, grant.resource_type)].append(grant)
+
+    def grant_permissions(grants):
+        first = grants[0]
+        try:
+            security.grant_permissions(first.principal_type, first.principal, first.resource_type,
+                                       {grant.resource: grant.permission for grant in grants})
+            return []
+        except McmdError as e:
+            return [(grant.label, e.message) for grant in grants]
+
+    results = map_parallel(grant_permissions, groups.values(), max_workers=config.get('http', 'max_concurrency'))
+    failed = [failure for result in results for failure in result]
+    # report the failures in the order of the file
+    order = {grant.label: index for index, grant in enumerate(changes)}
+    return sorted(failed, key=lambda failure: order[failure[0]])
+
+
+def _read_yaml_grants(file_path: Path) -> List[Grant]:
+    if not file_path.is_file():
+        raise McmdError("File %s doesn't exist" % str(file_path.resolve()))
+    try:
+        matrix = YAML(typ='safe').load(file_path) or dict()
+    except (OSError, YAMLError) as e:
+        raise McmdError('Error reading %s: %s' % (file_path.name, str(e)))
+
+    grants = list()
+    for principal_section, principals in _items(matrix, file_path.name):
+        principal_type = _parse_section(principal_section, _PRINCIPAL_TYPES)
+        for principal, resource_sections in _items(principals, principal_section):
+            for resource_section, resources in _items(resource_sections, principal):
+                resource_type = _parse_section(resource_section, _RESOURCE_TYPES)
+                for resource, permission in _items(resources, resource_section):
+                    grants.append(Grant(label='{} {}: {}'.format(principal_type.value, principal, resource),
+                                        principal=str(principal),
+                                        permission=_parse_permission(permission),
+                                        resource=str(resource),
+                                        principal_type=principal_type,
+                                        resource_type=resource_type))
+    return grants
+
+
+def _items(section, name):
+    if section is None:
+        return []
+    elif not isinstance(section, dict):
+        raise McmdError('Expected a mapping in {}'.format(name))
+    return section.items()
+
+
+def _parse_section(name, types: dict):
+    if name not in types:
+        raise McmdError('Unknown section {} (expected {})'.format(name, ', '.join(types.keys())))
+    return types[name]
+
+
+def _read_csv_grants(file_path: Path) -> List[Grant]:
+    grants = list()
+    for line, row in read_rows(file_path, required_columns=['principal', 'permission', 'resource']):
+        principal_type = (row.get('principal_type') or '').strip().lower()
+        resource_type = (row.get('resource_type') or '').strip().lower()
+        if principal_type and principal_type + 's' not in _PRINCIPAL_TYPES:
+            raise McmdError('Unknown principal type {} on line {}'.format(principal_type, line))
+        if resource_type and resource_type + 's' not in _RESOURCE_TYPES:
+            raise McmdError('Unknown resource type {} on line {}'.format(resource_type, line))
+
+        grants.append(Grant(label='line {}'.format(line),
+                            principal=(row['principal'] or '').strip(),
+                            permission=_parse_permission(row['permission'], line),
+                            resource=(row['resource'] or '').strip(),
+                            principal_type=_PRINCIPAL_TYPES[principal_type + 's'] if principal_type else None,
+                            resource_type=_RESOURCE_TYPES[resource_type + 's'] if resource_type else None))
+    return grants
+
+
+def _parse_permission(permission, line=None) -> Permission:
+    try:
+        return Permission[str(permission or '').strip().upper()]
+    except KeyError:
+        raise McmdError('Unknown permission {}{}'.format(permission, ' on line {}'.format(line) if line else ''))
+
+
+def _resolve(grants: List[Grant]) -> Tuple[List[Grant], List[Tuple[str, str]]]:
+    """Checks that the principals and resources exist and fills in their types."""
+    principals = _find_principals({grant.principal for grant in grants if grant.principal})
+    resources = _find_resources({grant.resource for grant in grants if grant.resource})
+
+    resolved = list()
+    failed = list()
+    for grant in grants:
+        try:
+            principal_type = _select_type(grant.principal, grant.principal_type, principals.get(grant.principal, []),
+                                          'user or role')
+            resource_type = _select_type(grant.resource, grant.resource_type, resources.get(grant.resource, []),
+                                         'resource')
+            principal = to_role_name(grant.principal) if principal_type == PrincipalType.ROLE else grant.principal
+            resolved.append(attr.evolve(grant, principal=principal, principal_type=principal_type,
+                                        resource_type=resource_type))
+        except McmdError as e:
+            failed.append((grant.label, e.message))
+    return resolved, failed
+
+
+def _select_type(name, specified_type, found_types, description):
+    if specified_type:
+        if specified_type not in found_types:
+            raise McmdError('No {} found with id {}'.format(_type_name(specified_type), name))
+        return specified_type
+    elif len(found_types) == 0:
+        raise McmdError('No {} found with id {}'.format(description, name))
+    elif len(found_types) > 1:
+        raise McmdError('Id {} is ambiguous ({}): specify the type'.format(
+            name, ', '.join(_type_name(found_type) for found_type in found_types)))
+    else:
+        return found_types[0]
+
+
+def _type_name(type_) -> str:
+    return type_.value if isinstance(type_, PrincipalType) else type_.get_label().lower()
+
+
+def _find_principals(names: Set[str]) -> Dict[str, List[PrincipalType]]:
+    found = defaultdict(list)
+    for principal_type, (table, attribute) in _PRINCIPAL_TABLES.items():
+        by_identifier = {to_role_name(name) if principal_type == PrincipalType.ROLE else name: name for name in names}
+        for identifier in _find_existing(table, attribute, list(by_identifier.keys())):
+            found[by_identifier[identifier]].append(principal_type)
+    return found
+
+
+def _find_resources(ids: Set[str]) -> Dict[str, List[ResourceType]]:
+    return find_types_of_resources(sorted(ids), RESOURCE_TYPES)
+
+
+def _find_existing(table, attribute, values) -> Set[str]:
+    if metadata.is_cached(table):
+        return {value for value in values if metadata.get_row(table, value) is not None}
+    return {row[attribute] for row in query_in(table, attribute, values, attrs=attribute)}
+
+
+def _get_current_permissions(grants: List[Grant]) -> Optional[Dict[tuple, Permission]]:
+    """Fetches the current permissions of the principals, with one (paged) request per resource and principal type for
+    all resources of that type. Returns None if the current permissions can't be read."""
+    principals_per_type = defaultdict(set)
+    for grant in grants:
+        principals_per_type[(grant.resource_type, grant.principal_type)].add(grant.principal)
+
+    keys = list(principals_per_type.keys())
+    results = map_parallel(lambda key: security.get_all_permissions(key[0], key[1], sorted(principals_per_type[key])),
+                           keys,
+                           max_workers=config.get('http', 'max_concurrency'))
+
+    current = dict()
+    for (resource_type, principal_type), permissions in zip(keys, results):
+        if permissions is None:
+            return None
+        for (resource, principal), permission in permissions.items():
+            current[(principal_type, principal, resource_type, resource)] = permission
+    return current
@@ -1,11 +1,29 @@
 """Client for the Permission API of MOLGENIS 8.1.1 and up."""
+from typing import List, Dict, Tuple, Iterator
 from urllib.parse import urljoin, quote
 
+import attr
+
+from mcmd.config import config
 from mcmd.core.errors import McmdError
-from mcmd.molgenis import api
+from mcmd.molgenis import api, bulk, paging
 from mcmd.molgenis.client import get, delete, post, patch
 from mcmd.molgenis.principals import PrincipalType, to_role_name
 from mcmd.molgenis.security.permission import Permission
+from mcmd.utils.parallel import map_parallel
+
+# The number of objects per page when reading all permissions of a type
+_PAGE_SIZE = 10000
+
+
+@attr.s(frozen=True, auto_attribs=True)
+class RowPermissionChanges:
+    added: int
+    updated: int
+    removed: int
+    unchanged: int
+    # the ids of the rows that failed, with the reason
+    failed: List[Tuple[str, str]]
 
 
 def grant_row_permission(principal_type: PrincipalType,
@@ -30,6 +48,48 @@ def grant_row_permission(principal_type: PrincipalType,
             _update_permission(entity_type_id, entity_id, principal_type, principal_name, permission)
 
 
+def grant_row_permissions(principal_type: PrincipalType,
+                          principal_name: str,
+                          entity_type_id: str,
+                          entity_ids: List[str],
+                          permission: Permission) -> RowPermissionChanges:
+    """
+    Grants a permission on many rows to one principal. The existing permissions of the principal are read page by page,
+    after which the new and changed permissions are sent in parallel batches. Permissions can only be removed one row at
+    a time, so those requests are sent in parallel.
+    """
+    type_id = 'entity-' + entity_type_id
+    existing = _get_existing_row_permissions(type_id, principal_type, principal_name)
+
+    additions = list()
+    updates = list()
+    removals = list()
+    for entity_id in entity_ids:
+        current = existing.get(entity_id)
+        if permission == Permission.NONE:
+            if current:
+                removals.append(entity_id)
+        elif not current:
+            additions.append(entity_id)
+        elif current != permission.value.upper():
+            updates.append(entity_id)
+
+    body = _get_principal_body(principal_type, principal_name)
+    body['permission'] = permission.value.upper()
+    objects = [(entity_id, {'objectId': entity_id, 'permissions': [body]}) for entity_id in additions + updates]
+    url = urljoin(api.permissions(), quote(type_id, safe=''))
+
+    failed = bulk.send_in_batches(lambda batch: post(url, data={'objects': batch}), objects[:len(additions)]) + \
+        bulk.send_in_batches(lambda batch: patch(url, data={'objects': batch}), objects[len(additions):]) + \
+        _delete_row_permissions(entity_type_id, removals, principal_type, principal_name)
+
+    return RowPermissionChanges(added=len(additions),
+                                updated=len(updates),
+                                removed=len(removals),
+                                unchanged=len(entity_ids) - len(additions) - len(updates) - len(removals),
+                                failed=failed)
+
+
 def get_user_plugin_permission(plugin: str, user: str) -> Permission:
     """Gets the permission for a user on a plugin."""
     return _get_permission('plugin', plugin, PrincipalType.USER, user)
@@ -70,6 +130,20 @@ def get_role_entity_permission(entity_type: str, entity, role: str) -> Permissio
     return _get_permission('entity-' + entity_type, entity, PrincipalType.ROLE, role)
 
 
+def get_all_permissions(type_id: str, principal_type: PrincipalType, principals: List[str]) -> \
+        Dict[Tuple[str, str], Permission]:
+    """Gets the permissions of many principals of the same type on all resources of a type, page by page. Returns the
+    permissions by object id and principal. Principals without a permission aren't included."""
+    permissions = dict()
+    for start in range(0, len(principals), paging.VALUES_PER_QUERY):
+        chunk = principals[start:start + paging.VALUES_PER_QUERY]
+        rsql = '{}=in=({})'.format(principal_type.value, ','.join(paging.quote(principal) for principal in chunk))
+        for obj in _get_objects(type_id, rsql):
+            for item in obj['permissions']:
+                permissions[(str(obj['id']), item[principal_type.value])] = Permission[item['permission']]
+    return permissions
+
+
 def is_row_level_secured(entity_type_id: str) -> bool:
     """Returns whether the entity type is row level secured or not."""
 
@@ -104,6 +178,47 @@ def _get_existing_permissions(type_id: str, object_id: str, principal_type: Prin
     return existing_permissions
 
 
+def _get_existing_row_permissions(type_id: str, principal_type: PrincipalType, principal_name: str) -> Dict[str, str]:
+    """Returns the permissions of a principal on all rows of an entity type, by row id."""
+    if principal_type == PrincipalType.ROLE:
+        principal_name = to_role_name(principal_name)
+    rsql = '{}=={}'.format(principal_type.value, paging.quote(principal_name))
+
+    permissions = dict()
+    for obj in _get_objects(type_id, rsql):
+        for item in obj['permissions']:
+            permissions[str(obj['id'])] = item['permission']
+    return permissions
+
+
+def _get_objects(type_id: str, rsql: str) -> Iterator[dict]:
+    """Lazily yields the objects (with their permissions) of a permission type that match the query, page by page."""
+    page = 1
+    while True:
+        url = urljoin(api.permissions(), '{}?q={}&page={}&pageSize={}'.format(quote(type_id, safe=''),
+                                                                             quote(rsql, safe=''),
+                                                                             page,
+                                                                             _PAGE_SIZE))
+        response = get(url).json()
+        yield from response['data']['objects']
+
+        if page >= response.get('page', dict()).get('totalPages', page):
+            return
+        page += 1
+
+
+def _delete_row_permissions(entity_type_id: str, entity_ids: List[str], principal_type: PrincipalType,
+                            principal_name: str) -> List[Tuple[str, str]]:
+    def delete_permission(entity_id):
+        try:
+            _delete_permission(entity_type_id, entity_id, principal_type, principal_name)
+        except McmdError as e:
+            return entity_id, e.message
+
+    results = map_parallel(delete_permission, entity_ids, max_workers=config.get('http', 'max_concurrency'))
+    return [result for result in results if result]
+
+
 def _delete_permission(entity_type_id: str, entity_id: str, principal_type: PrincipalType, principal_name: str):
     url = _get_entity_url(entity_type_id, entity_id)
     body = _get_principal_body(principal_type, principal_name)
@@ -3,6 +3,8 @@ Entry point for security related actions. Delegates to permission_manager.py or
 MOLGENIS version being used and the action being performed.
 """
 
+from typing import List, Dict, Optional, Tuple
+
 from mcmd.core.compatibility import version
 from mcmd.core.errors import McmdError
 from mcmd.molgenis.principals import PrincipalType
@@ -11,6 +13,11 @@ from mcmd.molgenis.security import permission_manager, permissions_api
 from mcmd.molgenis.security.permission import Permission
 from mcmd.molgenis.version import get_version
 
+# The type ids of the resources in the Permission API
+_PERMISSION_TYPES = {ResourceType.ENTITY_TYPE: 'entityType',
+                     ResourceType.PACKAGE: 'package',
+                     ResourceType.PLUGIN: 'plugin'}
+
 
 @version('7.0.0')
 def grant_permission(principal_type: PrincipalType,
@@ -23,6 +30,35 @@ def grant_permission(principal_type: PrincipalType,
     permission_manager.grant_permission(principal_type, principal_name, resource_type, entity_type_id, permission)
 
 
+@version('7.0.0')
+def grant_permissions(principal_type: PrincipalType,
+                      principal_name: str,
+                      resource_type: ResourceType,
+                      permissions: Dict[str, Permission]):
+    """Grants permissions on many (non-row) resources of the same type to one principal."""
+
+    permission_manager.grant_permissions(principal_type, principal_name, resource_type, permissions)
+
+
+# noinspection PyUnusedLocal
+@version('7.0.0')
+def get_all_permissions(resource_type: ResourceType,
+                        principal_type: PrincipalType,
+                        principals: List[str]) -> Optional[Dict[Tuple[str, str], Permission]]:
+    """The permissions on resources can't be read before MOLGENIS 8.1.1."""
+    return None
+
+
+@version('8.1.1')
+def get_all_permissions(resource_type: ResourceType,
+                        principal_type: PrincipalType,
+                        principals: List[str]) -> Optional[Dict[Tuple[str, str], Permission]]:
+    """Gets the permissions of many principals of the same type on all (non-row) resources of a type, by resource id
+    and principal."""
+
+    return permissions_api.get_all_permissions(_PERMISSION_TYPES[resource_type], principal_type, principals)
+
+
 # noinspection PyUnusedLocal
 @version('7.0.0')
 def grant_row_permission(principal_type: PrincipalType,
@@ -46,6 +82,30 @@ def grant_row_permission(principal_type: PrincipalType,
     permissions_api.grant_row_permission(principal_type, principal_name, entity_type_id, entity_id, permission)
 
 
+# noinspection PyUnusedLocal
+@version('7.0.0')
+def grant_row_permissions(principal_type: PrincipalType,
+                          principal_name: str,
+                          entity_type_id: str,
+                          entity_ids: List[str],
+                          permission: Permission) -> permissions_api.RowPermissionChanges:
+    raise McmdError(
+        "Giving row level security is only possible since MOLGENIS 8.1.1 (you are using {})".format(
+            get_version()))
+
+
+@version('8.1.1')
+def grant_row_permissions(principal_type: PrincipalType,
+                          principal_name: str,
+                          entity_type_id: str,
+                          entity_ids: List[str],
+                          permission: Permission) -> permissions_api.RowPermissionChanges:
+    """Grants permission on many rows to one principal."""
+
+    return permissions_api.grant_row_permissions(principal_type, principal_name, entity_type_id, entity_ids,
+                                                 permission)
+
+
 @version('7.0.0')
 def enable_row_level_security(entity_type_id: str):
     """Enables row level security on an entity type."""
@@ -1,47 +1,95 @@
-"""Contains the MOLGENIS version of the current host."""
+"""
+Contains the MOLGENIS version of the current host.
+
+The version is stored per host in the cache folder, so that commands don't have to ask the server for its version
+every time. A stored version is used for 'version_ttl' seconds (see the configuration file), after which it is
+requested again. Use refresh_version() to request it right away.
+"""
 import re
+import time
 from urllib.parse import urljoin
 
 import requests
 from requests import HTTPError
 
 from mcmd.config import config
+from mcmd.core import cache
 from mcmd.core.errors import McmdError, MolgenisOfflineError
+from mcmd.utils.http_session import get_session
+
+_CACHE_FILE = 'versions.json'
 
-_version_number = None
-_version = None
+# The versions (and version numbers) by host, so that switching hosts results in the version of the new host
+_versions = dict()
+_version_numbers = dict()
 
 
 def get_version():
     """
     Gets the MOLGENIS version lazily.
     """
-    global _version
-    if not _version:
-        _get_version()
-    return _version
+    host = config.get('host', 'selected')
+    if host not in _versions:
+        _load_version(host)
+    return _versions[host]
 
 
 def get_version_number():
     """
     Gets the MOLGENIS version lazily and only returns the version number: '8.0.0-SNAPSHOT' will become '8.0.0'
     """
-    global _version_number
-    if not _version_number:
-        _get_version()
-    return _version_number
+    host = config.get('host', 'selected')
+    try:
+        return _version_numbers[host]
+    except KeyError:
+        _load_version(host)
+        return _version_numbers[host]
+
+
+def refresh_version():
+    """
+    Gets the MOLGENIS version from the server, ignoring the stored version, and stores it.
+    """
+    host = config.get('host', 'selected')
+    _set_version(host, _fetch_version(host))
+    _store_version(host)
+    return _versions[host]
+
 
+def _load_version(host):
+    stored_version = _get_stored_version(host)
+    if stored_version:
+        _set_version(host, stored_version)
+    else:
+        _set_version(host, _fetch_version(host))
+        _store_version(host)
 
-def _get_version():
+
+def _set_version(host, version):
+    _version_numbers[host] = _extract_version_number(version)
+    _versions[host] = version
+
+
+def _get_stored_version(host):
+    stored = cache.read(_CACHE_FILE).get(host)
+    if not stored or time.time() - stored.get('timestamp', 0) >= config.get('cache', 'version_ttl'):
+        return None
+    return stored['version']
+
+
+def _store_version(host):
+    stored_versions = cache.read(_CACHE_FILE)
+    stored_versions[host] = {'version': _versions[host],
+                             'timestamp': time.time()}
+    cache.write(_CACHE_FILE, stored_versions)
+
+
+def _fetch_version(host):
     try:
-        response = requests.get(urljoin(config.get('host', 'selected'), 'api/v2/version'),
-                                headers={'Content-Type': 'application/json'})
+        response = get_session().get(urljoin(host, 'api/v2/version'),
+                                     headers={'Content-Type': 'application/json'})
         response.raise_for_status()
-
-        global _version
-        global _version_number
-        _version = response.json()['molgenisVersion']
-        _version_number = _extract_version_number(_version)
+        return response.json()['molgenisVersion']
     except HTTPError as e:
         raise McmdError(str(e))
     except requests.exceptions.ConnectionError:
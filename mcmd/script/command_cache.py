@@ -0,0 +1,93 @@
+"""
+Remembers the parsed arguments of the commands of a script, so that running the script again doesn't split and parse
+every command with the argument parser of the commander.
+
+The parsed commands of a script are stored in the cache folder, in a file per script. The file is identified by the
+SHA-256 hash of the script and the version of the commander, so a changed script (or commander) never uses the parsed
+commands of another version. Only commands that don't depend on values that are given at runtime (inputs and
+arguments) are remembered: their text can differ between runs, and passwords should never end up in the cache.
+"""
+
+import hashlib
+import importlib
+import json
+from argparse import Namespace
+from typing import List, Optional
+
+import pkg_resources
+
+from mcmd.core import cache
+
+_FILE_PREFIX = 'script_'
+
+# The number of scripts of which the parsed commands are kept
+_MAX_SCRIPTS = 50
+
+
+class CommandCache:
+    """The parsed commands of one script, by line number."""
+
+    def __init__(self, script_hash: str):
+        self._file_name = '{}{}.json'.format(_FILE_PREFIX, script_hash)
+        self._commands = cache.read(self._file_name)
+        self._changed = False
+
+    def get(self, line_number: int, cmd: str) -> Optional[Namespace]:
+        """Returns the parsed arguments of the command on a line, or None if they aren't known."""
+        entry = self._commands.get(str(line_number))
+        if entry is None or entry['command'] != cmd:
+            return None
+        try:
+            return _deserialize(entry['args'])
+        except (ImportError, AttributeError, ValueError):
+            return None
+
+    def put(self, line_number: int, cmd: str, args: Namespace):
+        try:
+            serialized = _serialize(args)
+        except (TypeError, ValueError):
+            # not all arguments can be stored
+            return
+        self._commands[str(line_number)] = {'command': cmd, 'args': serialized}
+        self._changed = True
+
+    def store(self):
+        if self._changed:
+            cache.write(self._file_name, self._commands)
+            cache.prune(_FILE_PREFIX + '*.json', _MAX_SCRIPTS)
+            self._changed = False
+
+
+def load(lines: List[str]) -> CommandCache:
+    """Returns the parsed commands of the script with these lines."""
+    return CommandCache(hash_script(lines))
+
+
+def clear():
+    """Forgets the parsed commands of all scripts."""
+    cache.remove(_FILE_PREFIX + '*.json')
+
+
+def hash_script(lines: List[str]) -> str:
+    """Returns the SHA-256 hash of a script and the version of the commander."""
+    sha256 = hashlib.sha256(pkg_resources.get_distribution('molgenis-commander').version.encode('utf-8'))
+    for line in lines:
+        sha256.update(line.encode('utf-8'))
+        sha256.update(b'\n')
+    return sha256.hexdigest()
+
+
+def _serialize(args: Namespace) -> dict:
+    values = dict(vars(args))
+    func = values.pop('func')
+    values['func'] = '{}:{}'.format(func.__module__, func.__qualname__)
+    # raises a TypeError if a value can't be stored
+    json.dumps(values)
+    return values
+
+
+def _deserialize(serialized: dict) -> Namespace:
+    values = dict(serialized)
+    module, name = values['func'].split(':')
+    values['func'] = getattr(importlib.import_module(module), name)
+    return Namespace(**values)
@@ -9,7 +9,7 @@ class Line:
     string: str
 
 
-@attr.s(frozen=True, auto_attribs=True)
+@attr.s(frozen=True, auto_attribs=True, cache_hash=True)
 class ParsedLine:
     """
     A parsed line contains the line number, original line string and the parsed Statement. A parsed line may have
@@ -3,6 +3,7 @@ from typing import List, Set, Dict
 import attr
 
 from mcmd.script.model.lines import ParsedLine
+from mcmd.script.model.statements import ForEach
 
 
 @attr.s(frozen=True, auto_attribs=True)
@@ -10,27 +11,37 @@ class Script:
     lines: List[ParsedLine]
     _dependencies: Dict[ParsedLine, Set[ParsedLine]]
 
+    @property
+    def dependencies(self) -> Dict[ParsedLine, Set[ParsedLine]]:
+        """The lines that each line depends on directly."""
+        return self._dependencies
+
     def get_lines_with_dependencies(self, from_line_number: int) -> List[ParsedLine]:
         """
         Gets all the lines in the script from a certain line_number and up. If the lines depend on lines before
-        line_number, then those lines will be included as well. This is done recursively, so all dependencies are
-        included.
+        line_number, then those lines will be included as well. This is done transitively, so all dependencies are
+        included. A block that contains line_number is included as a whole.
         """
         if from_line_number < 2:
             return list(self.lines)
-        else:
-            lines_subset = {line for line in self.lines if line.number >= from_line_number}
-
-            dependencies = set()
-            for line in lines_subset:
-                dependencies |= self._get_deep_dependencies(line)
-
-            total_lines = (lines_subset | dependencies)
-            return sorted(total_lines, key=lambda l: l.number)
-
-    def _get_deep_dependencies(self, line: ParsedLine) -> Set[ParsedLine]:
-        dependencies = set()
-        dependencies.add(line)
-        for dependency in self._dependencies.get(line, set()):
-            dependencies |= self._get_deep_dependencies(dependency)
-        return dependencies
+
+        lines_subset = [line for line in self.lines if _get_last_line_number(line) >= from_line_number]
+
+        # the dependencies of all lines are walked at once, so that each line is visited only once (and without
+        # recursion, because a script can contain long chains of values)
+        total_lines = set(lines_subset)
+        to_visit = list(lines_subset)
+        while to_visit:
+            line = to_visit.pop()
+            for dependency in self._dependencies.get(line, ()):
+                if dependency not in total_lines:
+                    total_lines.add(dependency)
+                    to_visit.append(dependency)
+
+        return sorted(total_lines, key=lambda l: l.number)
+
+
+def _get_last_line_number(line: ParsedLine) -> int:
+    if isinstance(line.statement, ForEach) and line.statement.body:
+        return line.statement.body[-1].number
+    return line.number
@@ -1,5 +1,5 @@
 from abc import abstractmethod
-from typing import Optional, Any
+from typing import Optional, Any, Tuple
 
 import attr
 
@@ -152,3 +152,38 @@ class Empty(Statement):
     An empty line.
     """
     pass
+
+
+@attr.s(frozen=True, auto_attribs=True)
+class ForEach(Statement, Templatable):
+    """
+    A block of commands and comments that is run for every row of a CSV or TSV file. The row is available in the
+    templates of the block by the name of the block.
+
+    $foreach user in "users.csv"
+        add user {{user.name}}
+    $/foreach
+    """
+
+    name: str
+    path: Template
+    # the lines of the block (set when the whole script is parsed)
+    body: Tuple['ParsedLine', ...] = ()
+
+    @property
+    def variables(self) -> frozenset:
+        variables = set(self.path.variables)
+        for line in self.body:
+            if isinstance(line.statement, Templatable):
+                variables |= line.statement.variables - {self.name}
+        return frozenset(variables)
+
+
+@attr.s(frozen=True)
+class EndForEach(Statement):
+    """
+    The end of a $foreach block.
+
+    $/foreach
+    """
+    pass
@@ -1,4 +1,4 @@
-from typing import FrozenSet
+from typing import FrozenSet, Optional
 
 import attr
 import jinja2
@@ -6,25 +6,41 @@ from jinja2 import Environment, meta
 
 _env = Environment(autoescape=False)
 
+# the start of every Jinja2 construct: variables, statements and comments
+_SYNTAX_MARKERS = ('{{', '{%', '{#')
+
 
 @attr.s(frozen=True, auto_attribs=True)
 class Template:
     """
     A container for a Jinja2 template. Exposes the variables found in the template through the variables property.
+
+    Text without Jinja2 syntax is never handed to Jinja2, and a template is only compiled when it's rendered for the
+    first time: most lines of a (generated) script are plain text, and compiling is the slowest part of parsing a
+    script. The variables can be passed when they're already known (for example when a parsed script is read from the
+    cache).
     """
 
     string: str
-    _template: jinja2.Template = attr.ib(init=False, eq=False)
-    variables: FrozenSet[str] = attr.ib(init=False)
-
-    @_template.default
-    def __set_template(self):  # NOSONAR method is not unused
-        return _env.from_string(self.string)
+    variables: FrozenSet[str] = attr.ib(converter=frozenset)
+    _template: Optional[jinja2.Template] = attr.ib(init=False, default=None, eq=False, repr=False)
 
     @variables.default
     def __set_variables(self) -> frozenset:  # NOSONAR method is not unused
-        parsed_content = _env.parse(self.string)
-        return frozenset(meta.find_undeclared_variables(parsed_content))
+        if not self.is_plain_text():
+            # also raises a TemplateSyntaxError when the template is invalid
+            parsed_content = _env.parse(self.string)
+            return frozenset(meta.find_undeclared_variables(parsed_content))
+        else:
+            return frozenset()
+
+    def is_plain_text(self) -> bool:
+        return not any(marker in self.string for marker in _SYNTAX_MARKERS)
 
     def render(self, values: dict) -> str:
+        if self.is_plain_text():
+            return self.string
+
+        if self._template is None:
+            object.__setattr__(self, '_template', _env.from_string(self.string))
         return self._template.render(values)
@@ -8,3 +8,5 @@ class ScriptOptions:
     start_at: int = 1
     log_comments: bool = True
     exit_on_error: bool = True
+    # the maximum number of commands that run at the same time
+    parallel: int = 1
@@ -1,5 +1,5 @@
 from mcmd.script.model.lines import ParsedLine
-from mcmd.script.model.statements import Templatable, Assignment
+from mcmd.script.model.statements import Templatable, Assignment, ForEach
 from mcmd.script.parser._parse_state import _ParseState
 from mcmd.script.parser.errors import ReassignmentError, ForwardReferenceError, UnknownReferenceError, \
     RecursiveReferenceError
@@ -22,11 +22,28 @@ def resolve(state: _ParseState):
 
     for line in state.lines:
         statement = line.statement
-        if isinstance(statement, Templatable):
+        if isinstance(statement, ForEach):
+            _set_block_dependencies(declarations_by_name, line, statement, state)
+        elif isinstance(statement, Templatable):
             _set_dependencies(declarations_by_name, line, statement.variables, state)
 
 
-def _set_dependencies(declarations_by_name: dict, line: ParsedLine, variables: frozenset, state: _ParseState):
+def _set_block_dependencies(declarations_by_name: dict, line: ParsedLine, block: ForEach, state: _ParseState):
+    """The lines of a block are checked one by one (so errors point to the right line), but the block as a whole
+    depends on the values that its lines use. The row of the block isn't a value."""
+    _set_dependencies(declarations_by_name, line, block.path.variables, state)
+    for block_line in block.body:
+        if isinstance(block_line.statement, Templatable):
+            variables = block_line.statement.variables - {block.name}
+            _set_dependencies(declarations_by_name, block_line, variables, state, dependent=line)
+
+
+def _set_dependencies(declarations_by_name: dict, line: ParsedLine, variables: frozenset, state: _ParseState,
+                      dependent: ParsedLine = None):
+    """
+    :param dependent: the line that gets the dependencies, if that's not the line itself (the block of a line)
+    """
+    dependent = dependent or line
     for var in variables:
         if var not in declarations_by_name:
             state.errors.append(UnknownReferenceError(line, var))
@@ -38,7 +55,7 @@ def _set_dependencies(declarations_by_name: dict, line: ParsedLine, variables: f
             elif dependency.number >= line.number:
                 state.errors.append(ForwardReferenceError(var, line, dependency))
             else:
-                if line not in state.dependencies:
-                    state.dependencies[line] = {declarations_by_name[var]}
+                if dependent not in state.dependencies:
+                    state.dependencies[dependent] = {declarations_by_name[var]}
                 else:
-                    state.dependencies[line].add(declarations_by_name[var])
+                    state.dependencies[dependent].add(declarations_by_name[var])
@@ -128,3 +128,22 @@ class RecursiveReferenceError(ScriptValidationError):
         msg.append('Line {}: {}'.format(self._source.number, self._source.raw))
         msg.append("  - Value '{}' referenced during assignment".format(self._reference))
         return '\n'.join(msg)
+
+
+class BlockError(ScriptValidationError):
+    """
+    Raised when a block (like $foreach) isn't closed, is closed without being opened, or contains a statement that isn't
+    allowed in a block.
+    """
+
+    def __init__(self, source: ParsedLine, problem: str):
+        super().__init__(line_number=source.number)
+        self._source = source
+        self._problem = problem
+
+    @property
+    def message(self):
+        msg = list()
+        msg.append('Line {}: {}'.format(self._source.number, self._source.raw))
+        msg.append('  - {}'.format(self._problem))
+        return '\n'.join(msg)
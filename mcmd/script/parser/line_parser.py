@@ -6,7 +6,7 @@ from parsy import regex, string, seq, whitespace, from_enum, generate, ParseErro
 
 from mcmd.script.model.lines import Line
 from mcmd.script.model.statements import Statement, Value, Input, Wait, VisibleComment, Command, \
-    InvisibleComment, Empty
+    InvisibleComment, Empty, ForEach, EndForEach
 from mcmd.script.model.templates import Template
 from mcmd.script.model.types_ import InputType
 from mcmd.script.parser.errors import ScriptSyntaxError
@@ -53,6 +53,24 @@ def _input_declaration():
                  message=message)
 
 
+# $foreach name in "file"
+@generate
+def _foreach_declaration():
+    yield string('foreach')
+    yield whitespace
+    name = yield _value_name
+    yield whitespace
+    yield string('in')
+    yield whitespace
+    path = yield _text.desc('quoted path')
+
+    return ForEach(name=name, path=path)
+
+
+# $/foreach
+_end_foreach_declaration = (string('/foreach') >> _padding).result(EndForEach())
+
+
 @generate
 def _command():
     command_str = yield regex(r'^[^#/\$].*')
@@ -78,7 +96,8 @@ _wait_declaration = seq(__keyword=string("wait"),
                         message=_wait_message).combine_dict(Wait)
 
 # define declaration parser
-_declaration = string('$') >> (_value_declaration | _input_declaration | _wait_declaration)
+_declaration = string('$') >> (_value_declaration | _input_declaration | _wait_declaration |
+                               _foreach_declaration | _end_foreach_declaration)
 
 # define comment parser
 _comment = _visible_comment | _invisible_comment
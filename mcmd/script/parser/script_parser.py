@@ -1,10 +1,13 @@
 from typing import List
 
+import attr
+
 from mcmd.script.model.lines import ParsedLine
 from mcmd.script.model.script import Script
+from mcmd.script.model.statements import ForEach, EndForEach, Command, VisibleComment, InvisibleComment, Empty
 from mcmd.script.parser import dependency_resolver, line_parser, line_combiner
 from mcmd.script.parser._parse_state import _ParseState
-from mcmd.script.parser.errors import ScriptSyntaxError, InvalidScriptError
+from mcmd.script.parser.errors import ScriptSyntaxError, InvalidScriptError, BlockError
 
 
 def parse(str_lines: List[str]) -> Script:
@@ -23,7 +26,10 @@ def parse(str_lines: List[str]) -> Script:
     # third pass: interpret the lines
     _parse_lines(state)
 
-    # fourth pass: resolve dependencies
+    # fourth pass: move the lines of blocks into their block
+    _group_blocks(state)
+
+    # fifth pass: resolve dependencies
     dependency_resolver.resolve(state)
 
     if len(state.errors) > 0:
@@ -40,3 +46,31 @@ def _parse_lines(state: _ParseState):
             state.errors.append(e)
         else:
             state.lines.append(ParsedLine(raw=line.string, number=line.number, statement=statement))
+
+
+def _group_blocks(state: _ParseState):
+    lines = list()
+    block = None
+    body = list()
+    for line in state.lines:
+        statement = line.statement
+        if isinstance(statement, EndForEach):
+            if block is None:
+                state.errors.append(BlockError(line, '$/foreach without $foreach'))
+            else:
+                lines.append(attr.evolve(block, statement=attr.evolve(block.statement, body=tuple(body))))
+                block = None
+        elif block is not None:
+            if isinstance(statement, (Command, VisibleComment, InvisibleComment, Empty)):
+                body.append(line)
+            else:
+                state.errors.append(BlockError(line, 'Only commands and comments are allowed in a $foreach block'))
+        elif isinstance(statement, ForEach):
+            block = line
+            body = list()
+        else:
+            lines.append(line)
+
+    if block is not None:
+        state.errors.append(BlockError(block, '$foreach without $/foreach'))
+    state.lines = lines
@@ -0,0 +1,117 @@
+"""
+Remembers parsed scripts, so that running a script again doesn't parse every line of it again.
+
+A parsed script is stored in the cache folder, in a file per script. Like the parsed commands of a script (see
+command_cache.py) the file is identified by the hash of the script and the version of the commander. The file contains
+the statements of the lines (with the variables of their templates) and the dependencies between the lines. The
+templates themselves are compiled when they're rendered for the first time.
+"""
+
+from enum import Enum
+from typing import List, Optional
+
+import attr
+
+from mcmd.core import cache
+from mcmd.script import command_cache
+from mcmd.script.model.lines import ParsedLine
+from mcmd.script.model.script import Script
+from mcmd.script.model.statements import Value, Input, Wait, VisibleComment, Command, InvisibleComment, Empty, \
+    Statement, ForEach
+from mcmd.script.model.templates import Template
+
+_FILE_PREFIX = 'parsed_'
+
+# The number of parsed scripts that are kept
+_MAX_SCRIPTS = 50
+
+_STATEMENTS = {type_.__name__: type_ for type_ in [Value, Input, Wait, VisibleComment, Command, InvisibleComment,
+                                                   Empty, ForEach]}
+
+
+def load(lines: List[str]) -> Optional[Script]:
+    """Returns the parsed script with these lines, or None if it isn't in the cache."""
+    stored = cache.read(_get_file_name(lines))
+    if not stored:
+        return None
+
+    try:
+        return _deserialize(stored)
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+def store(lines: List[str], script: Script):
+    cache.write(_get_file_name(lines), _serialize(script))
+    cache.prune(_FILE_PREFIX + '*.json', _MAX_SCRIPTS)
+
+
+def clear():
+    """Forgets all parsed scripts."""
+    cache.remove(_FILE_PREFIX + '*.json')
+
+
+def _get_file_name(lines: List[str]) -> str:
+    return '{}{}.json'.format(_FILE_PREFIX, command_cache.hash_script(lines))
+
+
+def _serialize(script: Script) -> dict:
+    # the lines are stored as lists instead of objects to keep the file small: scripts can be very large
+    return {
+        'lines': [_serialize_line(line) for line in script.lines],
+        'dependencies': {str(line.number): sorted(dependency.number for dependency in dependencies)
+                         for line, dependencies in script.dependencies.items()}
+    }
+
+
+def _serialize_line(line: ParsedLine) -> list:
+    return [line.number, line.raw, _serialize_statement(line.statement)]
+
+
+def _serialize_statement(statement: Statement) -> list:
+    """Serializes a statement as its type followed by its fields, in the order of attr.fields()."""
+    fields = [_serialize_field(getattr(statement, field.name)) for field in attr.fields(type(statement))]
+    return [type(statement).__name__] + fields
+
+
+def _serialize_field(value):
+    if isinstance(value, Template):
+        return [value.string, sorted(value.variables)]
+    elif isinstance(value, Enum):
+        return value.value
+    elif isinstance(value, tuple):
+        # the lines of a block
+        return {'lines': [_serialize_line(line) for line in value]}
+    else:
+        return value
+
+
+def _deserialize(stored: dict) -> Script:
+    lines = [_deserialize_line(line) for line in stored['lines']]
+
+    lines_by_number = {line.number: line for line in lines}
+    dependencies = {lines_by_number[int(number)]: {lines_by_number[dependency] for dependency in line_dependencies}
+                    for number, line_dependencies in stored['dependencies'].items()}
+    return Script(lines=lines, dependencies=dependencies)
+
+
+def _deserialize_line(stored: list) -> ParsedLine:
+    number, raw, statement = stored
+    return ParsedLine(raw=raw, number=number, statement=_deserialize_statement(statement))
+
+
+def _deserialize_statement(stored: list) -> Statement:
+    type_ = _STATEMENTS[stored[0]]
+    fields = [_deserialize_field(field, value) for field, value in zip(attr.fields(type_), stored[1:])]
+    return type_(*fields)
+
+
+def _deserialize_field(field: attr.Attribute, value):
+    if isinstance(value, list):
+        return Template(value[0], variables=value[1])
+    elif value is not None and isinstance(field.type, type) and issubclass(field.type, Enum):
+        return field.type(value)
+    elif isinstance(value, dict):
+        return tuple(_deserialize_line(line) for line in value['lines'])
+    else:
+        return value
@@ -1,6 +1,10 @@
 import shlex
 import sys
-from typing import List
+from argparse import Namespace
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, Future, wait, FIRST_COMPLETED
+from pathlib import Path
+from typing import List, Optional, Deque, Tuple, Set, Iterator
 
 import attr
 
@@ -10,12 +14,14 @@ from mcmd.core.errors import McmdError, ScriptError
 from mcmd.io import io, ask
 from mcmd.io.io import bold, dim
 from mcmd.io.logging import get_logger
+from mcmd.script.command_cache import CommandCache
 from mcmd.script.model.lines import ParsedLine
 from mcmd.script.model.script import Script
 from mcmd.script.model.statements import Value, Input, Wait, VisibleComment, Command, InvisibleComment, \
-    Empty
+    Empty, ForEach
 from mcmd.script.model.types_ import InputType, ValueType
 from mcmd.script.options import ScriptOptions
+from mcmd.utils.file_helpers import read_rows
 
 log = get_logger()
 
@@ -25,18 +31,61 @@ class _ScriptExecutionState:
     script: Script
     options: ScriptOptions
     values: dict = attr.Factory(dict)
+    command_cache: Optional[CommandCache] = None
+    # the names of the values that are given at runtime, or depend on those
+    runtime_values: Set[str] = attr.Factory(set)
 
 
-def run(script: Script, options: ScriptOptions):
+@attr.s(frozen=True, auto_attribs=True)
+class _LineResult:
+    # the captured output of the line (see io.capture())
+    output: list
+    error: Optional[Exception] = None
+
+
+@attr.s(frozen=True, auto_attribs=True)
+class _RowStep:
+    """A line of a $foreach block, rendered for one row."""
+    line: ParsedLine
+    # the rendered command or comment
+    text: str
+    # the parsed arguments of a command (None for a comment)
+    args: Optional[Namespace] = None
+
+
+def run(script: Script, options: ScriptOptions, command_cache: CommandCache = None):
     """
     Runs a Script by executing it line by line. Keeps track of the script's state in a _ScriptExecutionState.
+
+    :param command_cache: the parsed commands of earlier runs of the script (see command_cache.py)
     """
-    state = _ScriptExecutionState(script=script, options=options, values=options.arguments)
+    state = _ScriptExecutionState(script=script,
+                                  options=options,
+                                  values=dict(options.arguments),
+                                  command_cache=command_cache,
+                                  runtime_values=_get_runtime_values(script.lines, options.arguments))
 
     lines = script.get_lines_with_dependencies(from_line_number=options.start_at)
     _validate_required_args(lines, options.arguments)
 
-    _process_lines(lines, state)
+    try:
+        _process_lines(lines, state)
+    finally:
+        if command_cache:
+            command_cache.store()
+
+
+def _get_runtime_values(lines: List[ParsedLine], args: dict) -> Set[str]:
+    """Returns the names of the values that can differ between runs: the arguments, the inputs and the values that
+    use those."""
+    names = set(args.keys())
+    for line in lines:
+        statement = line.statement
+        if isinstance(statement, Input) or (isinstance(statement, Value) and statement.value is None):
+            names.add(statement.name)
+        elif isinstance(statement, Value) and statement.variables & names:
+            names.add(statement.name)
+    return names
 
 
 def _validate_required_args(lines: List[ParsedLine], args: dict):
@@ -51,11 +100,125 @@ def _validate_required_args(lines: List[ParsedLine], args: dict):
 
 
 def _process_lines(lines: List[ParsedLine], state: _ScriptExecutionState):
+    if state.options.parallel > 1 and not state.options.dry_run:
+        _process_lines_in_parallel(lines, state)
+    else:
+        _process_lines_in_order(lines, state)
+
+
+def _process_lines_in_order(lines: List[ParsedLine], state: _ScriptExecutionState):
     for line in lines:
         try:
             _process_line(line, state)
+        except (McmdError, ArgumentSyntaxError) as error:
+            _handle_error(error, line_number=_get_line_number(error, line), state=state)
+
+
+def _process_lines_in_parallel(lines: List[ParsedLine], state: _ScriptExecutionState):
+    """
+    Runs the commands of the script in a pool of threads. Values can't be changed by commands, so the other statements
+    are processed by the main thread in the order of the script. $input and $wait statements, $foreach blocks and
+    '// sync' comments are barriers: the commands before them are finished first. Commands that run as another user
+    (because the authentication is shared by all commands) and commands that ask for confirmation (like a delete
+    without --force) are barriers as well: they run in the main thread.
+
+    The output of every command is captured and shown when the command is done, in the order of the script.
+    """
+    pending = deque()
+    with ThreadPoolExecutor(max_workers=state.options.parallel) as executor:
+        for line in lines:
+            statement = line.statement
+            if isinstance(statement, Command):
+                _start_command(line, pending, executor, state)
+            elif isinstance(statement, VisibleComment):
+                pending.append((line, _done(_LineResult(output=[lambda s=statement: _log_comment(s, state)]))))
+            else:
+                if _is_barrier(statement):
+                    _show_results(pending, state, wait_for_all=True)
+                try:
+                    _process_line(line, state)
+                except (McmdError, ArgumentSyntaxError) as error:
+                    _show_results(pending, state, wait_for_all=True)
+                    _handle_error(error, line_number=_get_line_number(error, line), state=state)
+            _show_results(pending, state)
+        _show_results(pending, state, wait_for_all=True)
+
+
+def _start_command(line: ParsedLine, pending: Deque[Tuple[ParsedLine, Future]], executor: ThreadPoolExecutor,
+                   state: _ScriptExecutionState):
+    # commands are parsed in the main thread, because the values can't be read while the main thread changes them
+    try:
+        cmd, sub_args = _parse_command(line, state)
+    except (McmdError, ArgumentSyntaxError) as error:
+        pending.append((line, _done(_LineResult(output=[], error=error))))
+        return
+
+    if _needs_main_thread(sub_args):
+        _show_results(pending, state, wait_for_all=True)
+        try:
+            _execute_command(cmd, sub_args, state)
         except (McmdError, ArgumentSyntaxError) as error:
             _handle_error(error, line_number=line.number, state=state)
+        return
+
+    # don't queue more commands than can run, so that the script can stop soon after an error
+    running = [future for _, future in pending if not future.done()]
+    if len(running) >= state.options.parallel:
+        wait(running, return_when=FIRST_COMPLETED)
+        _show_results(pending, state)
+    pending.append((line, executor.submit(_execute_captured, cmd, sub_args, state)))
+
+
+def _execute_captured(cmd: str, sub_args, state: _ScriptExecutionState) -> _LineResult:
+    with io.capture() as output:
+        try:
+            _execute_command(cmd, sub_args, state)
+            return _LineResult(output=output)
+        except (McmdError, ArgumentSyntaxError) as error:
+            io.error(None)
+            return _LineResult(output=output, error=error)
+
+
+def _show_results(pending: Deque[Tuple[ParsedLine, Future]], state: _ScriptExecutionState, wait_for_all=False):
+    """Shows the output of the finished lines at the front of the queue (or of all lines if wait_for_all)."""
+    while pending and (wait_for_all or pending[0][1].done()):
+        line, future = pending.popleft()
+        result = future.result()
+        io.replay(result.output)
+        if result.error:
+            try:
+                _handle_error(result.error, line_number=_get_line_number(result.error, line), state=state)
+            except ScriptError:
+                # the script stops: show what the commands that were still running did
+                for other_line, other_future in pending:
+                    other_result = other_future.result()
+                    io.replay(other_result.output)
+                    if other_result.error:
+                        _print_error(other_result.error, _get_line_number(other_result.error, other_line))
+                pending.clear()
+                raise
+
+
+def _get_line_number(error: Exception, line: ParsedLine) -> int:
+    """The errors of the rows of a $foreach block know which line of the block failed (see _to_row_error())."""
+    return error.line if isinstance(error, ScriptError) else line.number
+
+
+def _is_barrier(statement) -> bool:
+    return isinstance(statement, (Input, Wait, ForEach)) or \
+        (isinstance(statement, InvisibleComment) and statement.comment.strip().lower() == 'sync')
+
+
+def _needs_main_thread(args: Namespace) -> bool:
+    """Commands that run as another user change the shared authentication, and commands that can ask for confirmation
+    need the console."""
+    return bool(args.as_user) or not getattr(args, 'force', True)
+
+
+def _done(result: _LineResult) -> Future:
+    future = Future()
+    future.set_result(result)
+    return future
 
 
 def _process_line(line: ParsedLine, state: _ScriptExecutionState):
@@ -74,7 +237,9 @@ def _process_line(line: ParsedLine, state: _ScriptExecutionState):
     elif isinstance(statement, Empty):
         pass
     elif isinstance(statement, Command):
-        _run_command(statement, state)
+        _run_command(line, state)
+    elif isinstance(statement, ForEach):
+        _run_foreach(line, state)
 
 
 def _log_comment(comment: VisibleComment, state: _ScriptExecutionState):
@@ -126,21 +291,51 @@ def _handle_error(error: McmdError, line_number: int, state: _ScriptExecutionSta
     if state.options.exit_on_error and not state.options.dry_run:
         raise ScriptError.from_error(error, line_number)
     else:
-        sys.stderr.write('Error on line {}: '.format(str(line_number)))
-        io.error(error.message)
-        if error.info:
-            io.info(error.info)
+        _print_error(error, line_number)
+
+
+def _print_error(error: McmdError, line_number: int):
+    sys.stderr.write('Error on line {}: '.format(str(line_number)))
+    io.error(error.message)
+    if error.info:
+        io.info(error.info)
+
 
+def _run_command(line: ParsedLine, state: _ScriptExecutionState):
+    cmd, sub_args = _parse_command(line, state)
+    _execute_command(cmd, sub_args, state)
 
-def _run_command(command: Command, state: _ScriptExecutionState):
+
+def _parse_command(line: ParsedLine, state: _ScriptExecutionState):
+    command = line.statement
     cmd = command.command.render(state.values)
+
+    cacheable = state.command_cache is not None and not command.variables & state.runtime_values
+    sub_args = state.command_cache.get(line.number, cmd) if cacheable else None
+    if sub_args is None:
+        sub_args = _parse_args(cmd)
+        if cacheable:
+            state.command_cache.put(line.number, cmd, sub_args)
+    return cmd, sub_args
+
+
+def _parse_args(cmd: str) -> Namespace:
+    try:
+        # the values of a command (like the values of a $foreach row) can contain quotes that don't match
+        argv = shlex.split(cmd)
+    except ValueError as e:
+        raise McmdError(message='Invalid command: {}'.format(e), info=cmd)
+
     try:
-        sub_args = arg_parser.parse_args(shlex.split(cmd))
+        sub_args = arg_parser.parse_args(argv)
     except ArgumentSyntaxError as e:
         raise McmdError(message=str(e))
 
     _block_nested_scripts(sub_args.command)
+    return sub_args
 
+
+def _execute_command(cmd: str, sub_args, state: _ScriptExecutionState):
     if state.options.dry_run:
         log.info(cmd)
     else:
@@ -155,3 +350,126 @@ def _block_nested_scripts(command: str):
                                                                  'feature request at '
                                                                  'https://github.com/molgenis/molgenis-tools'
                                                                  '-commander/issues!')
+
+
+def _run_foreach(line: ParsedLine, state: _ScriptExecutionState):
+    """
+    Runs the lines of a $foreach block for every row of a CSV or TSV file. The rows are read one at a time, so the file
+    doesn't have to fit in memory. With --parallel the rows are processed in a pool of threads: the lines of a row run
+    in order and the output of the rows is shown in the order of the file. An error fails its row only: the script stops
+    (after the rows that are already running) unless errors are ignored.
+    """
+    block = line.statement
+    path = Path(block.path.render(state.values)).expanduser()
+    rows = read_rows(path)
+
+    if state.options.parallel > 1 and not state.options.dry_run:
+        _run_rows_in_parallel(line, path, rows, state)
+    else:
+        for row_line_number, row in rows:
+            row_name = _get_row_name(path, row_line_number)
+            try:
+                _execute_row(_parse_row(block, row, row_name, state), row_name, state)
+            except ScriptError as error:
+                _handle_error(error, line_number=error.line, state=state)
+
+
+def _run_rows_in_parallel(line: ParsedLine, path: Path, rows: Iterator[Tuple[int, dict]],
+                          state: _ScriptExecutionState):
+    pending = deque()
+    with ThreadPoolExecutor(max_workers=state.options.parallel) as executor:
+        try:
+            for row_line_number, row in rows:
+                row_name = _get_row_name(path, row_line_number)
+                _start_row(line, row, row_name, pending, executor, state)
+                _show_results(pending, state)
+        except McmdError:
+            _show_results(pending, state, wait_for_all=True)
+            raise
+        _show_results(pending, state, wait_for_all=True)
+
+
+def _start_row(line: ParsedLine, row: dict, row_name: str, pending: Deque[Tuple[ParsedLine, Future]],
+               executor: ThreadPoolExecutor, state: _ScriptExecutionState):
+    # like commands, rows are parsed in the main thread
+    try:
+        steps = _parse_row(line.statement, row, row_name, state)
+    except ScriptError as error:
+        pending.append((line, _done(_LineResult(output=[], error=error))))
+        return
+
+    if any(step.args and _needs_main_thread(step.args) for step in steps):
+        _show_results(pending, state, wait_for_all=True)
+        try:
+            _execute_row(steps, row_name, state)
+        except ScriptError as error:
+            _handle_error(error, line_number=error.line, state=state)
+        return
+
+    # don't read more rows than can be processed
+    running = [future for _, future in pending if not future.done()]
+    if len(running) >= state.options.parallel:
+        wait(running, return_when=FIRST_COMPLETED)
+        _show_results(pending, state)
+    pending.append((line, executor.submit(_execute_row_captured, steps, row_name, state)))
+
+
+def _get_row_name(path: Path, row_line_number: int) -> str:
+    return 'row on line {} of {}'.format(row_line_number, path.name)
+
+
+def _parse_row(block: ForEach, row: dict, row_name: str, state: _ScriptExecutionState) -> List[_RowStep]:
+    values = dict(state.values)
+    values[block.name] = row
+
+    steps = list()
+    for line in block.body:
+        statement = line.statement
+        try:
+            if isinstance(statement, Command):
+                cmd = statement.command.render(values)
+                steps.append(_RowStep(line=line, text=cmd, args=_parse_args(cmd)))
+            elif isinstance(statement, VisibleComment):
+                steps.append(_RowStep(line=line, text=statement.text.render(values)))
+        except McmdError as error:
+            raise _to_row_error(error, line, row_name)
+    return steps
+
+
+def _execute_row(steps: List[_RowStep], row_name: str, state: _ScriptExecutionState, output: list = None):
+    """
+    :param output: the captured output of the row (see io.capture()), to which comments are added
+    """
+    for step in steps:
+        if step.args is None:
+            if output is None:
+                _log_row_comment(step.text, state)
+            else:
+                output.append(lambda text=step.text: _log_row_comment(text, state))
+        else:
+            try:
+                _execute_command(step.text, step.args, state)
+            except McmdError as error:
+                raise _to_row_error(error, step.line, row_name)
+
+
+def _log_row_comment(text: str, state: _ScriptExecutionState):
+    if state.options.log_comments:
+        if len(text) == 0:
+            io.newline()
+        else:
+            log.info(text)
+
+
+def _execute_row_captured(steps: List[_RowStep], row_name: str, state: _ScriptExecutionState) -> _LineResult:
+    with io.capture() as output:
+        try:
+            _execute_row(steps, row_name, state, output)
+            return _LineResult(output=output)
+        except ScriptError as error:
+            io.error(None)
+            return _LineResult(output=output, error=error)
+
+
+def _to_row_error(error: McmdError, line: ParsedLine, row_name: str) -> ScriptError:
+    return ScriptError('{} ({})'.format(error.message, row_name), line.number, error.info)
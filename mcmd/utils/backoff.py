@@ -0,0 +1,48 @@
+"""
+Polls for the result of a long running task, like an import. The first polls follow each other quickly so that short
+tasks are picked up right away. After that the time between polls doubles with each poll, up to a ceiling. Every wait is
+shortened by a random amount (jitter), so that parallel pollers don't all hit the server at the same moment.
+"""
+
+import random
+import time
+from typing import Callable, TypeVar
+
+from mcmd.core.errors import McmdError
+
+T = TypeVar('T')
+
+
+def poll(func: Callable[[], T],
+         is_done: Callable[[T], bool],
+         initial_interval: float,
+         max_interval: float,
+         timeout: float = 0,
+         on_poll: Callable[[T], None] = None) -> T:
+    """
+    Calls func until is_done returns True for its result, and returns that result.
+
+    :param func: the function that fetches the current state of the task
+    :param is_done: tells whether a result of func means that the task is done
+    :param initial_interval: the number of seconds to wait after the first poll
+    :param max_interval: the maximum number of seconds to wait between polls
+    :param timeout: the maximum number of seconds to keep polling, or 0 to poll forever
+    :param on_poll: is called with every result that doesn't end the polling, for example to show progress
+    """
+    deadline = time.monotonic() + timeout if timeout else None
+    interval = initial_interval
+    while True:
+        result = func()
+        if is_done(result):
+            return result
+        if on_poll:
+            on_poll(result)
+
+        wait = random.uniform(interval / 2, interval)
+        if deadline:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise McmdError('Gave up waiting after {} seconds'.format(timeout))
+            wait = min(wait, remaining)
+        time.sleep(wait)
+        interval = min(interval * 2, max_interval)
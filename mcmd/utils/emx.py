@@ -0,0 +1,158 @@
+"""
+Reads which entity types and packages an EMX file defines and which ones it references, so that multiple files can be
+imported in an order that respects their dependencies.
+
+Only the names of the sheets and the 'packages', 'entities' and 'attributes' sheets are read. Supported are Excel files
+(.xlsx), zip files with .csv or .tsv sheets and single .csv or .tsv data files (which reference the entity type they're
+named after). Files that can't be read are assumed to have no dependencies: the import will report any problems.
+"""
+
+import csv
+import io
+import re
+import zipfile
+from pathlib import Path, PurePosixPath
+from typing import FrozenSet, Dict, List
+from xml.etree import ElementTree
+
+import attr
+
+_NS = {'main': 'http://schemas.openxmlformats.org/spreadsheetml/2006/main',
+       'rel': 'http://schemas.openxmlformats.org/package/2006/relationships'}
+_R_ID = '{http://schemas.openxmlformats.org/officeDocument/2006/relationships}id'
+
+_METADATA_SHEETS = {'packages', 'entities', 'attributes'}
+_OTHER_SHEETS = {'tags', 'i18nstrings', 'languages'}
+
+
+@attr.s(frozen=True, auto_attribs=True)
+class EmxDependencies:
+    # the (fully qualified and short) names of the entity types and packages that the file defines
+    defines: FrozenSet[str] = frozenset()
+    # the names of the entity types and packages that the file references, excluding the ones it defines itself
+    references: FrozenSet[str] = frozenset()
+
+    def depends_on(self, other: 'EmxDependencies') -> bool:
+        return not self.references.isdisjoint(other.defines)
+
+
+def read_dependencies(path: Path) -> EmxDependencies:
+    try:
+        sheet_names, sheets = _read_sheets(path)
+    except (OSError, KeyError, ValueError, TypeError, zipfile.BadZipFile, ElementTree.ParseError, csv.Error):
+        return EmxDependencies()
+
+    defines = set()
+    references = set()
+    for package in sheets.get('packages', []):
+        # package names are fully qualified already
+        defines.add(package.get('name'))
+        references.add(package.get('parent'))
+    for entity in sheets.get('entities', []):
+        _add_qualified(defines, entity.get('name'), entity.get('package'))
+        references.update([entity.get('package'), entity.get('extends')])
+    for attribute in sheets.get('attributes', []):
+        references.update([attribute.get('entity'), attribute.get('refEntity')])
+    references.update(name for name in sheet_names if name.lower() not in _METADATA_SHEETS | _OTHER_SHEETS)
+
+    defines.discard(None)
+    return EmxDependencies(defines=frozenset(defines),
+                           references=frozenset(name for name in references if name and name not in defines))
+
+
+def _add_qualified(names, name, package):
+    if name:
+        names.add(name)
+        if package:
+            names.add('{}_{}'.format(package, name))
+
+
+def _read_sheets(path: Path):
+    """Returns the names of all sheets and the rows of the metadata sheets."""
+    suffix = path.suffix.lower()
+    if suffix == '.xlsx':
+        return _read_xlsx(path)
+    elif suffix == '.zip':
+        return _read_zip(path)
+    elif suffix in ('.csv', '.tsv'):
+        return [path.stem], dict()
+    else:
+        return [], dict()
+
+
+def _read_zip(path):
+    sheet_names = list()
+    sheets = dict()
+    with zipfile.ZipFile(str(path)) as archive:
+        for member in archive.namelist():
+            member_path = PurePosixPath(member)
+            if member_path.suffix.lower() not in ('.csv', '.tsv'):
+                continue
+
+            sheet_names.append(member_path.stem)
+            if member_path.stem.lower() in _METADATA_SHEETS:
+                delimiter = '\t' if member_path.suffix.lower() == '.tsv' else ','
+                with archive.open(member) as sheet:
+                    text = io.TextIOWrapper(sheet, encoding='utf-8-sig')
+                    sheets[member_path.stem.lower()] = list(csv.DictReader(text, delimiter=delimiter))
+    return sheet_names, sheets
+
+
+def _read_xlsx(path):
+    with zipfile.ZipFile(str(path)) as archive:
+        sheet_paths = _get_xlsx_sheet_paths(archive)
+        shared_strings = _get_shared_strings(archive)
+        sheets = {name.lower(): _read_xlsx_sheet(archive, sheet_path, shared_strings)
+                  for name, sheet_path in sheet_paths.items() if name.lower() in _METADATA_SHEETS}
+    return list(sheet_paths.keys()), sheets
+
+
+def _get_xlsx_sheet_paths(archive) -> Dict[str, str]:
+    workbook = ElementTree.fromstring(archive.read('xl/workbook.xml'))
+    relations = ElementTree.fromstring(archive.read('xl/_rels/workbook.xml.rels'))
+    targets = {relation.get('Id'): relation.get('Target') for relation in relations.findall('rel:Relationship', _NS)}
+
+    paths = dict()
+    for sheet in workbook.findall('main:sheets/main:sheet', _NS):
+        target = targets[sheet.get(_R_ID)]
+        paths[sheet.get('name')] = target.lstrip('/') if target.startswith('/') else 'xl/' + target
+    return paths
+
+
+def _get_shared_strings(archive) -> List[str]:
+    if 'xl/sharedStrings.xml' not in archive.namelist():
+        return []
+    shared_strings = ElementTree.fromstring(archive.read('xl/sharedStrings.xml'))
+    return [''.join(text.text or '' for text in item.iter('{%s}t' % _NS['main']))
+            for item in shared_strings.findall('main:si', _NS)]
+
+
+def _read_xlsx_sheet(archive, sheet_path, shared_strings) -> List[dict]:
+    sheet = ElementTree.fromstring(archive.read(sheet_path))
+    rows = list()
+    for row in sheet.findall('main:sheetData/main:row', _NS):
+        rows.append({_get_column(cell.get('r')): _get_value(cell, shared_strings)
+                     for cell in row.findall('main:c', _NS)})
+
+    if len(rows) == 0:
+        return []
+    header = rows[0]
+    return [{name: row.get(column) for column, name in header.items()} for row in rows[1:]]
+
+
+def _get_column(cell_reference):
+    return re.match(r'[A-Z]+', cell_reference).group()
+
+
+def _get_value(cell, shared_strings):
+    cell_type = cell.get('t')
+    if cell_type == 'inlineStr':
+        return ''.join(text.text or '' for text in cell.iter('{%s}t' % _NS['main']))
+
+    value = cell.find('main:v', _NS)
+    if value is None:
+        return None
+    elif cell_type == 's':
+        return shared_strings[int(value.text)]
+    else:
+        return value.text
@@ -1,10 +1,12 @@
-from collections.__init__ import defaultdict
+import csv
 from os import path
 from pathlib import Path
+from typing import Iterator, Tuple, List
 
 import mcmd.io.ask
 from mcmd.io import io
 from mcmd.core.errors import McmdError
+from mcmd.utils import file_index
 
 
 def get_file_name_from_path(file_path):
@@ -16,20 +18,44 @@ def get_file_name_from_path(file_path):
     return path.basename(file_path)
 
 
-def scan_folders_for_files(folders):
+def read_rows(file_path: Path, required_columns: List[str] = ()) -> Iterator[Tuple[int, dict]]:
     """
-    scan_folders_for_files loops through specified folders to look for their files
+    read_rows lazily reads the rows of a CSV file (or a TSV file if the extension is .tsv) that starts with a header
+    :param file_path: the path to the file
+    :param required_columns: the columns that the header should contain
+    :return: the line number and the values by column name of each row
+
+    :exception McmdError if the file doesn't exist, can't be read or misses a required column
+    """
+    if not file_path.is_file():
+        raise McmdError("File %s doesn't exist" % str(file_path.resolve()))
+
+    try:
+        with file_path.open('r', newline='', encoding='utf-8-sig') as file:
+            reader = csv.DictReader(file, delimiter='\t' if file_path.suffix.lower() == '.tsv' else ',')
+            missing = [column for column in required_columns if column not in (reader.fieldnames or [])]
+            if missing:
+                raise McmdError('File %s has no %s column' % (file_path.name, ' or '.join(missing)))
+
+            for row in reader:
+                yield reader.line_num, row
+    except (OSError, UnicodeDecodeError, csv.Error) as e:
+        raise McmdError('Error reading %s: %s' % (file_path.name, str(e)))
+
+
+def scan_folders_for_files(folders, recursive=False):
+    """
+    scan_folders_for_files looks up the files of the specified folders in the file index (see file_index.py)
     :param folders: a list of paths to folders
-    :return: files: a dictionary with as key a file and as value a list of the paths that lead to the file
+    :param recursive: whether to include the files in subfolders
+    :return: files: a mapping with as key a file name without extension and as value a list of the paths that lead to
+    the file
     """
-    files = defaultdict(list)
     for folder in folders:
         if not folder.is_dir():
             io.warn("Folder %s doesn't exist" % folder)
 
-        for file in list(folder.glob('*.*')):
-            files[file.stem].append(file)
-    return files
+    return file_index.get_index(folders, recursive)
 
 
 def select_path(file_map, file_name):
@@ -0,0 +1,98 @@
+"""
+An index of the files in the quick folders (the git, dataset and resource folders), so that commands can find a file by
+its name without listing the folders every time.
+
+The index is stored in the cache folder and is kept per folder, together with the modification times of the folder and
+its subfolders. A folder's modification time changes when files are added, removed or renamed in it, so the index of a
+folder is only rebuilt when one of those times has changed. Checking that only takes a stat() per directory.
+"""
+
+import os
+from pathlib import Path
+from typing import List, Mapping, Iterator, Dict
+
+from mcmd.core import cache
+
+_INDEX_FILE = 'file_index.json'
+
+# The index by folder, loaded from the index file when first needed
+_folders = None
+
+
+class FileIndex(Mapping):
+    """The files of one or more folders by their name without extension (the stem). Every stem maps to a list of paths,
+    because files with the same stem can exist in different folders or with different extensions."""
+
+    def __init__(self, folder_indices: List[Dict[str, List[str]]]):
+        self._folder_indices = folder_indices
+
+    def __getitem__(self, stem: str) -> List[Path]:
+        paths = [Path(path) for index in self._folder_indices for path in index.get(stem, [])]
+        if len(paths) == 0:
+            raise KeyError(stem)
+        return paths
+
+    def __iter__(self) -> Iterator[str]:
+        return iter({stem: None for index in self._folder_indices for stem in index})
+
+    def __len__(self) -> int:
+        return len(set(stem for index in self._folder_indices for stem in index))
+
+
+def get_index(folders: List[Path], recursive: bool = False) -> FileIndex:
+    """Returns the index of the folders, rebuilding the parts that are out of date. Folders that don't exist are
+    skipped."""
+    global _folders
+    if _folders is None:
+        _folders = cache.read(_INDEX_FILE)
+
+    changed = False
+    folder_indices = list()
+    for folder in folders:
+        if not folder.is_dir():
+            continue
+
+        key = str(folder.resolve())
+        entry = _folders.get(key)
+        if not _is_valid(entry, recursive):
+            entry = _scan(key, recursive)
+            _folders[key] = entry
+            changed = True
+        folder_indices.append(entry['files'])
+
+    if changed:
+        cache.write(_INDEX_FILE, _folders)
+    return FileIndex(folder_indices)
+
+
+def _is_valid(entry, recursive) -> bool:
+    if entry is None or entry['recursive'] != recursive:
+        return False
+    try:
+        return all(os.stat(directory).st_mtime_ns == mtime for directory, mtime in entry['directories'].items())
+    except OSError:
+        return False
+
+
+def _scan(folder: str, recursive: bool) -> dict:
+    directories = dict()
+    files = dict()
+    pending = [folder]
+    while pending:
+        directory = pending.pop()
+        directories[directory] = os.stat(directory).st_mtime_ns
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                if entry.name.startswith('.'):
+                    continue
+                elif entry.is_dir():
+                    if recursive:
+                        pending.append(entry.path)
+                elif '.' in entry.name:
+                    files.setdefault(Path(entry.name).stem, list()).append(entry.path)
+
+    for paths in files.values():
+        paths.sort()
+    return {'recursive': recursive,
+            'directories': directories,
+            'files': files}
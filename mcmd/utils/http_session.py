@@ -0,0 +1,52 @@
+"""
+Provides the HTTP session that is shared by every part of the application that talks to a server (MOLGENIS or GitHub).
+
+Reusing one session means that connections are pooled and kept alive, so consecutive requests to the same host don't
+have to set up a new TCP and TLS connection each time. The pool size and timeouts can be configured in the 'http'
+section of the configuration file.
+"""
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from mcmd.config import config
+
+# Number of hosts to keep connection pools for (MOLGENIS, GitHub and the hosts that serve GitHub's attachments)
+_NUM_POOLS = 4
+
+_session = None
+
+
+class _TimeoutHTTPAdapter(HTTPAdapter):
+    """HTTPAdapter that applies a default timeout to each request that doesn't specify one itself."""
+
+    def __init__(self, timeout, *args, **kwargs):
+        self._timeout = timeout
+        super().__init__(*args, **kwargs)
+
+    def send(self, request, **kwargs):
+        if kwargs.get('timeout') is None:
+            kwargs['timeout'] = self._timeout
+        return super().send(request, **kwargs)
+
+
+def get_session() -> requests.Session:
+    """
+    Gets the shared session lazily.
+    """
+    global _session
+    if not _session:
+        _session = _create_session()
+    return _session
+
+
+def _create_session() -> requests.Session:
+    timeout = (config.get('http', 'connect_timeout'), config.get('http', 'read_timeout'))
+    adapter = _TimeoutHTTPAdapter(timeout=timeout,
+                                  pool_connections=_NUM_POOLS,
+                                  pool_maxsize=config.get('http', 'pool_size'))
+
+    session = requests.Session()
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
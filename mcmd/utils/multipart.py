@@ -0,0 +1,98 @@
+"""
+Streams multipart/form-data request bodies. Instead of building the whole body in memory (like requests does with
+'files='), the body is read in chunks while it's being sent, so uploading a file of several gigabytes costs no more
+memory than uploading a small one.
+"""
+
+import io
+import mimetypes
+import os
+import uuid
+from pathlib import Path
+from typing import Dict, Tuple, Callable, Optional, Union
+
+
+class MultipartEncoder:
+    """
+    A file-like multipart/form-data body. Pass it as the 'data' of a request together with the content_type header.
+    Files are opened when they're reached and closed when they've been read. Use it as a context manager to make sure
+    the files are closed when the request fails halfway.
+    """
+
+    def __init__(self,
+                 files: Dict[str, Tuple[str, Union[str, Path], Optional[str]]],
+                 on_read: Callable[[int], None] = None):
+        """
+        :param files: the files to send by field name, as (file name, path, content type) - the content type is guessed
+                      from the file name if it's None
+        :param on_read: called with the total number of bytes read so far, each time a chunk is read
+        """
+        self.boundary = uuid.uuid4().hex
+        self.content_type = 'multipart/form-data; boundary={}'.format(self.boundary)
+        self.on_read = on_read
+        self._parts = list()
+        self._length = 0
+        self._bytes_read = 0
+        self._index = 0
+        self._stream = None
+
+        for name, (file_name, path, content_type) in files.items():
+            if not content_type:
+                content_type = mimetypes.guess_type(file_name)[0] or 'application/octet-stream'
+            self._add_bytes('--{}\r\n'
+                            'Content-Disposition: form-data; name="{}"; filename="{}"\r\n'
+                            'Content-Type: {}\r\n\r\n'.format(self.boundary,
+                                                              _quote(name),
+                                                              _quote(file_name),
+                                                              content_type).encode('utf-8'))
+            self._add_file(path)
+            self._add_bytes(b'\r\n')
+        self._add_bytes('--{}--\r\n'.format(self.boundary).encode('utf-8'))
+
+    def __len__(self):
+        return self._length
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def read(self, size: int = -1) -> bytes:
+        chunks = list()
+        remaining = size
+        while self._index < len(self._parts) and (size < 0 or remaining > 0):
+            if not self._stream:
+                self._stream = self._parts[self._index]()
+
+            chunk = self._stream.read(remaining if size >= 0 else -1)
+            if chunk:
+                chunks.append(chunk)
+                remaining -= len(chunk)
+            else:
+                self._stream.close()
+                self._stream = None
+                self._index += 1
+
+        data = b''.join(chunks)
+        self._bytes_read += len(data)
+        if self.on_read and data:
+            self.on_read(self._bytes_read)
+        return data
+
+    def close(self):
+        if self._stream:
+            self._stream.close()
+            self._stream = None
+
+    def _add_bytes(self, data: bytes):
+        self._parts.append(lambda: io.BytesIO(data))
+        self._length += len(data)
+
+    def _add_file(self, path):
+        self._parts.append(lambda: open(str(path), 'rb'))
+        self._length += os.path.getsize(str(path))
+
+
+def _quote(value: str):
+    return value.replace('"', '%22').replace('\r', '%0D').replace('\n', '%0A')
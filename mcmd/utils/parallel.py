@@ -0,0 +1,28 @@
+"""
+Helpers for doing I/O bound work, like sending requests to MOLGENIS, in parallel. Work is done on a pool of threads
+and errors are raised in the calling thread.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Iterable, List
+
+
+def map_parallel(func: Callable, items: Iterable, max_workers: int) -> List:
+    """
+    Calls func for each item with at most max_workers calls at the same time. Returns the results in the order of the
+    items. If one or more calls raise an error, the error of the first of those items is raised.
+    """
+    items = list(items)
+    if len(items) <= 1 or max_workers <= 1:
+        return [func(item) for item in items]
+
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(items))) as executor:
+        futures = [executor.submit(func, item) for item in items]
+        return [future.result() for future in futures]
+
+
+def run_parallel(*funcs: Callable) -> List:
+    """
+    Calls each function (without arguments) at the same time. Returns the results in the order of the functions.
+    """
+    return map_parallel(lambda func: func(), funcs, max_workers=len(funcs))
@@ -0,0 +1,60 @@
+"""
+Microbenchmark of the @version decorator: compares the cost of calling a version-dependent function with the cost of
+calling a plain function.
+"""
+
+import timeit
+import unittest
+
+import pytest
+
+from mcmd.config import config
+from mcmd.core.compatibility import version
+from mcmd.molgenis import version as molgenis_version
+
+_HOST = 'http://localhost/'
+_NUMBER = 200000
+
+
+def plain(value):
+    return value
+
+
+@version('7.0.0')
+def dispatched(value):
+    return value
+
+
+@version('8.0.0')
+def dispatched(value):
+    return value
+
+
+@version('8.3.0')
+def dispatched(value):
+    return value
+
+
+@pytest.mark.benchmark
+class DispatchBenchmark(unittest.TestCase):
+
+    def setUp(self):
+        self._config = config._config
+        config._config = {'host': {'selected': _HOST}}
+        molgenis_version._version_numbers[_HOST] = '8.1.0'
+
+    def tearDown(self):
+        config._config = self._config
+        molgenis_version._version_numbers.pop(_HOST)
+
+    def test_dispatch_overhead(self):
+        plain_time = min(timeit.repeat(lambda: plain('role'), number=_NUMBER, repeat=5)) / _NUMBER
+        dispatch_time = min(timeit.repeat(lambda: dispatched('role'), number=_NUMBER, repeat=5)) / _NUMBER
+
+        print('\nplain call:      {:.0f} ns'.format(plain_time * 1e9))
+        print('dispatched call: {:.0f} ns'.format(dispatch_time * 1e9))
+
+        assert dispatched('role') == 'role'
+        # the dispatch overhead is a lookup of the host's version and a dictionary lookup: no sorting or version parsing
+        # (resolving the implementation on every call used to be more than 200 times slower than a plain call)
+        assert dispatch_time < plain_time * 20
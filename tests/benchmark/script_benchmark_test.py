@@ -0,0 +1,144 @@
+"""
+Benchmarks of running scripts:
+- the overhead of running a script line, with the commands themselves stubbed out: compares parsing every command with
+  the argument parser to using the parsed commands of an earlier run (see command_cache.py)
+- the time it takes to parse a large script, compared to reading the parsed script from the cache (see script_cache.py)
+- finding the lines that a part of a large script depends on (when running with --from-line)
+"""
+
+import tempfile
+import time
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+from mcmd.script import script_runner, command_cache, script_cache
+from mcmd.script.model.lines import ParsedLine
+from mcmd.script.model.script import Script
+from mcmd.script.model.statements import Value, Command
+from mcmd.script.model.templates import Template
+from mcmd.script.options import ScriptOptions
+from mcmd.script.parser import script_parser
+
+_NUM_LINES = 2000
+_NUM_SCRIPT_LINES = 10000
+
+
+@pytest.mark.benchmark
+class ScriptLineBenchmark(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+        self.addCleanup(self.folder.cleanup)
+
+        context_patcher = patch('mcmd.core.cache.context')
+        context_patcher.start().return_value.get_cache_folder.return_value = Path(self.folder.name)
+        self.addCleanup(context_patcher.stop)
+
+        execute_patcher = patch('mcmd.script.script_runner._execute_command')
+        self.execute = execute_patcher.start()
+        self.addCleanup(execute_patcher.stop)
+
+        self.lines = ["$value plugin = 'dataexplorer'"]
+        self.lines += ['give --user user{} read --plugin {{{{plugin}}}}'.format(i) for i in range(_NUM_LINES)]
+        self.script = script_parser.parse(self.lines)
+
+    def _run(self, cached):
+        start = time.perf_counter()
+        script_runner.run(self.script, ScriptOptions(), command_cache.load(self.lines) if cached else None)
+        return (time.perf_counter() - start) / _NUM_LINES
+
+    def test_line_overhead(self):
+        uncached_time = self._run(cached=False)
+        # the first run with a cache parses the commands and stores them
+        first_time = self._run(cached=True)
+        cached_time = self._run(cached=True)
+
+        print('\nparsed every run: {:.0f} us per line'.format(uncached_time * 1e6))
+        print('first run:        {:.0f} us per line'.format(first_time * 1e6))
+        print('cached:           {:.0f} us per line'.format(cached_time * 1e6))
+
+        assert self.execute.call_count == 3 * _NUM_LINES
+        assert cached_time < uncached_time / 2
+
+
+@pytest.mark.benchmark
+class ScriptStartupBenchmark(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+        self.addCleanup(self.folder.cleanup)
+
+        context_patcher = patch('mcmd.core.cache.context')
+        context_patcher.start().return_value.get_cache_folder.return_value = Path(self.folder.name)
+        self.addCleanup(context_patcher.stop)
+
+        self.lines = ["$value plugin = 'dataexplorer'", '$input text group']
+        for i in range(_NUM_SCRIPT_LINES // 2):
+            self.lines.append('# user{}'.format(i))
+            self.lines.append('give --user user{} read --plugin {{{{plugin}}}} --package {{{{group}}}}'.format(i))
+
+    def test_startup(self):
+        start = time.perf_counter()
+        script = script_parser.parse(self.lines)
+        parse_time = time.perf_counter() - start
+
+        script_cache.store(self.lines, script)
+
+        start = time.perf_counter()
+        cached = script_cache.load(self.lines)
+        cached_time = time.perf_counter() - start
+
+        print('\nparsed:    {:.0f} ms for {} lines'.format(parse_time * 1e3, len(self.lines)))
+        print('from cache: {:.0f} ms for {} lines'.format(cached_time * 1e3, len(self.lines)))
+
+        assert cached == script
+        assert cached_time < parse_time / 2
+
+
+@pytest.mark.benchmark
+class ScriptDependenciesBenchmark(unittest.TestCase):
+
+    @staticmethod
+    def _generate_script(num_lines: int) -> Script:
+        """Generates a script in which every tenth line is a value that uses the previous value, and the other lines are
+        commands that use the latest value and the first one."""
+        lines = [ParsedLine(raw='', number=1, statement=Value.from_untyped_value('v1', Template('start')))]
+        dependencies = dict()
+        latest_value = lines[0]
+        for number in range(2, num_lines + 1):
+            if number % 10 == 0:
+                name = 'v{}'.format(latest_value.number)
+                template = Template('{{{{{}}}}}'.format(name), variables=[name])
+                statement = Value.from_untyped_value('v{}'.format(number), template)
+                line = ParsedLine(raw='', number=number, statement=statement)
+                dependencies[line] = {latest_value}
+                latest_value = line
+            else:
+                name = 'v{}'.format(latest_value.number)
+                template = Template('ping {{{{{}}}}} {{{{v1}}}}'.format(name), variables=[name, 'v1'])
+                line = ParsedLine(raw='', number=number, statement=Command(template))
+                dependencies[line] = {latest_value, lines[0]}
+            lines.append(line)
+        return Script(lines=lines, dependencies=dependencies)
+
+    def _time(self, num_lines: int) -> float:
+        script = self._generate_script(num_lines)
+
+        start = time.perf_counter()
+        lines = script.get_lines_with_dependencies(from_line_number=num_lines // 2)
+        elapsed = time.perf_counter() - start
+
+        # the second half and all values of the first half
+        assert len(lines) == num_lines - num_lines // 2 + 1 + (num_lines // 2 - 1) // 10 + 1
+        print('\n{} lines: {:.0f} ms'.format(num_lines, elapsed * 1e3))
+        return elapsed
+
+    def test_from_line(self):
+        small = self._time(10000)
+        large = self._time(100000)
+
+        # linear: ten times the lines shouldn't take much more than ten times as long
+        assert large < small * 30
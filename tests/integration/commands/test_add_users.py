@@ -0,0 +1,57 @@
+import pytest
+
+from tests.integration.utils import run_commander, run_commander_fail, random_name
+
+
+def _user_by_name_query(name):
+    return [{
+        "field": "username",
+        "operator": "EQUALS",
+        "value": name
+    }]
+
+
+@pytest.mark.integration
+def test_add_users(session, tmp_path):
+    names = [random_name() for _ in range(3)]
+    file = tmp_path.joinpath('users.csv')
+    file.write_text('username,email,superuser\n' +
+                    '{},{}@test.nl,true\n'.format(names[0], names[0]) +
+                    '{},,\n'.format(names[1]) +
+                    '{},,false\n'.format(names[2]))
+
+    run_commander('add users --from-file {}'.format(file))
+
+    users = [session.get('sys_sec_User', q=_user_by_name_query(name))[0] for name in names]
+    assert users[0]['Email'] == '{}@test.nl'.format(names[0])
+    assert users[0]['superuser'] is True
+    assert users[1]['Email'] == '{}@molgenis.org'.format(names[1])
+    assert users[1]['active'] is True
+    assert users[2]['superuser'] is False
+
+    # existing users are skipped
+    run_commander('add users --from-file {}'.format(file))
+
+
+@pytest.mark.integration
+def test_add_users_tsv(session, tmp_path):
+    name = random_name()
+    file = tmp_path.joinpath('users.tsv')
+    file.write_text('username\tactive\n{}\tfalse\n'.format(name))
+
+    run_commander('add users --from-file {}'.format(file))
+
+    user = session.get('sys_sec_User', q=_user_by_name_query(name))[0]
+    assert user['active'] is False
+
+
+@pytest.mark.integration
+def test_add_users_invalid_row(session, tmp_path):
+    name = random_name()
+    file = tmp_path.joinpath('users.csv')
+    file.write_text('username,active\n{},maybe\n{},true\n'.format(random_name(), name))
+
+    run_commander_fail('add users --from-file {}'.format(file))
+
+    # the valid rows are added anyway
+    assert len(session.get('sys_sec_User', q=_user_by_name_query(name))) == 1
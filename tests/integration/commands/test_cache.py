@@ -0,0 +1,35 @@
+from unittest import mock
+
+import pytest
+
+from mcmd.molgenis import metadata
+from tests.integration.utils import run_commander, run_commander_fail, random_name
+
+
+@pytest.mark.integration
+def test_cache_warm_disabled():
+    run_commander_fail('cache warm')
+
+
+@pytest.mark.integration
+@mock.patch('mcmd.molgenis.metadata.is_enabled', new=mock.MagicMock(return_value=True))
+def test_cache_warm():
+    run_commander('cache clear')
+    run_commander('cache warm')
+
+    assert metadata.get_row('sys_sec_User', 'admin') is not None
+    assert metadata.get_row('sys_md_EntityType', 'sys_sec_User') is not None
+
+
+@pytest.mark.integration
+@mock.patch('mcmd.molgenis.metadata.is_enabled', new=mock.MagicMock(return_value=True))
+def test_cache_write_through():
+    name = random_name()
+    run_commander('cache warm')
+
+    run_commander('add user {}'.format(name))
+    assert metadata.get_row('sys_sec_User', name) is not None
+
+    run_commander('add package {}'.format(name))
+    run_commander('delete --force --package {}'.format(name))
+    assert metadata.get_row('sys_md_Package', name) is None
@@ -40,6 +40,15 @@ def test_delete_entity_data(session, entity_type):
     assert entity_is_empty(session, entity_type)
 
 
+@pytest.mark.integration
+def test_delete_entity_data_query(session, entity_type):
+    run_commander('delete --force --entity-type --data {} --query firstName==John'.format(entity_type))
+
+    first_names = [row['firstName'] for row in session.get(entity_type)]
+    assert 'John' not in first_names
+    assert len(first_names) > 0
+
+
 @pytest.mark.integration
 @patch('mcmd.io.ask.confirm')
 def test_delete_entity_attribute(are_you_sure, session, entity_type):
@@ -75,3 +84,13 @@ def test_delete_guess_resource(session, entity_type):
     run_commander('delete --force {}'.format(entity_type))
 
     assert not package_exists(session, entity_type)
+
+
+@pytest.mark.integration
+def test_delete_package_dry_run(session, entity_type):
+    package = entity_type.split('_')[0]
+
+    run_commander('delete --force --package --dry-run {}'.format(package))
+
+    assert entity_type_exists(session, entity_type)
+    assert package_exists(session, package)
@@ -3,7 +3,7 @@ import pytest
 from mcmd.molgenis.security.permission import Permission
 from mcmd.molgenis.security.permissions_api import get_user_plugin_permission, get_user_entity_type_permission, \
     get_user_package_permission, get_role_entity_type_permission, get_user_entity_permission, get_role_entity_permission
-from tests.integration.utils import run_commander, setup_entity, run_commander_fail
+from tests.integration.utils import run_commander, setup_entity, run_commander_fail, random_name
 
 
 @pytest.fixture(scope='module')
@@ -184,3 +184,87 @@ def test_give_user_entity_none(rls_entity_type, user):
 @pytest.mark.integration
 def test_give_user_entity_illegal_permission(rls_entity_type, user):
     run_commander_fail('give {} readmeta {} --entity 1'.format(user, rls_entity_type))
+
+
+@pytest.mark.integration
+def test_give_from_yaml_file(entity_type, user, group, tmp_path):
+    role_name = group + '_VIEWER'
+    file = tmp_path.joinpath('permissions.yaml')
+    file.write_text('roles:\n'
+                    '  {}:\n'
+                    '    entity-types:\n'
+                    '      {}: read\n'
+                    'users:\n'
+                    '  {}:\n'
+                    '    resources:\n'
+                    '      dataexplorer: read\n'.format(role_name, entity_type, user))
+
+    run_commander('give --from-file {}'.format(file))
+
+    assert get_role_entity_type_permission(entity_type, role_name) == Permission.READ
+    assert get_user_plugin_permission('dataexplorer', user) == Permission.READ
+
+
+@pytest.mark.integration
+def test_give_from_csv_file(entity_type, user, tmp_path):
+    file = tmp_path.joinpath('permissions.csv')
+    file.write_text('principal,permission,resource,principal_type,resource_type\n'
+                    '{0},write,{1},user,entity-type\n'
+                    '{0},none,mappingservice,,\n'.format(user, entity_type))
+    run_commander('give {} read mappingservice'.format(user))
+
+    run_commander('give --from-file {}'.format(file))
+    # nothing changes the second time
+    run_commander('give --from-file {}'.format(file))
+
+    assert get_user_entity_type_permission(entity_type, user) == Permission.WRITE
+    assert get_user_plugin_permission('mappingservice', user) == Permission.NONE
+
+
+@pytest.mark.integration
+def test_give_from_file_unknown_resource(user, tmp_path):
+    file = tmp_path.joinpath('permissions.csv')
+    file.write_text('principal,permission,resource\n{},read,does_not_exist\n'.format(user))
+
+    run_commander_fail('give --from-file {}'.format(file))
+
+
+@pytest.mark.integration
+def test_give_user_multiple_entities(rls_entity_type, user):
+    run_commander('give {} read {} --entity 1 2'.format(user, rls_entity_type))
+    run_commander('give {} write {} --entity 1 2'.format(user, rls_entity_type))
+
+    assert get_user_entity_permission(rls_entity_type, 1, user) == Permission.WRITE
+    assert get_user_entity_permission(rls_entity_type, 2, user) == Permission.WRITE
+
+
+@pytest.mark.integration
+def test_give_user_entities_where(rls_entity_type, user):
+    run_commander('give {} read {} --where lastName==Doe'.format(user, rls_entity_type))
+
+    assert get_user_entity_permission(rls_entity_type, 1, user) == Permission.READ
+
+    run_commander('give {} none {} --where lastName==Doe'.format(user, rls_entity_type))
+
+    assert get_user_entity_permission(rls_entity_type, 1, user) is Permission.NONE
+
+
+@pytest.mark.integration
+def test_give_user_multiple_resources(entity_type, user):
+    run_commander('give {} read {} dataexplorer'.format(user, entity_type))
+
+    assert get_user_entity_type_permission(entity_type, user) == Permission.READ
+    assert get_user_plugin_permission('dataexplorer', user) == Permission.READ
+
+
+@pytest.mark.integration
+def test_give_user_package_contents(user):
+    package = random_name()
+    run_commander('add package {}'.format(package))
+    run_commander('import testAutoId_unpackaged --in {}'.format(package))
+    entity_type = '{}_testAutoId'.format(package)
+
+    run_commander('give {} writemeta --package --contents {}'.format(user, package))
+
+    assert get_user_package_permission(package, user) == Permission.WRITEMETA
+    assert get_user_entity_type_permission(entity_type, user) == Permission.WRITEMETA
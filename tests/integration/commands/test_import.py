@@ -147,3 +147,47 @@ def test_import_from_git_folder(session, package):
 
     result = session.get('{}_testAutoId'.format(package))
     assert len(result) == 4
+
+
+@pytest.mark.integration
+def test_import_multiple(session):
+    run_commander('import it_emx_autoid testvcf')
+
+    assert len(session.get('it_emx_autoid_testAutoId')) > 0
+    assert len(session.get('testvcf')) == 5
+
+    # cleanup
+    session.delete('sys_md_Package', 'it')
+    session.delete('sys_md_EntityType', 'testvcf')
+
+
+@pytest.mark.integration
+def test_import_from_path_glob(session):
+    pattern = get_dataset_folder().joinpath('it_emx_auto*.xlsx')
+    run_commander('import --from-path {}'.format(str(pattern)))
+
+    assert len(session.get('it_emx_autoid_testAutoId')) > 0
+
+    # cleanup
+    session.delete('sys_md_Package', 'it')
+
+
+@pytest.mark.integration
+def test_import_multiple_fail(session):
+    run_commander_fail('import it_emx_autoid broken')
+
+    # the other file is imported anyway
+    assert len(session.get('it_emx_autoid_testAutoId')) > 0
+
+    # cleanup
+    session.delete('sys_md_Package', 'it')
+
+
+@pytest.mark.integration
+def test_import_skip_unchanged(session):
+    run_commander('import it_emx_test --with-action add')
+    # would fail if the file was imported again with import action add
+    run_commander('import it_emx_test --with-action add --skip-unchanged')
+
+    # cleanup
+    session.delete('sys_md_Package', 'it')
@@ -164,3 +164,25 @@ def test_include_group_role_explicit(session, group):
 
     role = _get_role_by_name(role_name, session)
     assert role['includes']['items'][0]['name'] == group_role_name
+
+
+@pytest.mark.integration
+def test_make_from_file(session, user, group, tmp_path):
+    other_user = random_name()
+    run_commander('add user {}'.format(other_user))
+    run_commander('make {} {}_VIEWER'.format(user, group))
+    file = tmp_path.joinpath('memberships.csv')
+    file.write_text('user,role\n{0},{1}_MANAGER\n{2},{1}_EDITOR\n'.format(user, group, other_user))
+
+    run_commander('make --from-file {}'.format(file))
+
+    memberships = _get_memberships_by_username(user, session)
+    assert len(memberships) == 1
+    assert memberships[0]['role']['name'] == '{}_MANAGER'.format(group)
+    memberships = _get_memberships_by_username(other_user, session)
+    assert len(memberships) == 1
+    assert memberships[0]['role']['name'] == '{}_EDITOR'.format(group)
+
+    # nothing changes the second time
+    run_commander('make --from-file {}'.format(file))
+    assert len(_get_memberships_by_username(user, session)) == 1
@@ -19,9 +19,18 @@ def test_ping_online(capsys):
 
 
 @pytest.mark.integration
-@mock.patch('mcmd.molgenis.version.get_version')
-def test_ping_offline(get_version_mock, capsys):
-    get_version_mock.side_effect = McmdError('')
+def test_ping_refresh(capsys):
+    run_commander('ping --refresh')
+
+    captured = capsys.readouterr().out
+    assert 'Online' in captured
+    assert 'Version' in captured
+
+
+@pytest.mark.integration
+@mock.patch('mcmd.molgenis.version.refresh_version')
+def test_ping_offline(refresh_version_mock, capsys):
+    refresh_version_mock.side_effect = McmdError('')
     run_commander('ping')
 
     captured = capsys.readouterr().out
@@ -13,6 +13,7 @@ resources:
   - {dataset_folder}
   resource_folders:
   - {resource_folder}
+  recursive: false
 host:
   selected: {url}
   auth:
@@ -21,6 +22,23 @@ host:
     password: {password}
 settings:
   import_action: add_update_existing
+  batch_size: 1000
+http:
+  pool_size: 10
+  connect_timeout: 10
+  read_timeout: 300
+  max_concurrency: 4
+polling:
+  initial_interval: 0.5
+  max_interval: 10
+  timeout: 0
+cache:
+  token_ttl: 300
+  version_ttl: 3600
+  metadata: false
+  metadata_ttl: 3600
+  issue_ttl: 3600
+  scripts: true
 """
 
 _url: str = None
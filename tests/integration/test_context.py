@@ -14,6 +14,7 @@ class IntegrationTestContext(Context):
         self._TEMP_HISTORY = None
         self._TEMP_ISSUES_FOLDER = None
         self._TEMP_BACKUP_FOLDER = None
+        self._TEMP_CACHE_FOLDER = None
 
     def _raise_exception(self, msg):
         raise NotImplementedError(msg)
@@ -28,6 +29,11 @@ class IntegrationTestContext(Context):
             self._TEMP_ISSUES_FOLDER = Path(tempfile.mkdtemp())
         return self._TEMP_ISSUES_FOLDER
 
+    def get_cache_folder(self) -> Path:
+        if not self._TEMP_CACHE_FOLDER:
+            self._TEMP_CACHE_FOLDER = Path(tempfile.mkdtemp())
+        return self._TEMP_CACHE_FOLDER
+
     def get_scripts_folder(self) -> Path:
         return get_files_folder().joinpath('scripts')
 
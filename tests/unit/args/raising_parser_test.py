@@ -18,3 +18,19 @@ class RaisingParserTest(unittest.TestCase):
 
         assert str(e.value) == "test: argument -a: expected one argument"
         assert e.value.usage == "usage: test [-h] [-a A]\n"
+
+    def test_optional_positionals(self):
+        parser = RaisingArgumentParser()
+        parser.add_argument('--plugin', action='store_true')
+        parser.add_argument('--from-file')
+        parser.add_optional_positional('receiver')
+        parser.add_optional_positional('resource')
+
+        args = parser.parse_args(['john', '--plugin', 'dataexplorer'])
+        assert args.receiver == 'john'
+        assert args.resource == 'dataexplorer'
+        assert args.plugin
+
+        args = parser.parse_args(['--from-file', 'permissions.yaml'])
+        assert args.receiver is None
+        assert args.resource is None
@@ -0,0 +1,107 @@
+import time
+import threading
+import unittest
+from unittest.mock import patch, MagicMock
+
+import pytest
+
+from mcmd.molgenis import auth
+from mcmd.molgenis.request_handler import request
+
+
+def _response(status_code):
+    response = MagicMock()
+    response.status_code = status_code
+    return response
+
+
+@pytest.mark.unit
+@patch('mcmd.config.config.get', new=MagicMock(return_value=300))
+@patch('mcmd.molgenis.api.rest2', new=MagicMock(return_value='http://localhost/api/v2/sys_sec_Token'))
+class AuthTest(unittest.TestCase):
+
+    def setUp(self):
+        auth.set_('admin', 'admin', 'token')
+
+    @patch('mcmd.molgenis.auth.get_session')
+    @patch('mcmd.config.config.token_validated_at')
+    def test_check_token_recently_validated(self, validated_at, get_session):
+        validated_at.return_value = time.time() - 10
+
+        auth.check_token()
+
+        get_session.assert_not_called()
+
+    @patch('mcmd.molgenis.auth.get_session')
+    @patch('mcmd.config.config.set_token_validated')
+    @patch('mcmd.config.config.token_validated_at')
+    def test_check_token_expired(self, validated_at, set_token_validated, get_session):
+        validated_at.return_value = time.time() - 1000
+        get_session.return_value.get.return_value = _response(200)
+
+        auth.check_token()
+
+        get_session.return_value.get.assert_called_once()
+        set_token_validated.assert_called_once()
+
+    @patch('mcmd.molgenis.auth.get_session')
+    @patch('mcmd.config.config.set_token_validated')
+    @patch('mcmd.config.config.token_validated_at')
+    def test_check_token_never_validated(self, validated_at, set_token_validated, get_session):
+        validated_at.return_value = None
+        get_session.return_value.get.return_value = _response(200)
+
+        auth.check_token()
+
+        get_session.return_value.get.assert_called_once()
+        set_token_validated.assert_called_once()
+
+    @patch('mcmd.molgenis.auth.renew_token')
+    @patch('mcmd.molgenis.auth.check_token', new=MagicMock())
+    def test_request_retried_after_unauthorized(self, renew_token):
+        responses = [_response(401), _response(200)]
+        func = MagicMock(side_effect=responses)
+
+        response = request(func)()
+
+        renew_token.assert_called_once()
+        assert func.call_count == 2
+        assert response is responses[1]
+
+    @patch('mcmd.molgenis.auth.renew_token')
+    @patch('mcmd.molgenis.auth.check_token', new=MagicMock())
+    def test_request_not_retried(self, renew_token):
+        func = MagicMock(return_value=_response(200))
+
+        request(func)()
+
+        renew_token.assert_not_called()
+        assert func.call_count == 1
+
+    @patch('mcmd.config.config.set_token', new=MagicMock())
+    @patch('mcmd.molgenis.api.login', new=MagicMock(return_value='http://localhost/api/v1/login'))
+    @patch('mcmd.molgenis.auth.get_session')
+    def test_set_waits_for_login(self, get_session):
+        logging_in = threading.Event()
+        finish_login = threading.Event()
+
+        def login(*args, **kwargs):
+            logging_in.set()
+            finish_login.wait(timeout=5)
+            return MagicMock(json=MagicMock(return_value={'token': 'new_token'}))
+
+        get_session.return_value.post.side_effect = login
+        auth.set_('admin', 'admin')
+        login_thread = threading.Thread(target=auth.get_token)
+        login_thread.start()
+        logging_in.wait(timeout=5)
+
+        set_thread = threading.Thread(target=auth.set_, args=('admin', 'admin', 'other_token'))
+        set_thread.start()
+        set_thread.join(timeout=0.2)
+        assert set_thread.is_alive()
+
+        finish_login.set()
+        login_thread.join(timeout=5)
+        set_thread.join(timeout=5)
+        assert auth.get_token() == 'other_token'
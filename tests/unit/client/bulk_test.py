@@ -0,0 +1,130 @@
+import json
+import unittest
+from unittest.mock import patch, MagicMock
+
+import pytest
+
+from mcmd.core.errors import McmdError
+from mcmd.molgenis import bulk
+
+_CONFIG = {('settings', 'batch_size'): 2,
+           ('http', 'max_concurrency'): 2}
+
+
+@pytest.mark.unit
+@patch('mcmd.config.config.get', new=lambda *args: _CONFIG[args])
+@patch('mcmd.molgenis.api.rest2', new=lambda path: 'http://localhost/api/v2/' + path)
+@patch('mcmd.io.io.progress', new=MagicMock())
+class BulkTest(unittest.TestCase):
+
+    @patch('mcmd.molgenis.client.delete_data')
+    def test_delete_rows_in_batches(self, delete_data):
+        bulk.delete_rows('test', ['1', '2', '3', '4', '5'])
+
+        batches = sorted(call[0][1] for call in delete_data.call_args_list)
+        assert batches == [['1', '2'], ['3', '4'], ['5']]
+
+    @patch('mcmd.molgenis.client.delete_data')
+    def test_delete_rows_failed_batch(self, delete_data):
+        def delete(url, batch):
+            if '3' in batch:
+                raise McmdError('Row 3 is referenced')
+
+        delete_data.side_effect = delete
+
+        with self.assertRaises(McmdError) as context:
+            bulk.delete_rows('test', ['1', '2', '3', '4', '5'])
+
+        assert delete_data.call_count == 3
+        assert context.exception.message == 'Failed to delete 2 of 5 rows'
+        assert context.exception.info == 'Rows 3 to 4 (2 rows): Row 3 is referenced'
+
+    @patch('mcmd.molgenis.bulk.delete_rows')
+    @patch('mcmd.molgenis.bulk.query')
+    def test_delete_matching_rows(self, query, delete_rows):
+        query.return_value = iter([{'_href': '/api/v2/test/a', 'id': 'a'},
+                                   {'_href': '/api/v2/test/b%2Fc', 'id': 'b/c'}])
+
+        assert bulk.delete_matching_rows('test', 'age>60') == 2
+
+        query.assert_called_once_with('test', q='age>60', attrs='~id', prefetch=True)
+        delete_rows.assert_called_once_with('test', ['a', 'b/c'])
+
+    @patch('mcmd.molgenis.bulk.delete_rows')
+    @patch('mcmd.molgenis.bulk.query')
+    def test_delete_matching_rows_none(self, query, delete_rows):
+        query.return_value = iter([])
+
+        assert bulk.delete_matching_rows('test', 'age>60') == 0
+
+        delete_rows.assert_not_called()
+
+    @patch('mcmd.molgenis.paging.query')
+    @patch('mcmd.molgenis.client.post')
+    def test_add_rows_in_batches(self, post, query):
+        query.return_value = []
+        rows = (('line {}'.format(i), {'username': 'user{}'.format(i)}) for i in range(5))
+
+        result = bulk.add_rows('sys_sec_User', rows, key='username')
+
+        assert result == bulk.AddResult(added=5, skipped=[], failed=[])
+        batches = sorted([row['username'] for row in call[1]['data']['entities']] for call in post.call_args_list)
+        assert batches == [['user0', 'user1'], ['user2', 'user3'], ['user4']]
+
+    @patch('mcmd.molgenis.paging.query')
+    @patch('mcmd.molgenis.client.post')
+    def test_add_rows_skips_existing(self, post, query):
+        query.side_effect = lambda entity_type_id, q, attrs, page_size: [{'username': 'bob'}] if 'bob' in q else []
+        rows = [('line 2', {'username': 'alice'}),
+                ('line 3', {'username': 'bob'}),
+                ('line 4', {'username': 'alice'})]
+
+        result = bulk.add_rows('sys_sec_User', rows, key='username', batch_size=10)
+
+        assert result.added == 1
+        assert result.skipped == [('line 4', 'Duplicate username alice'), ('line 3', 'username bob already exists')]
+        assert query.call_args[1]['q'] == 'username=in=("alice","bob")'
+        post.assert_called_once_with('http://localhost/api/v2/sys_sec_User', data={'entities': [{'username': 'alice'}]})
+
+    @patch('mcmd.molgenis.paging.query')
+    @patch('mcmd.molgenis.client.post')
+    def test_add_rows_failed_batch(self, post, query):
+        def add(url, data):
+            if {'username': 'wrong'} in data['entities']:
+                raise McmdError('Invalid username')
+
+        post.side_effect = add
+        query.return_value = []
+        rows = [('line 2', {'username': 'alice'}),
+                ('line 3', {'username': 'wrong'}),
+                ('line 4', {'username': 'bob'})]
+
+        result = bulk.add_rows('sys_sec_User', rows, key='username', batch_size=10)
+
+        assert result == bulk.AddResult(added=2, skipped=[], failed=[('line 3', 'Invalid username')])
+        assert post.call_count == 4
+
+    @patch('mcmd.molgenis.client.post')
+    def test_create_rows(self, post):
+        def create(url, data):
+            if {'id': 'wrong'} in data['entities']:
+                raise McmdError('Invalid id')
+
+        post.side_effect = create
+        rows = [('line {}'.format(i), {'id': id_}) for i, id_ in enumerate(['a', 'wrong', 'b', 'c', 'd'])]
+
+        failed = bulk.create_rows('test', rows)
+
+        assert failed == [('line 1', 'Invalid id')]
+        # three batches, of which the first one is retried row by row
+        assert post.call_count == 5
+
+    @patch('mcmd.molgenis.client.put')
+    def test_update_attribute(self, put):
+        rows = [('line 2', {'id': 'a', 'role': 'r1'}), ('line 3', {'id': 'b', 'role': 'r2'})]
+
+        failed = bulk.update_attribute('sys_sec_RoleMembership', 'role', rows, batch_size=10)
+
+        assert failed == []
+        put.assert_called_once_with('http://localhost/api/v2/sys_sec_RoleMembership/role',
+                                    json.dumps({'entities': [{'id': 'a', 'role': 'r1'}, {'id': 'b', 'role': 'r2'}]}))
@@ -0,0 +1,165 @@
+import json
+import tempfile
+import threading
+import unittest
+from http.server import HTTPServer, BaseHTTPRequestHandler
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+import requests
+
+from mcmd.core.errors import McmdError
+from mcmd.github import client
+from mcmd.github.client import Attachment
+
+_CONTENT = bytes(range(256)) * 1024
+_ETAG = '"abc"'
+_ISSUE = {'body': 'Import [emx.xlsx](https://github.com/molgenis/molgenis/files/1234/emx.xlsx)'}
+
+
+class _GitHubHandler(BaseHTTPRequestHandler):
+    """Serves an issue and an attachment like GitHub does: with ETags and support for Range requests."""
+    requests = list()
+
+    def do_GET(self):
+        _GitHubHandler.requests.append((self.path, dict(self.headers)))
+        if self.path == '/issues/1':
+            self._send_issue()
+        elif self.path == '/files/1234/emx.xlsx':
+            self._send_attachment()
+        else:
+            self.send_response(404)
+            self.end_headers()
+
+    def _send_issue(self):
+        if self.headers.get('If-None-Match') == _ETAG:
+            self.send_response(304)
+            self.end_headers()
+            return
+
+        body = json.dumps(_ISSUE).encode()
+        self.send_response(200)
+        self.send_header('ETag', _ETAG)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_attachment(self):
+        start = 0
+        if 'Range' in self.headers and self.headers.get('If-Range') == _ETAG:
+            start = int(self.headers['Range'][len('bytes='):-1])
+            self.send_response(206)
+        else:
+            self.send_response(200)
+        self.send_header('ETag', _ETAG)
+        self.send_header('Content-Length', str(len(_CONTENT) - start))
+        self.end_headers()
+        self.wfile.write(_CONTENT[start:])
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.mark.unit
+class GitHubDownloadTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server = HTTPServer(('127.0.0.1', 0), _GitHubHandler)
+        cls.url = 'http://127.0.0.1:{}'.format(cls.server.server_port)
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self):
+        _GitHubHandler.requests = list()
+        self.folder = tempfile.TemporaryDirectory()
+        self.addCleanup(self.folder.cleanup)
+        self.path = Path(self.folder.name)
+
+        self.session = requests.Session()
+        self.addCleanup(self.session.close)
+        for patcher in [patch('mcmd.github.client.get_session', return_value=self.session),
+                        patch('mcmd.github.client._ISSUE_URL', self.url + '/issues/{}'),
+                        patch('mcmd.config.config.get', new=lambda *args: {('cache', 'issue_ttl'): 3600}[args])]:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+        context_patcher = patch('mcmd.core.cache.context')
+        context_patcher.start().return_value.get_cache_folder.return_value = self.path
+        self.addCleanup(context_patcher.stop)
+
+        self.attachment = Attachment(self.url + '/files/1234/emx.xlsx')
+        self.file = self.path.joinpath('emx.xlsx')
+
+    def test_download(self):
+        client.download_attachment(self.attachment, self.file)
+
+        assert self.file.read_bytes() == _CONTENT
+        assert client.is_downloaded(self.attachment, self.file)
+        assert not self.path.joinpath('emx.xlsx.part').exists()
+
+    def test_is_downloaded(self):
+        assert not client.is_downloaded(self.attachment, self.file)
+
+        self.file.write_bytes(b'incomplete')
+        assert not client.is_downloaded(self.attachment, self.file)
+
+        client.download_attachment(self.attachment, self.file)
+        assert client.is_downloaded(self.attachment, self.file)
+        assert not client.is_downloaded(Attachment(self.url + '/files/5678/emx.xlsx'), self.file)
+
+    def test_resume_download(self):
+        part = self.path.joinpath('emx.xlsx.part')
+        part.write_bytes(_CONTENT[:1000])
+        client._write_download_info(part, {'url': self.attachment.url, 'etag': _ETAG, 'size': len(_CONTENT)})
+
+        client.download_attachment(self.attachment, self.file)
+
+        assert _GitHubHandler.requests[0][1]['Range'] == 'bytes=1000-'
+        assert self.file.read_bytes() == _CONTENT
+
+    def test_restart_download_of_changed_file(self):
+        part = self.path.joinpath('emx.xlsx.part')
+        part.write_bytes(b'x' * 1000)
+        client._write_download_info(part, {'url': self.attachment.url, 'etag': '"old"', 'size': len(_CONTENT)})
+
+        client.download_attachment(self.attachment, self.file)
+
+        assert self.file.read_bytes() == _CONTENT
+
+    def test_download_error(self):
+        with self.assertRaises(McmdError):
+            client.download_attachment(Attachment(self.url + '/files/1234/missing.xlsx'), self.file)
+
+    def test_get_attachments(self):
+        attachments = client.get_attachments('1')
+
+        assert [attachment.url for attachment in attachments] == [
+            'https://github.com/molgenis/molgenis/files/1234/emx.xlsx']
+
+    def test_get_attachments_cached(self):
+        client.get_attachments('1')
+        client.get_attachments('1')
+
+        assert len(_GitHubHandler.requests) == 1
+
+    def test_get_attachments_revalidated(self):
+        client.get_attachments('1')
+        with patch('mcmd.config.config.get', new=lambda *args: 0):
+            attachments = client.get_attachments('1')
+
+        assert len(_GitHubHandler.requests) == 2
+        assert _GitHubHandler.requests[1][1]['If-None-Match'] == _ETAG
+        assert [attachment.url for attachment in attachments] == [
+            'https://github.com/molgenis/molgenis/files/1234/emx.xlsx']
+
+    def test_get_attachments_of_unknown_issue(self):
+        with self.assertRaises(McmdError) as context:
+            client.get_attachments('2')
+
+        assert context.exception.message == "Issue #2 doesn't exist"
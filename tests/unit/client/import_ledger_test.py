@@ -0,0 +1,62 @@
+import hashlib
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+from mcmd.molgenis import import_ledger
+
+
+@pytest.mark.unit
+class ImportLedgerTest(unittest.TestCase):
+
+    def setUp(self):
+        self.config = {('host', 'selected'): 'http://localhost/'}
+        config_patcher = patch('mcmd.config.config.get', new=lambda *args: self.config[args])
+        config_patcher.start()
+        self.addCleanup(config_patcher.stop)
+
+        self.folder = tempfile.TemporaryDirectory()
+        self.addCleanup(self.folder.cleanup)
+        self.path = Path(self.folder.name)
+        context_patcher = patch('mcmd.core.cache.context')
+        context_patcher.start().return_value.get_cache_folder.return_value = self.path
+        self.addCleanup(context_patcher.stop)
+
+    def test_hash_file(self):
+        file = self.path.joinpath('data.csv')
+        file.write_bytes(b'id\n1\n')
+
+        assert import_ledger.hash_file(file) == hashlib.sha256(b'id\n1\n').hexdigest()
+
+    def test_record(self):
+        import_ledger.record('abc', 'data.xlsx', 'add', 'base', None)
+
+        assert import_ledger.is_imported('abc', 'add', 'base', None)
+        assert not import_ledger.is_imported('def', 'add', 'base', None)
+
+    def test_is_imported_with_other_target(self):
+        import_ledger.record('abc', 'data.xlsx', 'add', 'base', None)
+
+        assert not import_ledger.is_imported('abc', 'update', 'base', None)
+        assert not import_ledger.is_imported('abc', 'add', 'other', None)
+        assert not import_ledger.is_imported('abc', 'add', 'base', 'base_data')
+
+    def test_ledger_per_host(self):
+        import_ledger.record('abc', 'data.xlsx', 'add', None, None)
+        self.config[('host', 'selected')] = 'http://other/'
+
+        assert not import_ledger.is_imported('abc', 'add', None, None)
+
+    def test_clear(self):
+        import_ledger.record('abc', 'data.xlsx', 'add', None, None)
+        self.config[('host', 'selected')] = 'http://other/'
+        import_ledger.record('abc', 'data.xlsx', 'add', None, None)
+
+        import_ledger.clear()
+
+        assert not import_ledger.is_imported('abc', 'add', None, None)
+        self.config[('host', 'selected')] = 'http://localhost/'
+        assert import_ledger.is_imported('abc', 'add', None, None)
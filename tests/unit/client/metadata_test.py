@@ -0,0 +1,149 @@
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch, MagicMock
+
+import pytest
+
+from mcmd.molgenis import metadata
+from mcmd.molgenis.principals import user_exists
+
+_CONFIG = {('host', 'selected'): 'http://localhost/',
+           ('cache', 'metadata'): True,
+           ('cache', 'metadata_ttl'): 3600}
+
+
+def _response(items, next_href=None):
+    response = MagicMock()
+    response.json.return_value = {'items': items,
+                                  'total': len(items)}
+    if next_href:
+        response.json.return_value['nextHref'] = next_href
+    return response
+
+
+def _user(username):
+    return {'_href': '/api/v2/sys_sec_User/' + username, 'id': 'id_' + username, 'username': username}
+
+
+@pytest.mark.unit
+@patch('mcmd.molgenis.api.rest2', new=lambda path: 'http://localhost/api/v2/' + path)
+class MetadataCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.config = dict(_CONFIG)
+        config_patcher = patch('mcmd.config.config.get', new=lambda *args: self.config[args])
+        config_patcher.start()
+        self.addCleanup(config_patcher.stop)
+
+        cache_folder = tempfile.TemporaryDirectory()
+        context_patcher = patch('mcmd.core.cache.context')
+        context_patcher.start().return_value.get_cache_folder.return_value = Path(cache_folder.name)
+        self.addCleanup(context_patcher.stop)
+        self.addCleanup(cache_folder.cleanup)
+
+    def tearDown(self):
+        metadata._hosts.clear()
+
+    @patch('mcmd.molgenis.principals.get')
+    @patch('mcmd.molgenis.paging.get')
+    def test_lookup_disabled(self, metadata_get, principals_get):
+        self.config['cache', 'metadata'] = False
+        principals_get.return_value = _response([_user('john')])
+
+        assert user_exists('john')
+
+        principals_get.assert_called_once()
+        metadata_get.assert_not_called()
+
+    @patch('mcmd.molgenis.principals.get')
+    @patch('mcmd.molgenis.paging.get')
+    def test_lookups_answered_locally(self, metadata_get, principals_get):
+        metadata_get.return_value = _response([_user('john'), _user('jane')])
+
+        assert user_exists('john')
+        assert user_exists('jane')
+        assert not user_exists('jack')
+
+        metadata_get.assert_called_once()
+        principals_get.assert_not_called()
+        assert metadata.get_row('sys_sec_User', 'john') == {'id': 'id_john', 'username': 'john'}
+
+    @patch('mcmd.molgenis.paging.get')
+    def test_fetch_pages(self, get):
+        get.side_effect = [_response([_user('john')], next_href='/api/v2/sys_sec_User?start=10000&num=10000'),
+                           _response([_user('jane')])]
+
+        assert len(metadata.get_rows('sys_sec_User')) == 2
+
+    @patch('mcmd.molgenis.paging.get')
+    def test_stored_between_runs(self, get):
+        get.return_value = _response([_user('john')])
+        metadata.warm(['sys_sec_User'])
+        metadata._hosts.clear()
+
+        assert metadata.get_row('sys_sec_User', 'john') is not None
+        get.assert_called_once()
+
+    @patch('mcmd.molgenis.paging.get')
+    def test_expired(self, get):
+        get.return_value = _response([_user('john')])
+        metadata.warm(['sys_sec_User'])
+        self.config['cache', 'metadata_ttl'] = 0
+
+        metadata.get_row('sys_sec_User', 'john')
+
+        assert get.call_count == 2
+
+    @patch('mcmd.molgenis.metadata.get')
+    @patch('mcmd.molgenis.paging.get')
+    def test_refresh_row(self, paging_get, get):
+        paging_get.return_value = _response([_user('john')])
+        metadata.warm(['sys_sec_User'])
+
+        get.return_value = _response([_user('jane')])
+        metadata.refresh_row('sys_sec_User', 'jane')
+        get.return_value = _response([])
+        metadata.refresh_row('sys_sec_User', 'john')
+
+        assert metadata.get_row('sys_sec_User', 'jane') is not None
+        assert metadata.get_row('sys_sec_User', 'john') is None
+        assert get.call_count == 2
+        paging_get.assert_called_once()
+
+    @patch('mcmd.molgenis.metadata.get')
+    def test_refresh_row_not_cached(self, get):
+        metadata.refresh_row('sys_sec_User', 'jane')
+
+        get.assert_not_called()
+
+    @patch('mcmd.molgenis.paging.get')
+    def test_remove_row(self, get):
+        get.return_value = _response([_user('john')])
+        metadata.warm(['sys_sec_User'])
+
+        metadata.remove_row('sys_sec_User', 'john')
+
+        assert metadata.get_row('sys_sec_User', 'john') is None
+        get.assert_called_once()
+
+    @patch('mcmd.molgenis.paging.get')
+    def test_invalidate(self, get):
+        get.return_value = _response([_user('john')])
+        metadata.warm(['sys_sec_User'])
+
+        metadata.invalidate('sys_sec_User')
+        metadata.get_row('sys_sec_User', 'john')
+
+        assert get.call_count == 2
+
+    @patch('mcmd.molgenis.paging.get')
+    def test_per_host(self, get):
+        get.return_value = _response([_user('john')])
+        metadata.warm(['sys_sec_User'])
+
+        self.config['host', 'selected'] = 'http://remote/'
+        get.return_value = _response([])
+
+        assert metadata.get_row('sys_sec_User', 'john') is None
+        assert get.call_count == 2
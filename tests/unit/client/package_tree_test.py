@@ -0,0 +1,94 @@
+import unittest
+from unittest.mock import patch, MagicMock
+
+import pytest
+
+from mcmd.molgenis import package_tree
+from mcmd.molgenis.package_tree import PackageTree, DeletionStep
+from mcmd.molgenis.resources import ResourceType
+
+_PACKAGES = [{'id': 'root'},
+             {'id': 'a', 'parent': {'id': 'root'}},
+             {'id': 'a1', 'parent': {'id': 'a'}},
+             {'id': 'b', 'parent': {'id': 'root'}},
+             {'id': 'other'}]
+
+_ENTITY_TYPES = [{'id': 'root_base'},
+                 {'id': 'a_child', 'extends': {'id': 'root_base'}},
+                 {'id': 'a1_refs', 'extends': {'id': 'outside'}},
+                 {'id': 'b_cycle1'},
+                 {'id': 'b_cycle2'}]
+
+_ATTRIBUTES = [{'entity': {'id': 'a1_refs'}, 'refEntityType': {'id': 'a_child'}},
+               {'entity': {'id': 'a1_refs'}, 'refEntityType': {'id': 'a1_refs'}},
+               {'entity': {'id': 'a1_refs'}, 'refEntityType': {'id': 'outside'}},
+               {'entity': {'id': 'a1_refs'}},
+               {'entity': {'id': 'b_cycle1'}, 'refEntityType': {'id': 'b_cycle2'}},
+               {'entity': {'id': 'b_cycle2'}, 'refEntityType': {'id': 'b_cycle1'}}]
+
+
+def _query(entity_type_id, **kwargs):
+    return iter({'sys_md_Package': _PACKAGES,
+                 'sys_md_EntityType': _ENTITY_TYPES,
+                 'sys_md_Attribute': _ATTRIBUTES}[entity_type_id])
+
+
+@pytest.mark.unit
+@patch('mcmd.molgenis.metadata.is_cached', new=MagicMock(return_value=False))
+class PackageTreeTest(unittest.TestCase):
+
+    @patch('mcmd.molgenis.paging.query', new=_query)
+    @patch('mcmd.molgenis.package_tree.query', new=_query)
+    def test_load_package_tree(self):
+        tree = package_tree.load_package_tree('root')
+
+        assert tree.packages == {'a': 1, 'b': 1, 'a1': 2}
+        assert tree.entity_types == ['a1_refs', 'a_child', 'b_cycle1', 'b_cycle2', 'root_base']
+        assert tree.dependencies == {'root_base': {'a_child'},
+                                     'a_child': {'a1_refs'},
+                                     'b_cycle1': {'b_cycle2'},
+                                     'b_cycle2': {'b_cycle1'}}
+
+    def test_plan_deletion(self):
+        tree = PackageTree(root='root',
+                           packages={'a': 1, 'b': 1, 'a1': 2},
+                           entity_types=['a1_refs', 'a_child', 'root_base'],
+                           dependencies={'root_base': {'a_child'}, 'a_child': {'a1_refs'}})
+
+        steps = package_tree.plan_deletion(tree, include_root=False)
+
+        assert steps == [DeletionStep(ResourceType.ENTITY_TYPE, ['a1_refs']),
+                         DeletionStep(ResourceType.ENTITY_TYPE, ['a_child']),
+                         DeletionStep(ResourceType.ENTITY_TYPE, ['root_base']),
+                         DeletionStep(ResourceType.PACKAGE, ['a1']),
+                         DeletionStep(ResourceType.PACKAGE, ['a', 'b'])]
+
+    def test_plan_deletion_cycle(self):
+        tree = PackageTree(root='root',
+                           packages={},
+                           entity_types=['free', 'cycle1', 'cycle2'],
+                           dependencies={'cycle1': {'cycle2'}, 'cycle2': {'cycle1'}})
+
+        steps = package_tree.plan_deletion(tree, include_root=True)
+
+        assert steps == [DeletionStep(ResourceType.ENTITY_TYPE, ['free']),
+                         DeletionStep(ResourceType.ENTITY_TYPE, ['cycle1', 'cycle2'], together=True),
+                         DeletionStep(ResourceType.PACKAGE, ['root'])]
+
+    @patch('mcmd.config.config.get', new=lambda *args: {('http', 'max_concurrency'): 2,
+                                                        ('settings', 'batch_size'): 1000}[args])
+    @patch('mcmd.molgenis.bulk.delete_rows')
+    def test_delete(self, delete_rows):
+        package_tree.delete([DeletionStep(ResourceType.ENTITY_TYPE, ['a', 'b', 'c']),
+                             DeletionStep(ResourceType.ENTITY_TYPE, ['d', 'e', 'f'], together=True)])
+
+        delete_rows.assert_any_call('sys_md_EntityType', ['a', 'b', 'c'], batch_size=2)
+        delete_rows.assert_any_call('sys_md_EntityType', ['d', 'e', 'f'], batch_size=3)
+
+    @patch('mcmd.molgenis.paging.query')
+    def test_ids_are_quoted(self, query):
+        query.return_value = iter([])
+
+        package_tree._get_entity_types(['a,b'])
+
+        assert query.call_args[1]['q'] == 'package=in=("a,b")'
@@ -0,0 +1,90 @@
+import threading
+import unittest
+from unittest.mock import patch, MagicMock
+
+import pytest
+
+from mcmd.molgenis.paging import query, query_in, quote
+
+_URL = 'http://localhost/api/v2/sys_sec_User'
+
+
+def _response(items, next_href=None):
+    response = MagicMock()
+    response.json.return_value = {'items': items}
+    if next_href:
+        response.json.return_value['nextHref'] = next_href
+    return response
+
+
+_PAGES = [_response([{'id': 1}, {'id': 2}], next_href=_URL + '?num=2&start=2'),
+          _response([{'id': 3}, {'id': 4}], next_href=_URL + '?num=2&start=4'),
+          _response([{'id': 5}])]
+
+
+@pytest.mark.unit
+@patch('mcmd.molgenis.api.rest2', new=MagicMock(return_value=_URL))
+class PagingTest(unittest.TestCase):
+
+    @patch('mcmd.molgenis.paging.get')
+    def test_query_follows_pages(self, get):
+        get.side_effect = _PAGES
+
+        rows = list(query('sys_sec_User', q='active==true', attrs='id', page_size=2))
+
+        assert [row['id'] for row in rows] == [1, 2, 3, 4, 5]
+        get.assert_any_call(_URL, params={'num': 2, 'q': 'active==true', 'attrs': 'id'})
+        get.assert_any_call(_URL + '?num=2&start=2', params=None)
+        get.assert_any_call(_URL + '?num=2&start=4', params=None)
+
+    @patch('mcmd.molgenis.paging.get')
+    def test_query_is_lazy(self, get):
+        get.side_effect = _PAGES
+
+        rows = query('sys_sec_User', page_size=2)
+        next(rows)
+        next(rows)
+
+        get.assert_called_once()
+
+    @patch('mcmd.molgenis.paging.get')
+    def test_query_prefetch(self, get):
+        requested = threading.Event()
+
+        def get_page(url, params):
+            if get.call_count == 2:
+                requested.set()
+            return _PAGES[get.call_count - 1]
+
+        get.side_effect = get_page
+
+        rows = query('sys_sec_User', page_size=2, prefetch=True)
+        next(rows)
+
+        # the second page is requested while the first page is being processed
+        assert requested.wait(timeout=5)
+        assert [row['id'] for row in rows] == [2, 3, 4, 5]
+
+    def test_query_max_page_size(self):
+        with patch('mcmd.molgenis.paging.get') as get:
+            get.return_value = _response([])
+            list(query('sys_sec_User', page_size=50000))
+
+            assert get.call_args[1]['params']['num'] == 10000
+
+    @patch('mcmd.molgenis.paging.get')
+    def test_query_in_chunks(self, get):
+        get.side_effect = [_response([{'id': 1}]), _response([{'id': 2}])]
+        values = ['user{}'.format(i) for i in range(150)]
+
+        rows = list(query_in('sys_sec_User', 'username', values, q='active==true,superuser==true', attrs='id'))
+
+        assert rows == [{'id': 1}, {'id': 2}]
+        first_query = get.call_args_list[0][1]['params']['q']
+        assert first_query.startswith('username=in=("user0","user1",')
+        assert first_query.endswith('"user99");(active==true,superuser==true)')
+        assert get.call_args_list[1][1]['params']['q'].startswith('username=in=("user100",')
+
+    def test_quote(self):
+        assert quote('a,b') == '"a,b"'
+        assert quote('say "hi"') == '"say \\"hi\\""'
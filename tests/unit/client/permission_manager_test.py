@@ -0,0 +1,26 @@
+import unittest
+from unittest.mock import patch
+
+import pytest
+
+from mcmd.molgenis.principals import PrincipalType
+from mcmd.molgenis.resources import ResourceType
+from mcmd.molgenis.security import permission_manager
+from mcmd.molgenis.security.permission import Permission
+
+
+@pytest.mark.unit
+@patch('mcmd.molgenis.api.permission_manager_permissions', new=lambda: 'http://localhost/permissionmanager/update/')
+class GrantPermissionsTest(unittest.TestCase):
+
+    @patch('mcmd.molgenis.security.permission_manager.post_form')
+    def test_grant_permissions_in_one_form(self, post_form):
+        permission_manager.grant_permissions(PrincipalType.USER, 'john', ResourceType.ENTITY_TYPE,
+                                             {'samples': Permission.EDIT, 'persons': Permission.VIEW,
+                                              'biobanks': Permission.NONE})
+
+        post_form.assert_called_once_with('http://localhost/permissionmanager/update/entityclass/user',
+                                          {'radio-samples': 'write',
+                                           'radio-persons': 'read',
+                                           'radio-biobanks': 'none',
+                                           'username': 'john'})
@@ -0,0 +1,173 @@
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+from mcmd.core.errors import McmdError
+from mcmd.molgenis.principals import PrincipalType
+from mcmd.molgenis.resources import ResourceType
+from mcmd.molgenis.security import permission_matrix
+from mcmd.molgenis.security.permission import Permission
+from mcmd.molgenis.security.permission_matrix import Grant
+
+_USER = PrincipalType.USER
+_ROLE = PrincipalType.ROLE
+_ENTITY_TYPE = ResourceType.ENTITY_TYPE
+_PACKAGE = ResourceType.PACKAGE
+
+
+@pytest.mark.unit
+class ReadGrantsTest(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.folder.cleanup()
+
+    def _write(self, name, content):
+        path = Path(self.folder.name).joinpath(name)
+        path.write_text(content)
+        return path
+
+    def test_read_yaml(self):
+        path = self._write('permissions.yaml',
+                           'roles:\n'
+                           '  biobank_EDITOR:\n'
+                           '    entity-types:\n'
+                           '      biobank_samples: write\n'
+                           '    packages:\n'
+                           '      biobank: read\n'
+                           'users:\n'
+                           '  john:\n'
+                           '    resources:\n'
+                           '      dataexplorer: none\n')
+
+        grants = permission_matrix.read_grants(path)
+
+        assert grants == [
+            Grant('role biobank_EDITOR: biobank_samples', 'biobank_EDITOR', Permission.WRITE, 'biobank_samples',
+                  _ROLE, _ENTITY_TYPE),
+            Grant('role biobank_EDITOR: biobank', 'biobank_EDITOR', Permission.READ, 'biobank', _ROLE, _PACKAGE),
+            Grant('user john: dataexplorer', 'john', Permission.NONE, 'dataexplorer', _USER, None)]
+
+    def test_read_yaml_unknown_section(self):
+        path = self._write('permissions.yml', 'roles:\n  EDITOR:\n    tables:\n      samples: write\n')
+
+        with pytest.raises(McmdError) as e:
+            permission_matrix.read_grants(path)
+        assert e.value.message == 'Unknown section tables (expected entity-types, packages, plugins, resources)'
+
+    def test_read_csv(self):
+        path = self._write('permissions.csv',
+                           'principal,permission,resource,principal_type,resource_type\n'
+                           'EDITOR,edit,samples,role,entity-type\n'
+                           'john,count,biobank,,\n')
+
+        grants = permission_matrix.read_grants(path)
+
+        assert grants == [Grant('line 2', 'EDITOR', Permission.WRITE, 'samples', _ROLE, _ENTITY_TYPE),
+                          Grant('line 3', 'john', Permission.COUNT, 'biobank', None, None)]
+
+    def test_read_csv_unknown_permission(self):
+        path = self._write('permissions.csv', 'principal,permission,resource\njohn,everything,biobank\n')
+
+        with pytest.raises(McmdError) as e:
+            permission_matrix.read_grants(path)
+        assert e.value.message == 'Unknown permission everything on line 2'
+
+
+@pytest.mark.unit
+@patch('mcmd.molgenis.security.permission_matrix.to_role_name', new=lambda name: name)
+@patch('mcmd.molgenis.security.permission_matrix.config.get', new=lambda section, key: 4)
+class GetChangesTest(unittest.TestCase):
+
+    @staticmethod
+    def _current(resource_type, principal_type, principals):
+        current = {(_PACKAGE, _ROLE): {('biobank', 'EDITOR'): Permission.READ},
+                   (_ENTITY_TYPE, _USER): {('samples', 'john'): Permission.WRITE,
+                                           ('other', 'john'): Permission.READ}}
+        return current.get((resource_type, principal_type), dict())
+
+    @patch('mcmd.molgenis.security.permission_matrix._find_resources')
+    @patch('mcmd.molgenis.security.permission_matrix._find_principals')
+    @patch('mcmd.molgenis.security.permission_matrix.security.get_all_permissions')
+    def test_changes(self, get_all_permissions, find_principals, find_resources):
+        get_all_permissions.side_effect = self._current
+        find_principals.return_value = {'EDITOR': [_ROLE], 'john': [_USER]}
+        find_resources.return_value = {'biobank': [_PACKAGE], 'samples': [_ENTITY_TYPE], 'other': [_ENTITY_TYPE]}
+        grants = [Grant('line 2', 'EDITOR', Permission.READ, 'biobank'),
+                  Grant('line 3', 'EDITOR', Permission.WRITE, 'samples'),
+                  Grant('line 4', 'john', Permission.EDIT, 'samples'),
+                  Grant('line 5', 'john', Permission.NONE, 'biobank'),
+                  Grant('line 6', 'john', Permission.READ, 'other')]
+
+        changes = permission_matrix.get_changes(grants)
+
+        assert changes.changes == [Grant('line 3', 'EDITOR', Permission.WRITE, 'samples', _ROLE, _ENTITY_TYPE)]
+        assert changes.num_unchanged == 4
+        assert changes.failed == []
+        # once per resource and principal type, not per resource
+        assert get_all_permissions.call_count == 4
+        get_all_permissions.assert_any_call(_ENTITY_TYPE, _USER, ['john'])
+
+    @patch('mcmd.molgenis.security.permission_matrix._find_resources')
+    @patch('mcmd.molgenis.security.permission_matrix._find_principals')
+    @patch('mcmd.molgenis.security.permission_matrix.security.get_all_permissions')
+    def test_current_permissions_unknown(self, get_all_permissions, find_principals, find_resources):
+        get_all_permissions.return_value = None
+        find_principals.return_value = {'EDITOR': [_ROLE]}
+        find_resources.return_value = {'biobank': [_PACKAGE]}
+
+        changes = permission_matrix.get_changes([Grant('line 2', 'EDITOR', Permission.READ, 'biobank')])
+
+        assert changes.changes == [Grant('line 2', 'EDITOR', Permission.READ, 'biobank', _ROLE, _PACKAGE)]
+        assert changes.num_unchanged == 0
+
+    @patch('mcmd.molgenis.security.permission_matrix._find_resources')
+    @patch('mcmd.molgenis.security.permission_matrix._find_principals')
+    @patch('mcmd.molgenis.security.permission_matrix.security.get_all_permissions')
+    def test_failed_grants(self, get_all_permissions, find_principals, find_resources):
+        get_all_permissions.side_effect = self._current
+        find_principals.return_value = {'EDITOR': [_ROLE], 'biobank': [_USER, _ROLE]}
+        find_resources.return_value = {'biobank': [_PACKAGE]}
+        grants = [Grant('line 2', 'unknown', Permission.READ, 'biobank'),
+                  Grant('line 3', 'EDITOR', Permission.READ, 'biobank', resource_type=_ENTITY_TYPE),
+                  Grant('line 4', 'biobank', Permission.READ, 'biobank'),
+                  Grant('line 5', 'EDITOR', Permission.WRITE, 'biobank'),
+                  Grant('line 6', 'EDITOR', Permission.COUNT, 'biobank')]
+
+        changes = permission_matrix.get_changes(grants)
+
+        assert changes.failed == [('line 2', 'No user or role found with id unknown'),
+                                  ('line 3', 'No entity type found with id biobank'),
+                                  ('line 4', 'Id biobank is ambiguous (user, role): specify the type'),
+                                  ('line 6', 'Conflicts with an earlier write permission')]
+        assert [grant.label for grant in changes.changes] == ['line 5']
+
+
+@pytest.mark.unit
+@patch('mcmd.molgenis.security.permission_matrix.config.get', new=lambda section, key: 4)
+class ApplyTest(unittest.TestCase):
+
+    @patch('mcmd.molgenis.security.permission_matrix.security.grant_permissions')
+    def test_one_request_per_principal_and_resource_type(self, grant_permissions):
+        def grant(principal_type, principal, resource_type, permissions):
+            if principal == 'jan':
+                raise McmdError('Unknown user jan')
+
+        grant_permissions.side_effect = grant
+        changes = [Grant('line 2', 'EDITOR', Permission.WRITE, 'samples', _ROLE, _ENTITY_TYPE),
+                   Grant('line 3', 'jan', Permission.READ, 'biobank', _USER, _PACKAGE),
+                   Grant('line 4', 'EDITOR', Permission.READ, 'persons', _ROLE, _ENTITY_TYPE),
+                   Grant('line 5', 'EDITOR', Permission.READ, 'biobank', _ROLE, _PACKAGE),
+                   Grant('line 6', 'jan', Permission.NONE, 'other', _USER, _PACKAGE)]
+
+        failed = permission_matrix.apply(changes)
+
+        assert grant_permissions.call_count == 3
+        grant_permissions.assert_any_call(_ROLE, 'EDITOR', _ENTITY_TYPE, {'samples': Permission.WRITE,
+                                                                          'persons': Permission.READ})
+        assert failed == [('line 3', 'Unknown user jan'), ('line 6', 'Unknown user jan')]
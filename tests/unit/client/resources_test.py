@@ -0,0 +1,73 @@
+import unittest
+from unittest.mock import patch
+
+import pytest
+
+from mcmd.core.errors import McmdError
+from mcmd.molgenis.principals import PrincipalType, detect_principal_type
+from mcmd.molgenis.resources import ResourceType, detect_resource_type, find_types_of_resources
+
+_TYPES = [ResourceType.ENTITY_TYPE, ResourceType.PACKAGE, ResourceType.PLUGIN]
+
+
+@pytest.mark.unit
+class DetectResourceTypeTest(unittest.TestCase):
+
+    @patch('mcmd.molgenis.resources.resource_exists')
+    def test_detect_one(self, resource_exists):
+        resource_exists.side_effect = lambda _, resource_type: resource_type == ResourceType.PACKAGE
+
+        assert detect_resource_type('test', _TYPES) == ResourceType.PACKAGE
+        assert resource_exists.call_count == 3
+
+    @patch('mcmd.molgenis.resources.resource_exists')
+    def test_detect_none(self, resource_exists):
+        resource_exists.return_value = False
+
+        with self.assertRaises(McmdError):
+            detect_resource_type('test', _TYPES)
+
+    @patch('mcmd.molgenis.resources.multi_choice')
+    @patch('mcmd.molgenis.resources.resource_exists')
+    def test_detect_multiple(self, resource_exists, multi_choice):
+        resource_exists.side_effect = lambda _, resource_type: resource_type != ResourceType.PACKAGE
+        multi_choice.return_value = 'Plugin'
+
+        assert detect_resource_type('test', _TYPES) == ResourceType.PLUGIN
+        multi_choice.assert_called_once_with('Multiple resources found for test. Choose one:',
+                                             ['Entity Type', 'Plugin'])
+
+
+@pytest.mark.unit
+@patch('mcmd.molgenis.metadata.is_cached', new=lambda table: False)
+class FindTypesOfResourcesTest(unittest.TestCase):
+
+    @patch('mcmd.molgenis.resources.query_in')
+    def test_find_types(self, query_in):
+        existing = {'sys_md_EntityType': ['a', 'b'], 'sys_md_Package': ['b'], 'sys_Plugin': []}
+        query_in.side_effect = lambda table, attribute, ids, attrs: [{'id': id_} for id_ in existing[table]]
+
+        found = find_types_of_resources(['a', 'b', 'c'], _TYPES)
+
+        assert found == {'a': [ResourceType.ENTITY_TYPE], 'b': [ResourceType.ENTITY_TYPE, ResourceType.PACKAGE]}
+        assert query_in.call_count == 3
+
+
+@pytest.mark.unit
+class DetectPrincipalTypeTest(unittest.TestCase):
+
+    @patch('mcmd.molgenis.principals.principal_exists')
+    def test_detect_one(self, principal_exists):
+        principal_exists.side_effect = lambda _, principal_type: principal_type == PrincipalType.ROLE
+
+        assert detect_principal_type('test') == PrincipalType.ROLE
+
+    @patch('mcmd.molgenis.principals.multi_choice')
+    @patch('mcmd.molgenis.principals.principal_exists')
+    def test_detect_multiple(self, principal_exists, multi_choice):
+        principal_exists.return_value = True
+        multi_choice.return_value = 'role'
+
+        assert detect_principal_type('test') == PrincipalType.ROLE
+        multi_choice.assert_called_once_with('Multiple principals found with name test. Choose one:',
+                                             ['user', 'role'])
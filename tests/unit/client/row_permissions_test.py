@@ -0,0 +1,116 @@
+import unittest
+from unittest.mock import patch, MagicMock
+
+import pytest
+
+from mcmd.core.errors import McmdError
+from mcmd.molgenis.principals import PrincipalType
+from mcmd.molgenis.security import permissions_api
+from mcmd.molgenis.security.permission import Permission
+
+_CONFIG = {('settings', 'batch_size'): 2,
+           ('http', 'max_concurrency'): 2}
+
+_EXISTING = {'data': {'objects': [{'id': '1', 'permissions': [{'user': 'john', 'permission': 'READ'}]},
+                                  {'id': '2', 'permissions': [{'user': 'john', 'permission': 'WRITE'}]}]},
+             'page': {'number': 1, 'totalPages': 1}}
+
+
+def _response(body):
+    response = MagicMock()
+    response.json.return_value = body
+    return response
+
+
+@pytest.mark.unit
+@patch('mcmd.config.config.get', new=lambda *args: _CONFIG[args])
+@patch('mcmd.molgenis.api.permissions', new=lambda: 'http://localhost/api/permissions/')
+@patch('mcmd.io.io.progress', new=MagicMock())
+class GrantRowPermissionsTest(unittest.TestCase):
+
+    @patch('mcmd.molgenis.security.permissions_api.delete')
+    @patch('mcmd.molgenis.security.permissions_api.patch')
+    @patch('mcmd.molgenis.security.permissions_api.post')
+    @patch('mcmd.molgenis.security.permissions_api.get')
+    def test_grant_in_batches(self, get, post, patch_, delete):
+        get.return_value = _response(_EXISTING)
+
+        changes = permissions_api.grant_row_permissions(PrincipalType.USER, 'john', 'persons',
+                                                        ['1', '2', '3', '4', '5'], Permission.WRITE)
+
+        assert get.call_count == 1
+        assert 'q=user%3D%3D%22john%22' in get.call_args[0][0]
+        posted = sorted([obj['objectId'] for obj in call[1]['data']['objects']] for call in post.call_args_list)
+        assert posted == [['3', '4'], ['5']]
+        assert patch_.call_args[1]['data'] == {'objects': [{'objectId': '1',
+                                                            'permissions': [{'user': 'john',
+                                                                             'permission': 'WRITE'}]}]}
+        delete.assert_not_called()
+        assert (changes.added, changes.updated, changes.removed, changes.unchanged) == (3, 1, 0, 1)
+        assert changes.failed == []
+
+    @patch('mcmd.molgenis.security.permissions_api.delete')
+    @patch('mcmd.molgenis.security.permissions_api.post')
+    @patch('mcmd.molgenis.security.permissions_api.get')
+    def test_remove(self, get, post, delete):
+        get.return_value = _response(_EXISTING)
+
+        changes = permissions_api.grant_row_permissions(PrincipalType.USER, 'john', 'persons', ['1', '2', '3'],
+                                                        Permission.NONE)
+
+        post.assert_not_called()
+        assert sorted(call[0][0] for call in delete.call_args_list) == [
+            'http://localhost/api/permissions/entity-persons/1',
+            'http://localhost/api/permissions/entity-persons/2']
+        assert (changes.removed, changes.unchanged) == (2, 1)
+
+    @patch('mcmd.molgenis.security.permissions_api.post')
+    @patch('mcmd.molgenis.security.permissions_api.get')
+    def test_read_existing_permissions_in_pages(self, get, post):
+        get.side_effect = [
+            _response({'data': {'objects': [{'id': '1', 'permissions': [{'user': 'john', 'permission': 'READ'}]}]},
+                       'page': {'number': 1, 'totalPages': 2}}),
+            _response({'data': {'objects': [{'id': '2', 'permissions': [{'user': 'john', 'permission': 'READ'}]}]},
+                       'page': {'number': 2, 'totalPages': 2}})]
+
+        changes = permissions_api.grant_row_permissions(PrincipalType.USER, 'john', 'persons', ['1', '2', '3'],
+                                                        Permission.READ)
+
+        assert get.call_count == 2
+        assert 'page=2' in get.call_args[0][0]
+        assert (changes.added, changes.unchanged) == (1, 2)
+
+    @patch('mcmd.molgenis.security.permissions_api.post')
+    @patch('mcmd.molgenis.security.permissions_api.get')
+    def test_failed_rows(self, get, post):
+        def post_objects(url, data):
+            if any(obj['objectId'] == '4' for obj in data['objects']):
+                raise McmdError('Unknown row 4')
+
+        get.return_value = _response({'data': {'objects': []}})
+        post.side_effect = post_objects
+
+        changes = permissions_api.grant_row_permissions(PrincipalType.USER, 'john', 'persons', ['3', '4', '5'],
+                                                        Permission.READ)
+
+        assert changes.failed == [('4', 'Unknown row 4')]
+        assert changes.added == 3
+
+
+@pytest.mark.unit
+@patch('mcmd.molgenis.api.permissions', new=lambda: 'http://localhost/api/permissions/')
+class GetAllPermissionsTest(unittest.TestCase):
+
+    @patch('mcmd.molgenis.security.permissions_api.get')
+    def test_read_all_resources_of_a_type_in_pages(self, get):
+        pages = [('persons', 'EDITOR', 'READ'), ('samples', 'VIEWER', 'COUNT')]
+        get.side_effect = [_response({'data': {'objects': [{'id': id_, 'permissions': [{'role': role,
+                                                                                        'permission': permission}]}]},
+                                      'page': {'number': number, 'totalPages': 2}})
+                           for number, (id_, role, permission) in enumerate(pages, start=1)]
+
+        permissions = permissions_api.get_all_permissions('entityType', PrincipalType.ROLE, ['EDITOR', 'VIEWER'])
+
+        assert permissions == {('persons', 'EDITOR'): Permission.READ, ('samples', 'VIEWER'): Permission.COUNT}
+        assert get.call_count == 2
+        assert 'q=role%3Din%3D%28%22EDITOR%22%2C%22VIEWER%22%29' in get.call_args[0][0]
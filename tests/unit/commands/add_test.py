@@ -0,0 +1,42 @@
+import unittest
+
+import pytest
+
+from mcmd.commands import add
+
+
+@pytest.mark.unit
+class AddUsersTest(unittest.TestCase):
+
+    def test_read_users(self):
+        rows = [(2, {'username': 'henk', 'email': '', 'active': '', 'superuser': 'yes', 'changePassword': ''}),
+                (3, {'username': 'ingrid', 'email': 'ingrid@example.org', 'active': 'false', 'superuser': '0',
+                     'changePassword': 'true'})]
+        invalid = list()
+
+        users = list(add._read_users(rows, invalid))
+
+        assert users == [('line 2', {'username': 'henk',
+                                     'password_': 'henk',
+                                     'changePassword': False,
+                                     'Email': 'henk@molgenis.org',
+                                     'active': True,
+                                     'superuser': True}),
+                         ('line 3', {'username': 'ingrid',
+                                     'password_': 'ingrid',
+                                     'changePassword': True,
+                                     'Email': 'ingrid@example.org',
+                                     'active': False,
+                                     'superuser': False})]
+        assert invalid == []
+
+    def test_read_users_invalid_rows(self):
+        rows = [(2, {'username': '', 'active': 'true'}),
+                (3, {'username': 'henk', 'active': 'maybe'}),
+                (4, {'username': 'ingrid', 'active': ''})]
+        invalid = list()
+
+        users = list(add._read_users(rows, invalid))
+
+        assert [label for label, _ in users] == ['line 4']
+        assert invalid == [('line 2', 'No username'), ('line 3', 'Not a boolean: maybe')]
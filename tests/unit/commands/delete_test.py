@@ -0,0 +1,38 @@
+import unittest
+from argparse import Namespace
+from unittest.mock import patch
+
+import pytest
+
+from mcmd.commands import delete
+from mcmd.core.errors import McmdError
+
+
+@pytest.mark.unit
+@patch('mcmd.io.io.start')
+@patch('mcmd.commands.delete.import_ledger')
+@patch('mcmd.commands.delete.metadata')
+@patch('mcmd.commands.delete.bulk')
+class DeleteTest(unittest.TestCase):
+
+    @patch('mcmd.io.ask.confirm', return_value=False)
+    def test_declined_delete_keeps_imports(self, _, bulk, __, ledger, ___):
+        delete._delete_entity_type(Namespace(resource='it_emx_person', force=False))
+
+        bulk.delete_rows.assert_not_called()
+        ledger.clear.assert_not_called()
+
+    @patch('mcmd.io.ask.confirm', return_value=True)
+    def test_delete_forgets_imports(self, _, bulk, __, ledger, ___):
+        delete._delete_entity_type(Namespace(resource='it_emx_person', force=False))
+
+        bulk.delete_rows.assert_called_once()
+        ledger.clear.assert_called_once()
+
+    def test_failed_delete_keeps_imports(self, bulk, _, ledger, __):
+        bulk.delete_rows.side_effect = McmdError('Entity type is still referenced')
+
+        with self.assertRaises(McmdError):
+            delete._delete_entity_type(Namespace(resource='it_emx_person', force=True))
+
+        ledger.clear.assert_not_called()
@@ -1,10 +1,15 @@
+import tempfile
+import threading
 import unittest
-from unittest.mock import patch
+from pathlib import Path
+from unittest.mock import patch, MagicMock
 
 import pytest
 
 from mcmd.commands import import_
+from mcmd.core.errors import McmdError
 from mcmd.github.client import Attachment
+from mcmd.utils.emx import EmxDependencies
 
 
 @pytest.mark.unit
@@ -31,3 +36,166 @@ class ImportMethodsTest(unittest.TestCase):
         a3 = Attachment('url/1234/other_file.xlsx')
         ret = import_._create_attachment_map([a1, a2, a3])
         self.assertEqual(ret, {'1234/file.xlsx': a1, '4567/file.xlsx': a2, 'other_file.xlsx': a3})
+
+
+def _config(section, key):
+    return {('http', 'max_concurrency'): 4}[(section, key)]
+
+
+@pytest.mark.unit
+@patch('mcmd.io.io.progress')
+@patch('mcmd.config.config.get', side_effect=_config)
+class ImportJobsTest(unittest.TestCase):
+
+    @staticmethod
+    def _job(name, order, result='FINISHED', defines=(), references=()):
+        def run():
+            order.append(name)
+            if result == 'FAILED':
+                raise McmdError('Import of {} failed'.format(name))
+            return import_._ImportResult(result)
+
+        return import_._ImportJob(name=name,
+                                  run=run,
+                                  dependencies=EmxDependencies(defines=frozenset(defines),
+                                                               references=frozenset(references)))
+
+    def test_run_jobs_in_dependency_order(self, _, __):
+        order = list()
+        jobs = [self._job('person', order, defines={'base_person'}, references={'geo_country', 'base'}),
+                self._job('country', order, defines={'geo_country'}, references={'geo'}),
+                self._job('geo', order, defines={'geo'}),
+                self._job('base', order, defines={'base'})]
+
+        results = import_._run_jobs(jobs)
+
+        assert [result.status for result in results.values()] == ['FINISHED'] * 4
+        assert order.index('geo') < order.index('country') < order.index('person')
+        assert order.index('base') < order.index('person')
+
+    def test_run_jobs_concurrently(self, _, __):
+        barrier = threading.Barrier(3, timeout=5)
+        jobs = [import_._ImportJob(name=str(i), run=lambda: barrier.wait() is not None and import_._ImportResult(
+            'FINISHED')) for i in range(3)]
+
+        # would time out if the jobs were run one after the other
+        results = import_._run_jobs(jobs)
+
+        assert len(results) == 3
+
+    def test_skip_dependents_of_failed_job(self, _, __):
+        order = list()
+        jobs = [self._job('country', order, result='FAILED', defines={'geo_country'}),
+                self._job('person', order, references={'geo_country'}),
+                self._job('other', order)]
+
+        results = import_._run_jobs(jobs)
+
+        assert results[0] == import_._ImportResult('FAILED', 'Import of country failed', results[0].seconds)
+        assert results[1].status == 'SKIPPED'
+        assert results[1].message == 'Depends on country'
+        assert results[2].status == 'FINISHED'
+        assert 'person' not in order
+
+    def test_run_jobs_with_cyclic_dependencies(self, _, __):
+        order = list()
+        jobs = [self._job('a', order, defines={'a'}, references={'b'}),
+                self._job('b', order, defines={'b'}, references={'a'})]
+
+        results = import_._run_jobs(jobs)
+
+        assert [result.status for result in results.values()] == ['FINISHED', 'FINISHED']
+        assert order == ['a', 'b']
+
+    @patch('mcmd.io.io.start')
+    def test_import_all_fails_with_summary(self, _, __, ___):
+        order = list()
+        jobs = [self._job('country.xlsx', order, result='FAILED'),
+                self._job('person.xlsx', order)]
+
+        with self.assertRaises(McmdError) as context:
+            import_._import_all(jobs)
+
+        assert context.exception.message == '1 of 2 imports did not succeed'
+        assert 'country.xlsx  FAILED' in context.exception.info
+        assert 'person.xlsx   FINISHED' in context.exception.info
+
+
+@pytest.mark.unit
+@patch('mcmd.utils.backoff.time.sleep')
+@patch('mcmd.config.config.get', side_effect=lambda section, key: {('polling', 'initial_interval'): 0.5,
+                                                                   ('polling', 'max_interval'): 10,
+                                                                   ('polling', 'timeout'): 0}[(section, key)])
+class PollImportRunTest(unittest.TestCase):
+
+    @patch('mcmd.io.io.update')
+    @patch('mcmd.commands.import_.get')
+    def test_poll_for_completion(self, get, update, _, __):
+        runs = [{'status': 'RUNNING', 'progress': 0},
+                {'status': 'RUNNING', 'progress': 500},
+                {'status': 'FAILED', 'progress': 500, 'message': 'Unknown attribute'}]
+        get.side_effect = [MagicMock(json=MagicMock(return_value=run)) for run in runs]
+
+        status, message = import_._poll_for_completion('http://localhost/api/v2/sys_ImportRun/1')
+
+        assert (status, message) == ('FAILED', 'Unknown attribute')
+        assert get.call_count == 3
+        update.assert_called_once_with('(500 rows imported)')
+
+
+@pytest.mark.unit
+@patch('mcmd.commands.import_.import_ledger')
+@patch('mcmd.commands.import_.post_file')
+class SkipUnchangedTest(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+        self.addCleanup(self.folder.cleanup)
+        self.file = Path(self.folder.name).joinpath('data.xlsx')
+        self.file.write_bytes(b'data')
+
+    def test_skip_unchanged(self, post_file, ledger):
+        ledger.is_imported.return_value = True
+
+        result = import_._import_file(self.file, 'base', None, 'add', skip_unchanged=True)
+
+        assert result.status == 'UNCHANGED'
+        assert result.succeeded()
+        post_file.assert_not_called()
+
+    @patch('mcmd.commands.import_._invalidate_metadata')
+    @patch('mcmd.commands.import_._poll_for_completion', return_value=('FINISHED', ''))
+    @patch('mcmd.config.config.get', return_value='http://localhost/')
+    def test_record_import(self, _, __, ___, post_file, ledger):
+        ledger.hash_file.return_value = 'abc'
+        ledger.is_imported.return_value = False
+        post_file.return_value.text = '/api/v2/sys_ImportRun/1'
+
+        result = import_._import_file(self.file, 'base', None, 'add', skip_unchanged=True)
+
+        assert result.status == 'FINISHED'
+        post_file.assert_called_once()
+        ledger.record.assert_called_once_with('abc', 'data.xlsx', 'add', 'base', None)
+
+    @patch('mcmd.commands.import_._invalidate_metadata')
+    @patch('mcmd.commands.import_._poll_for_completion', return_value=('FAILED', 'error'))
+    @patch('mcmd.config.config.get', return_value='http://localhost/')
+    def test_no_hash_without_skip_unchanged(self, _, __, ___, post_file, ledger):
+        post_file.return_value.text = '/api/v2/sys_ImportRun/1'
+
+        import_._import_file(self.file, 'base', None, 'add')
+
+        ledger.hash_file.assert_not_called()
+        ledger.record.assert_not_called()
+
+    @patch('mcmd.commands.import_._invalidate_metadata')
+    @patch('mcmd.commands.import_._poll_for_completion', return_value=('FINISHED', ''))
+    @patch('mcmd.config.config.get', return_value='http://localhost/')
+    def test_hash_once(self, _, __, ___, post_file, ledger):
+        ledger.hash_file.return_value = 'abc'
+        ledger.is_imported.return_value = False
+        post_file.return_value.text = '/api/v2/sys_ImportRun/1'
+
+        import_._import_file(self.file, 'base', None, 'add', skip_unchanged=True)
+
+        ledger.hash_file.assert_called_once()
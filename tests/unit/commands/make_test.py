@@ -0,0 +1,59 @@
+import unittest
+from unittest.mock import patch
+
+import pytest
+
+from mcmd.commands import make
+from mcmd.molgenis.system import User, Role, Group, RoleMembership
+
+_GROUP = Group('g1', 'gcc')
+_USERS = {'henk': User('u1', 'henk'), 'ingrid': User('u2', 'ingrid'), 'jan': User('u3', 'jan')}
+_ROLES = {'gcc_EDITOR': Role('r1', 'gcc_EDITOR', 'Editor', _GROUP),
+          'gcc_VIEWER': Role('r2', 'gcc_VIEWER', 'Viewer', _GROUP),
+          'COUNTER': Role('r3', 'COUNTER', 'Counter')}
+
+
+@pytest.mark.unit
+@patch('mcmd.commands.make.timestamp', new=lambda: '2020-01-01T00:00:00')
+@patch('mcmd.commands.make.to_role_name', new=lambda name: name)
+class MembershipChangesTest(unittest.TestCase):
+
+    def test_add_memberships(self):
+        rows = [('line 2', 'henk', 'gcc_EDITOR'),
+                ('line 3', 'henk', 'COUNTER')]
+
+        changes = make._get_membership_changes(rows, _USERS, _ROLES, [])
+
+        assert changes.additions == [('line 2', {'user': 'u1', 'role': 'r1', 'from': '2020-01-01T00:00:00'}),
+                                     ('line 3', {'user': 'u1', 'role': 'r3', 'from': '2020-01-01T00:00:00'})]
+        assert changes.updates == []
+        assert changes.failed == []
+
+    def test_update_group_role(self):
+        memberships = [RoleMembership('m1', _USERS['henk'], _ROLES['gcc_VIEWER']),
+                       RoleMembership('m2', _USERS['ingrid'], _ROLES['gcc_EDITOR']),
+                       RoleMembership('m3', _USERS['ingrid'], _ROLES['COUNTER'])]
+        rows = [('line 2', 'henk', 'gcc_EDITOR'),
+                ('line 3', 'ingrid', 'gcc_EDITOR'),
+                ('line 4', 'ingrid', 'COUNTER')]
+
+        changes = make._get_membership_changes(rows, _USERS, _ROLES, memberships)
+
+        assert changes.additions == []
+        assert changes.updates == [('line 2', {'id': 'm1', 'role': 'r1'})]
+        assert changes.num_unchanged == 2
+
+    def test_failed_rows(self):
+        rows = [('line 2', 'unknown', 'gcc_EDITOR'),
+                ('line 3', 'henk', 'unknown'),
+                ('line 4', 'jan', 'gcc_EDITOR'),
+                ('line 5', 'jan', 'gcc_VIEWER'),
+                ('line 6', 'jan', 'gcc_EDITOR')]
+
+        changes = make._get_membership_changes(rows, _USERS, _ROLES, [])
+
+        assert changes.failed == [('line 2', 'Unknown user unknown'),
+                                  ('line 3', 'No role found with name unknown'),
+                                  ('line 5', 'User jan is also made gcc_EDITOR of group gcc')]
+        assert [label for label, _ in changes.additions] == ['line 4']
+        assert changes.num_unchanged == 1
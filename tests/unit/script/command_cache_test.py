@@ -0,0 +1,78 @@
+import tempfile
+import unittest
+from argparse import Namespace
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+from mcmd.commands import ping
+from mcmd.script import command_cache, script_runner
+from mcmd.script.options import ScriptOptions
+from mcmd.script.parser import script_parser
+
+
+@pytest.mark.unit
+class CommandCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+        self.addCleanup(self.folder.cleanup)
+        self.cache = Path(self.folder.name)
+
+        context_patcher = patch('mcmd.core.cache.context')
+        context_patcher.start().return_value.get_cache_folder.return_value = self.cache
+        self.addCleanup(context_patcher.stop)
+
+    def test_store_and_load(self):
+        args = Namespace(command='ping', func=ping.ping, as_user=None, write_to_history=True)
+
+        cached = command_cache.load(['ping'])
+        cached.put(1, 'ping', args)
+        cached.store()
+
+        loaded = command_cache.load(['ping']).get(1, 'ping')
+        assert loaded == args
+        assert loaded.func is ping.ping
+
+    def test_other_script_or_command(self):
+        cached = command_cache.load(['ping'])
+        cached.put(1, 'ping', Namespace(command='ping', func=ping.ping))
+        cached.store()
+
+        assert command_cache.load(['ping', 'ping']).get(1, 'ping') is None
+        assert command_cache.load(['ping']).get(1, 'ping --as-user admin') is None
+
+    def test_clear(self):
+        cached = command_cache.load(['ping'])
+        cached.put(1, 'ping', Namespace(command='ping', func=ping.ping))
+        cached.store()
+
+        command_cache.clear()
+
+        assert command_cache.load(['ping']).get(1, 'ping') is None
+
+    def test_runtime_values_not_cached(self):
+        lines = ["$value host = 'localhost'",
+                 "$input pass password",
+                 "$value user = 'admin:{{password}}'",
+                 "ping {{host}}",
+                 "ping {{user}}"]
+        script = script_parser.parse(lines)
+        options = ScriptOptions(arguments={'password': 'secret'})
+
+        def parse_args(argv):
+            return Namespace(command='ping', func=lambda args, nested: None, as_user=None, argv=argv)
+
+        with patch('mcmd.script.script_runner.arg_parser.parse_args', side_effect=parse_args), \
+                patch('mcmd.script.command_cache._serialize', new=lambda args: {'argv': args.argv}), \
+                patch('mcmd.script.command_cache._deserialize', new=lambda values: parse_args(values['argv'])):
+            script_runner.run(script, options, command_cache.load(lines))
+            assert script_runner.arg_parser.parse_args.call_count == 2
+
+            script_runner.run(script, options, command_cache.load(lines))
+            # the line that uses the password is parsed again
+            assert script_runner.arg_parser.parse_args.call_count == 3
+            script_runner.arg_parser.parse_args.assert_called_with(['ping', 'admin:secret'])
+
+        assert 'secret' not in ''.join(path.read_text() for path in self.cache.iterdir())
@@ -4,7 +4,8 @@ import pytest
 from parsy import ParseError
 
 from mcmd.script.model.statements import Value, Input, Wait, VisibleComment, Command, InvisibleComment, \
-    Empty
+    Empty, ForEach, EndForEach
+from mcmd.script.model.templates import Template
 from mcmd.script.model.types_ import InputType
 # noinspection PyProtectedMember
 from mcmd.script.parser.line_parser import _parse_line
@@ -57,7 +58,7 @@ class LineParserTest(unittest.TestCase):
         with pytest.raises(ParseError) as e:
             _parse_line("$val myValue")
 
-        assert str(e.value) == "expected one of 'input', 'value', 'wait' at 0:1"
+        assert str(e.value) == "expected one of '/foreach', 'foreach', 'input', 'value', 'wait' at 0:1"
 
     @staticmethod
     def test_value_illegal_text():
@@ -159,3 +160,20 @@ class LineParserTest(unittest.TestCase):
         print(command)
         assert isinstance(command, Command)
         assert command.command.string == "mcmd add user {{name}}"
+
+    @staticmethod
+    def test_foreach():
+        foreach = _parse_line('$foreach user in "{{folder}}/users.csv"')
+
+        assert foreach == ForEach(name='user', path=Template('{{folder}}/users.csv'))
+        assert foreach.variables == {'folder'}
+
+    @staticmethod
+    def test_end_foreach():
+        end = _parse_line('$/foreach')
+
+        assert isinstance(end, EndForEach)
+
+    def test_foreach_illegal(self):
+        with self.assertRaises(ParseError):
+            _parse_line('$foreach user "users.csv"')
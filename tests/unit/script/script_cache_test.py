@@ -0,0 +1,61 @@
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+from mcmd.script import script_cache
+from mcmd.script.parser import script_parser
+
+_LINES = ["// invisible",
+          "$value name = 'henk'",
+          "# creating user {{name}}",
+          "$value admin = true",
+          "$value email",
+          "$input pass password : 'password of {{name}}'",
+          "add user {{name}} --set-password {{password}} \\",
+          "         {% if admin %}--is-superuser{% endif %}",
+          "$wait : 'Check the user'",
+          "",
+          "ping",
+          "$foreach user in '{{name}}.csv'",
+          "    # {{user.name}}",
+          "    add user {{user.name}}",
+          "$/foreach"]
+
+
+@pytest.mark.unit
+class ScriptCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+        self.addCleanup(self.folder.cleanup)
+
+        context_patcher = patch('mcmd.core.cache.context')
+        context_patcher.start().return_value.get_cache_folder.return_value = Path(self.folder.name)
+        self.addCleanup(context_patcher.stop)
+
+    def test_store_and_load(self):
+        script = script_parser.parse(_LINES)
+
+        script_cache.store(_LINES, script)
+        loaded = script_cache.load(_LINES)
+
+        assert loaded == script
+        assert loaded.dependencies == script.dependencies
+        command = loaded.lines[6].statement.command
+        assert command.render({'name': 'henk', 'password': 'x', 'admin': True}) == \
+               'add user henk --set-password x --is-superuser'
+
+    def test_other_script(self):
+        script_cache.store(_LINES, script_parser.parse(_LINES))
+
+        assert script_cache.load(_LINES + ['ping']) is None
+
+    def test_clear(self):
+        script_cache.store(_LINES, script_parser.parse(_LINES))
+
+        script_cache.clear()
+
+        assert script_cache.load(_LINES) is None
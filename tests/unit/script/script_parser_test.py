@@ -95,7 +95,7 @@ class ScriptParserTest(unittest.TestCase):
                 assert str(
                     exception.message) == "Line 11: $valu x = 'hoi'\n" \
                                           "          ^\n" \
-                                          "  - Expected one of 'input', 'value', 'wait' at 0:1"
+                                          "  - Expected one of '/foreach', 'foreach', 'input', 'value', 'wait' at 0:1"
             if num == 5:
                 assert str(
                     exception.message) == "Line 13: $input enum type : 'input something!'\n" \
@@ -118,3 +118,75 @@ class ScriptParserTest(unittest.TestCase):
                 assert str(
                     exception.message) == "Line 9: # {{blaat}}\n" \
                                           "  - Unknown value 'blaat'"
+
+    @staticmethod
+    def test_lines_with_dependencies():
+        script = script_parser.parse(["$value a = 'a'",
+                                      "$value b = 'b'",
+                                      "$value c = '{{a}}'",
+                                      "ping",
+                                      "# {{c}}"])
+
+        lines = script.get_lines_with_dependencies(from_line_number=4)
+
+        assert [line.number for line in lines] == [1, 3, 4, 5]
+
+    @staticmethod
+    def test_lines_with_long_dependency_chain():
+        chain_length = 5000
+        script_lines = ["$value v0 = 'start'"]
+        script_lines += ["$value v{} = '{{{{v{}}}}}'".format(i, i - 1) for i in range(1, chain_length)]
+        script_lines += ["# {{{{v{}}}}}".format(chain_length - 1)]
+        script = script_parser.parse(script_lines)
+
+        lines = script.get_lines_with_dependencies(from_line_number=chain_length + 1)
+
+        assert len(lines) == chain_length + 1
+
+    @staticmethod
+    def test_foreach_block():
+        script = script_parser.parse(["$value group = 'biobank'",
+                                      "$foreach user in 'users.csv'",
+                                      "    # {{user.name}}",
+                                      "    make {{user.name}} {{group}}_EDITOR",
+                                      "$/foreach",
+                                      "ping"])
+
+        assert [line.number for line in script.lines] == [1, 2, 6]
+        block = script.lines[1]
+        assert [line.number for line in block.statement.body] == [3, 4]
+        assert block.statement.variables == {'group'}
+        assert script.dependencies[block] == {script.lines[0]}
+
+    def test_foreach_block_errors(self):
+        script_lines = ["$foreach user in 'users.csv'",
+                        "    $value name = 'henk'",
+                        "    ping {{users}}",
+                        "$/foreach",
+                        "$/foreach",
+                        "$foreach user in 'users.csv'"]
+
+        with self.assertRaises(InvalidScriptError) as context:
+            script_parser.parse(script_lines)
+
+        messages = [error.message for error in context.exception.errors]
+        assert messages == ["Line 2: $value name = 'henk'\n"
+                            "  - Only commands and comments are allowed in a $foreach block",
+                            "Line 5: $/foreach\n"
+                            "  - $/foreach without $foreach",
+                            "Line 6: $foreach user in 'users.csv'\n"
+                            "  - $foreach without $/foreach",
+                            "Line 3: ping {{users}}\n"
+                            "  - Unknown value 'users'"]
+
+    @staticmethod
+    def test_lines_with_dependencies_in_block():
+        script = script_parser.parse(["$foreach user in 'users.csv'",
+                                      "    ping",
+                                      "    ping",
+                                      "$/foreach",
+                                      "ping"])
+
+        lines = script.get_lines_with_dependencies(from_line_number=3)
+
+        assert [line.number for line in lines] == [1, 5]
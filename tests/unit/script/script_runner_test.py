@@ -1,9 +1,16 @@
+import tempfile
+import threading
+import time
 import unittest
+from argparse import Namespace
+from pathlib import Path
 from unittest.mock import patch
 
 import pytest
 from testfixtures import log_capture
 
+from mcmd.core.errors import McmdError, ScriptError
+from mcmd.io import io, ask
 from mcmd.script import script_runner
 from mcmd.script.options import ScriptOptions
 from mcmd.script.parser import script_parser
@@ -108,3 +115,204 @@ class ScriptRunnerTest(unittest.TestCase):
         capture.check(
             ('console', 'INFO', 'add user test')
         )
+
+
+@pytest.mark.unit
+class ParallelScriptRunnerTest(unittest.TestCase):
+
+    def setUp(self):
+        self.events = list()
+        self.lock = threading.Lock()
+        self.funcs = dict()
+
+    def _parse_args(self, argv):
+        return Namespace(command=argv[0], as_user=None, func=self.funcs.get(argv[0], self._command(argv[0])))
+
+    def _command(self, name, seconds=0.0, fail=False):
+        def func(args, nested):
+            with self.lock:
+                self.events.append('start ' + name)
+            time.sleep(seconds)
+            io.warn(name)
+            with self.lock:
+                self.events.append('end ' + name)
+            if fail:
+                raise McmdError('{} failed'.format(name))
+
+        return func
+
+    def _run(self, script_lines, parallel=3, exit_on_error=True):
+        script = script_parser.parse(script_lines)
+        options = ScriptOptions(exit_on_error=exit_on_error, parallel=parallel)
+        with patch('mcmd.script.script_runner.arg_parser.parse_args', side_effect=self._parse_args):
+            script_runner.run(script, options)
+
+    @log_capture()
+    def test_commands_run_in_parallel(self, capture):
+        barrier = threading.Barrier(3, timeout=5)
+        for name in ['a', 'b', 'c']:
+            self.funcs[name] = lambda args, nested, name_=name: (barrier.wait(), io.warn(name_))
+
+        self._run(['a', 'b', 'c'])
+
+        # the output is shown in the order of the script
+        capture.check(('console', 'WARNING', '  a'),
+                      ('console', 'WARNING', '  b'),
+                      ('console', 'WARNING', '  c'))
+
+    @log_capture()
+    def test_sync_comment_is_barrier(self, capture):
+        self.funcs['a'] = self._command('a', seconds=0.2)
+
+        self._run(['a', '// sync', 'b'])
+
+        assert self.events == ['start a', 'end a', 'start b', 'end b']
+
+    @log_capture()
+    def test_confirmation_runs_in_main_thread(self, capture):
+        self.funcs['a'] = self._command('a', seconds=0.2)
+        self.funcs['delete'] = lambda args, nested: self.events.append(threading.current_thread())
+        parse_args = self._parse_args
+        self._parse_args = lambda argv: Namespace(force=False, **vars(parse_args(argv)))
+
+        self._run(['a', 'delete', 'b'])
+
+        assert self.events[:3] == ['start a', 'end a', threading.main_thread()]
+
+    @patch('questionary.confirm')
+    def test_no_questions_in_parallel(self, confirm):
+        self.funcs['a'] = lambda args, nested: ask.confirm('Are you sure?')
+
+        with self.assertRaises(ScriptError) as context:
+            self._run(['a'])
+
+        assert context.exception.message == "Can't ask for input while running in parallel"
+        confirm.return_value.ask.assert_not_called()
+
+    @log_capture()
+    def test_error_stops_script(self, capture):
+        self.funcs['a'] = self._command('a', fail=True)
+        self.funcs['b'] = self._command('b', seconds=0.2)
+
+        with self.assertRaises(ScriptError) as context:
+            self._run(['b', 'a', '// sync', 'c'])
+
+        assert context.exception.line == 2
+        assert 'start c' not in self.events
+        capture.check(('console', 'WARNING', '  b'),
+                      ('console', 'WARNING', '  a'))
+
+    @log_capture()
+    def test_ignore_errors(self, capture):
+        self.funcs['a'] = self._command('a', fail=True)
+
+        self._run(['a', 'b'], exit_on_error=False)
+
+        capture.check(('console', 'WARNING', '  a'),
+                      ('console', 'ERROR', '  a failed'),
+                      ('console', 'WARNING', '  b'))
+
+
+@pytest.mark.unit
+class ForEachScriptRunnerTest(unittest.TestCase):
+
+    def setUp(self):
+        folder = tempfile.TemporaryDirectory()
+        self.addCleanup(folder.cleanup)
+        self.file = Path(folder.name).joinpath('users.csv')
+        self.file.write_text('name,role\nanna,EDITOR\nbob,fail\ncarl,VIEWER\n')
+
+        self.barrier = None
+
+    def _parse_args(self, argv):
+        def func(args, nested):
+            if self.barrier and argv[0] == 'add':
+                self.barrier.wait()
+            io.warn(' '.join(argv))
+            if any('fail' in arg for arg in argv):
+                raise McmdError('{} failed'.format(argv[1]))
+
+        return Namespace(command=argv[0], as_user=None, func=func)
+
+    def _run(self, parallel=1, exit_on_error=True):
+        script = script_parser.parse(["$value file",
+                                      "$value group = 'biobank'",
+                                      "$foreach user in '{{file}}'",
+                                      "    # {{user.name}}",
+                                      "    add {{user.name}} {{group}}",
+                                      "    make {{user.name}} {{group}}_{{user.role}}",
+                                      "$/foreach",
+                                      "ping"])
+        options = ScriptOptions(arguments={'file': str(self.file)}, exit_on_error=exit_on_error, parallel=parallel)
+        with patch('mcmd.script.script_runner.arg_parser.parse_args', side_effect=self._parse_args):
+            script_runner.run(script, options)
+
+    @log_capture()
+    def test_foreach(self, capture):
+        self._run(exit_on_error=False)
+
+        capture.check(('console', 'INFO', 'anna'),
+                      ('console', 'WARNING', '  add anna biobank'),
+                      ('console', 'WARNING', '  make anna biobank_EDITOR'),
+                      ('console', 'INFO', 'bob'),
+                      ('console', 'WARNING', '  add bob biobank'),
+                      ('console', 'WARNING', '  make bob biobank_fail'),
+                      ('console', 'ERROR', '  bob failed (row on line 3 of users.csv)'),
+                      ('console', 'INFO', 'carl'),
+                      ('console', 'WARNING', '  add carl biobank'),
+                      ('console', 'WARNING', '  make carl biobank_VIEWER'),
+                      ('console', 'WARNING', '  ping'))
+
+    @log_capture()
+    def test_foreach_in_parallel(self, capture):
+        self._run(parallel=3, exit_on_error=False)
+
+        # the output of the rows is shown in the order of the file
+        capture.check(('console', 'INFO', 'anna'),
+                      ('console', 'WARNING', '  add anna biobank'),
+                      ('console', 'WARNING', '  make anna biobank_EDITOR'),
+                      ('console', 'INFO', 'bob'),
+                      ('console', 'WARNING', '  add bob biobank'),
+                      ('console', 'WARNING', '  make bob biobank_fail'),
+                      ('console', 'ERROR', '  bob failed (row on line 3 of users.csv)'),
+                      ('console', 'INFO', 'carl'),
+                      ('console', 'WARNING', '  add carl biobank'),
+                      ('console', 'WARNING', '  make carl biobank_VIEWER'),
+                      ('console', 'WARNING', '  ping'))
+
+    @log_capture()
+    def test_rows_run_in_parallel(self, capture):
+        # the first command of every row waits for the first commands of the other rows
+        self.barrier = threading.Barrier(3, timeout=5)
+
+        self._run(parallel=3, exit_on_error=False)
+
+        assert not self.barrier.broken
+
+    @log_capture()
+    def test_foreach_row_with_quote(self, capture):
+        self.file.write_text("name,role\nO'Brien,EDITOR\ncarl,VIEWER\n")
+
+        self._run(exit_on_error=False)
+
+        assert ('console', 'ERROR', '  Invalid command: No closing quotation (row on line 2 of users.csv)') in \
+            capture.actual()
+        assert ('console', 'WARNING', '  make carl biobank_VIEWER') in capture.actual()
+
+    @log_capture()
+    def test_foreach_error_stops_script(self, capture):
+        with self.assertRaises(ScriptError) as context:
+            self._run()
+
+        assert context.exception.line == 6
+        assert context.exception.message == 'bob failed (row on line 3 of users.csv)'
+        assert ('console', 'WARNING', '  make carl biobank_VIEWER') not in capture.actual()
+
+    @log_capture()
+    def test_foreach_missing_file(self, capture):
+        self.file.unlink()
+
+        with self.assertRaises(ScriptError) as context:
+            self._run()
+
+        assert context.exception.line == 3
@@ -0,0 +1,64 @@
+import unittest
+from unittest.mock import patch, MagicMock
+
+import pytest
+
+from mcmd.core.errors import McmdError
+from mcmd.utils import backoff
+
+
+@pytest.mark.unit
+@patch('mcmd.utils.backoff.random.uniform', side_effect=lambda low, high: high)
+@patch('mcmd.utils.backoff.time.sleep')
+class BackoffTest(unittest.TestCase):
+
+    def test_poll_returns_last_result(self, sleep, _):
+        func = MagicMock(side_effect=['RUNNING', 'RUNNING', 'FINISHED'])
+
+        result = backoff.poll(func, lambda status: status != 'RUNNING', initial_interval=0.5, max_interval=10)
+
+        assert result == 'FINISHED'
+        assert func.call_count == 3
+        assert sleep.call_count == 2
+
+    def test_poll_done_right_away(self, sleep, _):
+        result = backoff.poll(lambda: 'FINISHED', lambda status: status != 'RUNNING', initial_interval=0.5,
+                              max_interval=10)
+
+        assert result == 'FINISHED'
+        sleep.assert_not_called()
+
+    def test_poll_backs_off_until_ceiling(self, sleep, _):
+        func = MagicMock(side_effect=['RUNNING'] * 6 + ['FINISHED'])
+
+        backoff.poll(func, lambda status: status != 'RUNNING', initial_interval=0.5, max_interval=3)
+
+        assert [call[0][0] for call in sleep.call_args_list] == [0.5, 1, 2, 3, 3, 3]
+
+    def test_poll_jitter(self, sleep, uniform):
+        uniform.side_effect = lambda low, high: low
+        func = MagicMock(side_effect=['RUNNING', 'RUNNING', 'FINISHED'])
+
+        backoff.poll(func, lambda status: status != 'RUNNING', initial_interval=1, max_interval=10)
+
+        assert [call[0][0] for call in sleep.call_args_list] == [0.5, 1]
+
+    def test_poll_reports_progress(self, _, __):
+        func = MagicMock(side_effect=[1, 2, 3])
+        on_poll = MagicMock()
+
+        backoff.poll(func, lambda progress: progress == 3, initial_interval=0.5, max_interval=10, on_poll=on_poll)
+
+        assert [call[0][0] for call in on_poll.call_args_list] == [1, 2]
+
+    @patch('mcmd.utils.backoff.time.monotonic')
+    def test_poll_timeout(self, monotonic, sleep, _):
+        monotonic.side_effect = [0, 1, 4, 6]
+        func = MagicMock(return_value='RUNNING')
+
+        with self.assertRaises(McmdError) as context:
+            backoff.poll(func, lambda status: status != 'RUNNING', initial_interval=1, max_interval=10, timeout=5)
+
+        assert context.exception.message == 'Gave up waiting after 5 seconds'
+        assert [call[0][0] for call in sleep.call_args_list] == [1, 1]
+        assert func.call_count == 3
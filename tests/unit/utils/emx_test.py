@@ -0,0 +1,66 @@
+import tempfile
+import unittest
+import zipfile
+from pathlib import Path
+
+import pytest
+
+from mcmd.utils.emx import read_dependencies, EmxDependencies
+
+_DATASETS = Path(__file__).parents[2].joinpath('integration', 'files', 'datasets')
+
+
+@pytest.mark.unit
+class EmxTest(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+        self.path = Path(self.folder.name)
+
+    def tearDown(self):
+        self.folder.cleanup()
+
+    def test_read_xlsx(self):
+        dependencies = read_dependencies(_DATASETS.joinpath('it_emx_autoid.xlsx'))
+
+        assert 'it_emx_autoid_testAutoId' in dependencies.defines
+        assert 'it_emx_autoid' in dependencies.defines
+        assert dependencies.references == frozenset()
+
+    def test_read_xlsx_with_reference(self):
+        dependencies = read_dependencies(_DATASETS.joinpath('broken.xlsx'))
+
+        assert dependencies.references == {'unexist'}
+
+    def test_read_zip(self):
+        file = self.path.joinpath('emx.zip')
+        with zipfile.ZipFile(str(file), 'w') as archive:
+            archive.writestr('packages.csv', 'name,parent\nbase_sub,base\n')
+            archive.writestr('entities.tsv', 'name\tpackage\textends\nperson\tbase_sub\tbase_being\n')
+            archive.writestr('attributes.csv', 'name,entity,refEntity\nid,base_sub_person,\n'
+                                               'country,base_sub_person,geo_country\n')
+            archive.writestr('base_sub_person.csv', 'id,country\n1,nl\n')
+
+        dependencies = read_dependencies(file)
+
+        assert dependencies.defines == {'base_sub', 'person', 'base_sub_person'}
+        assert dependencies.references == {'base', 'base_being', 'geo_country'}
+
+    def test_read_data_file(self):
+        file = self.path.joinpath('geo_country.csv')
+        file.write_text('id\nnl\n')
+
+        assert read_dependencies(file) == EmxDependencies(references=frozenset({'geo_country'}))
+
+    def test_read_unreadable_file(self):
+        file = self.path.joinpath('broken.xlsx')
+        file.write_text('not a zip file')
+
+        assert read_dependencies(file) == EmxDependencies()
+
+    def test_depends_on(self):
+        geo = EmxDependencies(defines=frozenset({'geo_country'}))
+        person = EmxDependencies(defines=frozenset({'base_person'}), references=frozenset({'geo_country'}))
+
+        assert person.depends_on(geo)
+        assert not geo.depends_on(person)
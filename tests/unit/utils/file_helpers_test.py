@@ -0,0 +1,45 @@
+import tempfile
+import unittest
+from pathlib import Path
+
+import pytest
+
+from mcmd.core.errors import McmdError
+from mcmd.utils.file_helpers import read_rows
+
+
+@pytest.mark.unit
+class ReadRowsTest(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+        self.addCleanup(self.folder.cleanup)
+        self.path = Path(self.folder.name)
+
+    def test_read_csv(self):
+        file = self.path.joinpath('users.csv')
+        file.write_text('username,email\nhenk,"henk@example.org"\ningrid,\n')
+
+        rows = list(read_rows(file, required_columns=['username']))
+
+        assert rows == [(2, {'username': 'henk', 'email': 'henk@example.org'}),
+                        (3, {'username': 'ingrid', 'email': ''})]
+
+    def test_read_tsv(self):
+        file = self.path.joinpath('users.tsv')
+        file.write_text('username\temail\nhenk\thenk@example.org\n')
+
+        assert list(read_rows(file)) == [(2, {'username': 'henk', 'email': 'henk@example.org'})]
+
+    def test_read_missing_column(self):
+        file = self.path.joinpath('users.csv')
+        file.write_text('name\nhenk\n')
+
+        with self.assertRaises(McmdError) as context:
+            list(read_rows(file, required_columns=['username']))
+
+        assert context.exception.message == 'File users.csv has no username column'
+
+    def test_read_missing_file(self):
+        with self.assertRaises(McmdError):
+            list(read_rows(self.path.joinpath('missing.csv')))
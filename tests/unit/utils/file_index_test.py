@@ -0,0 +1,101 @@
+import os
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+from mcmd.utils import file_index
+
+
+@pytest.mark.unit
+class FileIndexTest(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+        self.addCleanup(self.folder.cleanup)
+        self.path = Path(self.folder.name)
+        self.datasets = self.path.joinpath('datasets')
+        self.datasets.mkdir()
+        self.cache = self.path.joinpath('cache')
+        self.cache.mkdir()
+
+        context_patcher = patch('mcmd.core.cache.context')
+        context_patcher.start().return_value.get_cache_folder.return_value = self.cache
+        self.addCleanup(context_patcher.stop)
+
+        file_index._folders = None
+        self.addCleanup(setattr, file_index, '_folders', None)
+
+    def _create(self, *parts):
+        file = self.datasets.joinpath(*parts)
+        file.parent.mkdir(parents=True, exist_ok=True)
+        file.write_text('')
+        return file
+
+    def test_index(self):
+        xlsx = self._create('emx.xlsx')
+        csv = self._create('emx.csv')
+        vcf = self._create('data.vcf')
+        self._create('.hidden.xlsx')
+        self._create('sub', 'other.xlsx')
+
+        index = file_index.get_index([self.datasets])
+
+        assert set(index.keys()) == {'emx', 'data'}
+        assert sorted(index['emx']) == sorted([xlsx, csv])
+        assert index['data'] == [vcf]
+        assert 'other' not in index
+
+    def test_index_recursive(self):
+        other = self._create('sub', 'deeper', 'other.xlsx')
+
+        index = file_index.get_index([self.datasets], recursive=True)
+
+        assert index['other'] == [other]
+
+    def test_index_multiple_folders(self):
+        first = self._create('emx.xlsx')
+        resources = self.path.joinpath('resources')
+        resources.mkdir()
+        second = resources.joinpath('emx.xlsx')
+        second.write_text('')
+
+        index = file_index.get_index([self.datasets, resources, self.path.joinpath('missing')])
+
+        assert index['emx'] == [first, second]
+        assert len(index) == 1
+
+    def test_index_is_reused(self):
+        self._create('emx.xlsx')
+        file_index.get_index([self.datasets])
+
+        # a new process reads the stored index and doesn't list the folder again
+        file_index._folders = None
+        with patch('mcmd.utils.file_index.os.scandir') as scandir:
+            index = file_index.get_index([self.datasets])
+
+        scandir.assert_not_called()
+        assert 'emx' in index
+
+    def test_index_is_rebuilt_when_folder_changes(self):
+        self._create('emx.xlsx')
+        file_index.get_index([self.datasets])
+
+        new = self._create('new.xlsx')
+        # make sure that the modification time differs, even on file systems with a coarse resolution
+        os.utime(str(self.datasets), ns=(0, 0))
+        index = file_index.get_index([self.datasets])
+
+        assert index['new'] == [new]
+
+    def test_index_is_rebuilt_when_subfolder_changes(self):
+        self._create('sub', 'emx.xlsx')
+        file_index.get_index([self.datasets], recursive=True)
+
+        new = self._create('sub', 'new.xlsx')
+        os.utime(str(self.datasets.joinpath('sub')), ns=(0, 0))
+        index = file_index.get_index([self.datasets], recursive=True)
+
+        assert index['new'] == [new]
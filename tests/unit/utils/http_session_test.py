@@ -0,0 +1,41 @@
+import unittest
+from unittest.mock import patch, MagicMock
+
+import pytest
+
+from mcmd.utils import http_session
+
+_HTTP_CONFIG = {'connect_timeout': 5,
+                'read_timeout': 30,
+                'pool_size': 8}
+
+
+@pytest.mark.unit
+class HttpSessionTest(unittest.TestCase):
+
+    def tearDown(self):
+        http_session._session = None
+
+    @patch('mcmd.config.config.get')
+    def test_session_is_shared(self, config_get):
+        config_get.side_effect = lambda section, key: _HTTP_CONFIG[key]
+
+        assert http_session.get_session() is http_session.get_session()
+
+    @patch('mcmd.config.config.get')
+    def test_session_pool_size(self, config_get):
+        config_get.side_effect = lambda section, key: _HTTP_CONFIG[key]
+
+        adapter = http_session.get_session().get_adapter('https://molgenis.org')
+        assert adapter._pool_maxsize == 8
+
+    @patch('requests.adapters.HTTPAdapter.send')
+    def test_default_timeout(self, send):
+        adapter = http_session._TimeoutHTTPAdapter(timeout=(5, 30))
+        request = MagicMock()
+
+        adapter.send(request, timeout=None)
+        send.assert_called_with(request, timeout=(5, 30))
+
+        adapter.send(request, timeout=1)
+        send.assert_called_with(request, timeout=1)
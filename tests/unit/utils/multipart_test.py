@@ -0,0 +1,92 @@
+import email
+import tempfile
+import threading
+import unittest
+from http.server import HTTPServer, BaseHTTPRequestHandler
+from pathlib import Path
+
+import pytest
+import requests
+
+from mcmd.utils.multipart import MultipartEncoder
+
+
+def _parse(content_type, body):
+    message = email.message_from_bytes(b'Content-Type: ' + content_type.encode() + b'\r\n\r\n' + body)
+    return {part.get_param('name', header='Content-Disposition'): (part.get_filename(),
+                                                                   part.get_content_type(),
+                                                                   part.get_payload(decode=True))
+            for part in message.get_payload()}
+
+
+class _RecordingHandler(BaseHTTPRequestHandler):
+    received = dict()
+
+    def do_POST(self):
+        length = int(self.headers['Content-Length'])
+        _RecordingHandler.received = {'content_type': self.headers['Content-Type'],
+                                      'body': self.rfile.read(length)}
+        self.send_response(200)
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.mark.unit
+class MultipartEncoderTest(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+        self.addCleanup(self.folder.cleanup)
+        self.file = Path(self.folder.name, 'data.csv')
+        self.file.write_bytes(b'id,name\n' + b'1,test\n' * 1000)
+
+    def test_read_in_chunks(self):
+        progress = list()
+        with MultipartEncoder({'file': ('data.csv', self.file, None)}, on_read=progress.append) as encoder:
+            chunks = iter(lambda: encoder.read(100), b'')
+            body = b''.join(chunk for chunk in chunks if len(chunk) <= 100)
+
+        assert len(body) == len(encoder)
+        assert progress[-1] == len(encoder)
+        assert _parse(encoder.content_type, body) == {'file': ('data.csv', 'text/csv', self.file.read_bytes())}
+
+    def test_multiple_files(self):
+        other = Path(self.folder.name, 'logo.png')
+        other.write_bytes(b'\x89PNG')
+
+        with MultipartEncoder({'first': ('data.csv', self.file, 'text/plain'),
+                               'second': ('logo.png', other, None)}) as encoder:
+            body = encoder.read()
+
+        assert _parse(encoder.content_type, body) == {
+            'first': ('data.csv', 'text/plain', self.file.read_bytes()),
+            'second': ('logo.png', 'image/png', b'\x89PNG')}
+
+    def test_file_closed(self):
+        encoder = MultipartEncoder({'file': ('data.csv', self.file, None)})
+        encoder.read(200)
+        stream = encoder._stream
+
+        encoder.close()
+
+        assert stream.closed
+
+    def test_send_with_requests(self):
+        server = HTTPServer(('localhost', 0), _RecordingHandler)
+        thread = threading.Thread(target=server.serve_forever)
+        thread.start()
+        try:
+            with MultipartEncoder({'file': ('data.csv', self.file, None)}) as encoder:
+                requests.post('http://localhost:{}/'.format(server.server_port),
+                              headers={'Content-Type': encoder.content_type},
+                              data=encoder)
+        finally:
+            server.shutdown()
+            thread.join()
+            server.server_close()
+
+        received = _RecordingHandler.received
+        assert _parse(received['content_type'], received['body']) == {
+            'file': ('data.csv', 'text/csv', self.file.read_bytes())}
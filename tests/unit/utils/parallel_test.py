@@ -0,0 +1,34 @@
+import threading
+import unittest
+
+import pytest
+
+from mcmd.utils.parallel import map_parallel, run_parallel
+
+
+@pytest.mark.unit
+class ParallelTest(unittest.TestCase):
+
+    def test_map_parallel_keeps_order(self):
+        assert map_parallel(lambda x: x * 2, [3, 1, 2], max_workers=3) == [6, 2, 4]
+
+    def test_map_parallel_runs_concurrently(self):
+        barrier = threading.Barrier(3, timeout=5)
+
+        # would time out if the calls were done one after the other
+        results = map_parallel(lambda x: barrier.wait() is not None and x, [1, 2, 3], max_workers=3)
+
+        assert results == [1, 2, 3]
+
+    def test_map_parallel_raises_first_error(self):
+        def func(x):
+            if x > 1:
+                raise ValueError(x)
+            return x
+
+        with self.assertRaises(ValueError) as context:
+            map_parallel(func, [1, 2, 3], max_workers=3)
+        assert context.exception.args == (2,)
+
+    def test_run_parallel(self):
+        assert run_parallel(lambda: 'a', lambda: 'b') == ['a', 'b']
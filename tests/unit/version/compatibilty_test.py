@@ -3,6 +3,7 @@ from unittest.mock import patch
 
 import pytest
 
+from mcmd.core import compatibility
 from mcmd.core.compatibility import version
 
 
@@ -44,6 +45,19 @@ class CompatibilityTest(unittest.TestCase):
         version_number.return_value = '4.0.0'
         assert get_impl() == '3.0.0'
 
+    @patch('mcmd.core.compatibility._resolve', wraps=compatibility._resolve)
+    @patch('mcmd.molgenis.version.get_version_number')
+    def test_version_resolved_once(self, version_number, resolve):
+        version_number.return_value = '2.7.0'
+        assert get_impl() == '2.2.2'
+        assert get_impl() == '2.2.2'
+        resolve.assert_called_once()
+
+        # e.g. after switching to a host with another version
+        version_number.return_value = '3.1.0'
+        assert get_impl() == '3.0.0'
+        assert resolve.call_count == 2
+
     def test_version_duplicate(self):
         with self.assertRaises(ValueError):
             # noinspection PyShadowingNames
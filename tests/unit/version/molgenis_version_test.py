@@ -1,7 +1,12 @@
+import tempfile
+import time
 import unittest
+from pathlib import Path
+from unittest.mock import patch
 
 import pytest
 
+from mcmd.core import cache
 from mcmd.core.errors import McmdError
 from mcmd.molgenis import version
 
@@ -32,3 +37,53 @@ class MolgenisVersionTest(unittest.TestCase):
     def test_extract_version_number_invalid(self):
         with self.assertRaises(McmdError):
             version._extract_version_number('4.0-TESTING')
+
+
+_HOST = 'http://localhost/'
+
+
+@pytest.mark.unit
+@patch('mcmd.config.config.get', new=lambda *args: _HOST if args == ('host', 'selected') else 3600)
+class StoredMolgenisVersionTest(unittest.TestCase):
+
+    def setUp(self):
+        self.cache_folder = tempfile.TemporaryDirectory()
+        context_patcher = patch('mcmd.core.cache.context')
+        context_patcher.start().return_value.get_cache_folder.return_value = Path(self.cache_folder.name)
+        self.addCleanup(context_patcher.stop)
+        self.addCleanup(self.cache_folder.cleanup)
+
+    def tearDown(self):
+        version._versions.clear()
+        version._version_numbers.clear()
+
+    @patch('mcmd.molgenis.version._fetch_version')
+    def test_version_stored(self, fetch_version):
+        fetch_version.return_value = '8.3.0-SNAPSHOT'
+
+        assert version.get_version_number() == '8.3.0'
+
+        # a new process starts without versions in memory
+        version._versions.clear()
+        version._version_numbers.clear()
+
+        assert version.get_version() == '8.3.0-SNAPSHOT'
+        fetch_version.assert_called_once()
+
+    @patch('mcmd.molgenis.version._fetch_version')
+    def test_stored_version_expired(self, fetch_version):
+        cache.write('versions.json', {_HOST: {'version': '7.0.0', 'timestamp': time.time() - 3600}})
+        fetch_version.return_value = '8.3.0'
+
+        assert version.get_version() == '8.3.0'
+        assert cache.read('versions.json')[_HOST]['version'] == '8.3.0'
+
+    @patch('mcmd.molgenis.version._fetch_version')
+    def test_refresh_version(self, fetch_version):
+        cache.write('versions.json', {_HOST: {'version': '7.0.0', 'timestamp': time.time()}})
+        fetch_version.return_value = '8.3.0'
+
+        assert version.get_version() == '7.0.0'
+        assert version.refresh_version() == '8.3.0'
+        assert version.get_version_number() == '8.3.0'
+        assert cache.read('versions.json')[_HOST]['version'] == '8.3.0'